@@ -0,0 +1,69 @@
+"""add composite indexes for hot queries
+
+Revision ID: 5b2e9c41a7d0
+Revises: df719a3dd6ff
+Create Date: 2026-10-18 10:12:44.104512
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b2e9c41a7d0"
+down_revision: Union[str, Sequence[str], None] = "df719a3dd6ff"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # conversations.patient_id was created as INTEGER while patients.id is a
+    # 12-char string; batch mode rebuilds the table on SQLite
+    with op.batch_alter_table("conversations") as batch_op:
+        batch_op.alter_column(
+            "patient_id",
+            existing_type=sa.Integer(),
+            type_=sa.String(length=12),
+            existing_nullable=True,
+        )
+        batch_op.create_index(
+            "ix_conversations_patient_id_started_at", ["patient_id", "started_at"]
+        )
+
+    op.create_index(
+        "ix_messages_conversation_id_created_at",
+        "messages",
+        ["conversation_id", "created_at"],
+    )
+    op.create_index(
+        "ix_appointments_status_start_time_end_time",
+        "appointments",
+        ["status", "start_time", "end_time"],
+    )
+    op.create_index(
+        "ix_appointments_target_date_status",
+        "appointments",
+        ["target_date", "status"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_appointments_target_date_status", table_name="appointments")
+    op.drop_index(
+        "ix_appointments_status_start_time_end_time", table_name="appointments"
+    )
+    op.drop_index("ix_messages_conversation_id_created_at", table_name="messages")
+
+    with op.batch_alter_table("conversations") as batch_op:
+        batch_op.drop_index("ix_conversations_patient_id_started_at")
+        batch_op.alter_column(
+            "patient_id",
+            existing_type=sa.String(length=12),
+            type_=sa.Integer(),
+            existing_nullable=True,
+        )
@@ -0,0 +1,37 @@
+"""add transcript of messages older than the history window to conversations
+
+Revision ID: a41c7e2f9b13
+Revises: 5b2e9c41a7d0
+Create Date: 2026-10-18 11:02:15.337820
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a41c7e2f9b13"
+down_revision: Union[str, Sequence[str], None] = "5b2e9c41a7d0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "conversations", sa.Column("earlier_transcript", sa.Text(), nullable=True)
+    )
+    op.add_column(
+        "conversations",
+        sa.Column("transcript_until", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("conversations") as batch_op:
+        batch_op.drop_column("transcript_until")
+        batch_op.drop_column("earlier_transcript")
@@ -0,0 +1,48 @@
+"""add chair / provider resource to appointments
+
+Revision ID: c7d3a9e1f482
+Revises: a41c7e2f9b13
+Create Date: 2026-10-18 14:20:31.508114
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c7d3a9e1f482"
+down_revision: Union[str, Sequence[str], None] = "a41c7e2f9b13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # existing bookings were made against a single chair: put them on
+    # "chair-1", the default CLINIC_RESOURCES
+    op.add_column(
+        "appointments",
+        sa.Column(
+            "resource_id",
+            sa.String(length=32),
+            nullable=False,
+            server_default="chair-1",
+        ),
+    )
+    op.create_index(
+        "ix_appointments_resource_id_status_start_time",
+        "appointments",
+        ["resource_id", "status", "start_time"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_appointments_resource_id_status_start_time", table_name="appointments"
+    )
+    with op.batch_alter_table("appointments") as batch_op:
+        batch_op.drop_column("resource_id")
@@ -0,0 +1,97 @@
+# app/appointments/cache.py
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app import config
+
+
+class AvailabilityCache:
+    """
+    In-process LRU + TTL cache of available slots keyed by (target_date,
+    slot_minutes, resources): slot_minutes is the length of the appointment
+    being placed, resources the chairs / providers searched.
+
+    Writers call invalidate() with the dates they touched. Each date carries a
+    version so a reader that queried before an invalidation can't store stale slots.
+
+    The cache is per process. With a Socket.IO message queue, on_invalidate
+    broadcasts each invalidation to the other workers, which apply it with
+    invalidate_local() (see app/websocket_app.py); a broadcast the queue loses
+    leaves stale slots for at most ttl_seconds.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl_seconds: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[date, int, tuple], Tuple[float, tuple]]" = (
+            OrderedDict()
+        )
+        self._versions: Dict[date, int] = {}
+        self.hits = 0
+        self.misses = 0
+        # called with the dates of every invalidate(), e.g. to tell other workers
+        self.on_invalidate: Optional[Callable[[List[date]], None]] = None
+
+    def version(self, target_date: date) -> int:
+        return self._versions.get(target_date, 0)
+
+    def get(
+        self, target_date: date, slot_minutes: int, resources: Sequence[str] = ()
+    ) -> Optional[List[datetime]]:
+        key = (target_date, slot_minutes, tuple(resources))
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return list(entry[1])
+
+    def set(
+        self,
+        target_date: date,
+        slot_minutes: int,
+        slots: List[datetime],
+        version: Optional[int] = None,
+        resources: Sequence[str] = (),
+    ) -> None:
+        if self.maxsize <= 0:
+            return
+        if version is not None and version != self.version(target_date):
+            return
+        key = (target_date, slot_minutes, tuple(resources))
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, tuple(slots))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *dates: date) -> None:
+        dates = [d for d in set(dates) if d is not None]
+        self.invalidate_local(*dates)
+        if dates and self.on_invalidate is not None:
+            self.on_invalidate(dates)
+
+    def invalidate_local(self, *dates: date) -> None:
+        """invalidate() without on_invalidate, for invalidations made elsewhere."""
+        for target_date in set(dates):
+            if target_date is None:
+                continue
+            self._versions[target_date] = self.version(target_date) + 1
+            for key in [k for k in self._entries if k[0] == target_date]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._versions.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+availability_cache = AvailabilityCache(
+    maxsize=config.AVAILABILITY_CACHE_SIZE,
+    ttl_seconds=config.AVAILABILITY_CACHE_TTL_SECONDS,
+)
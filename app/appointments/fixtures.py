@@ -1,14 +1,23 @@
 import asyncio
 import random
-from datetime import datetime, timedelta, time, date
+from datetime import datetime, timedelta, time, date, timezone
+from typing import Optional
 from faker import Faker
 from sqlalchemy import select
+from app.db.bulk import SeedReport, block_rng, bulk_seed
 from app.db.database import AsyncSessionLocal
-from app.appointments.models import Appointment, AppointmentStatus
+from app.appointments.interface import BUSINESS_CLOSE_HOUR, BUSINESS_OPEN_HOUR
+from app.appointments.models import Appointment, AppointmentStatus, AppointmentType
+from app.patient_info.fixtures import bulk_patient_id
 from app.patient_info.models import Patient
 
 fake = Faker()
 
+# bulk appointments are generated a week at a time; ids are
+# "apt<date ordinal:06d><n:03d>", so seeding runs with different first days
+# never reuse an id
+DAYS_PER_BLOCK = 7
+
 
 async def create_appointments(count: int):
     """Create a given number of fake appointment records spread over a week (Mon–Sat, 8 AM–6 PM)."""
@@ -71,6 +80,106 @@ async def create_appointments(count: int):
         return appointments
 
 
+# ----------------------------
+# Bulk seeding
+# ----------------------------
+
+
+def appointment_block(
+    seed: int,
+    block: int,
+    lo: int,
+    hi: int,
+    first_day: date,
+    patients: int,
+    fill: float,
+) -> dict:
+    """
+    Appointments for days [block * DAYS_PER_BLOCK, ...) within [lo, hi). Each
+    business day is walked from opening to closing time; every gap is either
+    booked (with probability `fill`) or skipped by 15 minutes, so no two
+    appointments overlap. Past ones are completed or cancelled.
+    """
+    rng = block_rng("appointments", seed, block)
+    today = date.today()
+    now = datetime.now(timezone.utc)
+    opening, closing = time(BUSINESS_OPEN_HOUR), time(BUSINESS_CLOSE_HOUR)
+    rows = []
+    for day in range(block * DAYS_PER_BLOCK, min((block + 1) * DAYS_PER_BLOCK, hi)):
+        target_date = first_day + timedelta(days=day)
+        if target_date.weekday() == 6:
+            continue
+        cursor = datetime.combine(target_date, opening)
+        close = datetime.combine(target_date, closing)
+        booked = 0
+        while True:
+            end = cursor + timedelta(minutes=rng.choice((30, 45, 60)))
+            if end > close:
+                break
+            if rng.random() >= fill:
+                cursor += timedelta(minutes=15)
+                continue
+            cancelled = rng.random() < 0.08
+            patient = rng.randrange(patients)
+            appointment_type = rng.choice(list(AppointmentType)).value
+            if day >= lo:
+                if cancelled:
+                    status = AppointmentStatus.CANCELLED.value
+                elif target_date < today:
+                    status = AppointmentStatus.COMPLETED.value
+                else:
+                    status = AppointmentStatus.SCHEDULED.value
+                rows.append(
+                    {
+                        "id": f"apt{target_date.toordinal():06d}{booked:03d}",
+                        "patient_id": bulk_patient_id(patient),
+                        "appointment_type": appointment_type,
+                        "start_time": cursor,
+                        "end_time": end,
+                        "target_date": target_date,
+                        "status": status,
+                        "notes": None,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                )
+            booked += 1
+            # a cancelled slot is free again for the next booking
+            if not cancelled:
+                cursor = end
+    return {"appointments": rows}
+
+
+async def seed_appointments(
+    days: int,
+    patients: int,
+    first_day: Optional[date] = None,
+    fill: float = 0.7,
+    seed: int = 0,
+    chunk_days: int = 364,
+    workers: int = 0,
+) -> SeedReport:
+    """
+    Bulk-insert `days` days of appointments for the first `patients`
+    bulk-seeded patients, starting at first_day (default: centred on today).
+    """
+    if first_day is None:
+        first_day = date.today() - timedelta(days=days // 2)
+    return await bulk_seed(
+        appointment_block,
+        [Appointment.__table__],
+        0,
+        days,
+        seed=seed,
+        chunk_size=chunk_days,
+        workers=workers,
+        block_size=DAYS_PER_BLOCK,
+        first_day=first_day,
+        patients=patients,
+        fill=fill,
+    )
+
+
 if __name__ == "__main__":
     import argparse
 
@@ -81,6 +190,37 @@ if __name__ == "__main__":
         default=10,
         help="Number of fake appointments to create (default: 10)",
     )
+    parser.add_argument(
+        "--bulk-days",
+        type=int,
+        default=0,
+        help="Instead, bulk-seed this many days of conflict-free appointments",
+    )
+    parser.add_argument(
+        "--patients",
+        type=int,
+        default=0,
+        help="Number of bulk-seeded patients to book for (required with --bulk-days)",
+    )
+    parser.add_argument("--fill", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--workers", type=int, default=0, help="Generator processes (0 = inline)"
+    )
     args = parser.parse_args()
 
-    asyncio.run(create_appointments(args.count))
+    if args.bulk_days:
+        if not args.patients:
+            parser.error("--bulk-days needs --patients")
+        report = asyncio.run(
+            seed_appointments(
+                args.bulk_days,
+                args.patients,
+                fill=args.fill,
+                seed=args.seed,
+                workers=args.workers,
+            )
+        )
+        print(f"✅ Seeded {report}")
+    else:
+        asyncio.run(create_appointments(args.count))
@@ -1,17 +1,59 @@
 # app/booking/interface.py
 from datetime import datetime, time, timedelta, date
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import and_
 from dateutil import parser as date_parser
 
-from app.appointments.models import Appointment, AppointmentType, AppointmentStatus
-from app.db.utils import with_db
+from app import config
+from app.appointments.cache import availability_cache
+from app.appointments.models import (
+    Appointment,
+    AppointmentRow,
+    AppointmentStatus,
+    AppointmentType,
+)
+from app.appointments.slots import ResourceSchedule
+from app.db.pagination import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_PAGE_SIZE,
+    Page,
+    fetch_page,
+    project,
+    stream_scalars,
+)
+from app.db.readonly import fetch_as, select_as
+from app.db.utils import (
+    acquire_write_lock,
+    after_commit,
+    commit,
+    release_write_lock,
+    with_db,
+)
 
 
 BUSINESS_OPEN_HOUR = 8  # 08:00
 BUSINESS_CLOSE_HOUR = 18  # 18:00
+DEFAULT_DURATION_MINUTES = 30
+# offered start times fall on this grid, whatever the appointment's length
+SLOT_STEP_MINUTES = 30
+
+
+def appointment_duration(appointment_type: Optional[str]) -> int:
+    """Minutes an appointment of this type takes (config.APPOINTMENT_DURATIONS)."""
+    return config.APPOINTMENT_DURATIONS.get(appointment_type, DEFAULT_DURATION_MINUTES)
+
+
+def eligible_resources(appointment_type: Optional[str] = None) -> Tuple[str, ...]:
+    """
+    Chairs / providers an appointment of this type can be booked on, in
+    preference order (config.APPOINTMENT_RESOURCES; default: all of them).
+    """
+    allowed = config.APPOINTMENT_RESOURCES.get(appointment_type)
+    if allowed is None:
+        return tuple(config.CLINIC_RESOURCES)
+    return tuple(r for r in allowed if r in config.CLINIC_RESOURCES)
 
 
 def _is_business_day(dt: datetime) -> bool:
@@ -31,22 +73,135 @@ def _within_business_hours(start: datetime, end: datetime) -> bool:
     )
 
 
-def _overlaps(
-    a_start: datetime, a_end: datetime, b_start: datetime, b_end: datetime
-) -> bool:
-    return (a_start < b_end) and (b_start < a_end)
+def _booking_lock_key(day: date) -> str:
+    return f"appointments:{day.isoformat()}"
+
+
+def _invalidate_slots(db: AsyncSession, *dates: date) -> None:
+    """
+    Drop the cached slots of `dates` now, so the rest of the turn sees the
+    change, and again on every worker once it is committed, in case a reader
+    cached the old state in between.
+    """
+    availability_cache.invalidate_local(*dates)
+    after_commit(db, lambda: availability_cache.invalidate(*dates))
+
+
+async def _first_free_resource(
+    db: AsyncSession,
+    start: datetime,
+    end: datetime,
+    resources: Sequence[str],
+    exclude_id: Optional[str] = None,
+) -> Optional[str]:
+    """
+    The first of `resources` with no scheduled appointment overlapping
+    [start, end), or None when all of them are taken.
+
+    Appointments never span midnight, so any overlap starts on the same day;
+    bounding start_time to that day keeps the scan to a single day of rows.
+    """
+    day_start = datetime.combine(start.date(), time.min)
+    stmt = select(Appointment.resource_id).where(
+        and_(
+            Appointment.status == AppointmentStatus.SCHEDULED.value,
+            Appointment.start_time >= day_start,
+            Appointment.start_time < end,
+            Appointment.end_time > start,
+            Appointment.resource_id.in_(resources),
+        )
+    )
+    if exclude_id is not None:
+        stmt = stmt.where(Appointment.id != exclude_id)
+    taken = set((await db.execute(stmt.distinct())).scalars())
+    return next((r for r in resources if r not in taken), None)
+
+
+async def _schedule_between(
+    db: AsyncSession, start_dt: datetime, end_dt: datetime
+) -> ResourceSchedule:
+    """Per-resource busy intervals of scheduled appointments starting in [start_dt, end_dt)."""
+    q = await db.execute(
+        select(Appointment.resource_id, Appointment.start_time, Appointment.end_time)
+        .where(
+            and_(
+                Appointment.start_time >= start_dt,
+                Appointment.start_time < end_dt,
+                Appointment.status == AppointmentStatus.SCHEDULED.value,
+            )
+        )
+        .order_by(Appointment.start_time)
+    )
+    return ResourceSchedule(q.all())
+
+
+def _patient_appointments_query(
+    patient_id: str, columns: Optional[Sequence[str]], keys=()
+):
+    return (
+        select(Appointment)
+        .where(Appointment.patient_id == patient_id)
+        .options(*project(Appointment, columns, keys))
+    )
 
 
 @with_db
 async def list_appointments_for_patient(
-    patient_id: int, db: AsyncSession = None
+    patient_id: str,
+    columns: Optional[Sequence[str]] = None,
+    db: AsyncSession = None,
 ) -> List[Appointment]:
-    q = await db.execute(
-        select(Appointment).where(Appointment.patient_id == patient_id)
-    )
+    q = await db.execute(_patient_appointments_query(patient_id, columns))
     return q.scalars().all()
 
 
+@with_db
+async def list_appointments_for_patient_page(
+    patient_id: str,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    columns: Optional[Sequence[str]] = None,
+    db: AsyncSession = None,
+) -> Page[Appointment]:
+    """The patient's appointments by start time, one keyset page at a time."""
+    keys = (Appointment.start_time, Appointment.id)
+    query = _patient_appointments_query(patient_id, columns, keys)
+    return await fetch_page(db, query, keys, cursor, limit)
+
+
+@with_db
+async def list_appointment_rows_for_patient(
+    patient_id: str, upcoming: bool = False, db: AsyncSession = None
+) -> List[AppointmentRow]:
+    """
+    The patient's appointments by start time, as read-only AppointmentRow
+    tuples. upcoming=True keeps the scheduled ones starting from now.
+    """
+    query = select_as(AppointmentRow, Appointment).where(
+        Appointment.patient_id == patient_id
+    )
+    if upcoming:
+        query = query.where(
+            Appointment.status == AppointmentStatus.SCHEDULED.value,
+            Appointment.start_time >= datetime.now(),
+        )
+    query = query.order_by(Appointment.start_time, Appointment.id)
+    return await fetch_as(db, query, AppointmentRow)
+
+
+def stream_appointments_for_patient(
+    patient_id: str,
+    columns: Optional[Sequence[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    db: AsyncSession = None,
+) -> AsyncIterator[Appointment]:
+    """The patient's appointments by start time, fetched batch_size at a time."""
+    query = _patient_appointments_query(patient_id, columns).order_by(
+        Appointment.start_time, Appointment.id
+    )
+    return stream_scalars(query, batch_size, db)
+
+
 @with_db
 async def list_appointments_between(
     start_dt: datetime,
@@ -67,60 +222,132 @@ async def list_appointments_between(
     if target_date:
         stmt = stmt.where(Appointment.target_date == target_date)
 
-    q = await db.execute(stmt)
+    q = await db.execute(stmt.order_by(Appointment.start_time))
     return q.scalars().all()
 
 
 @with_db
 async def list_available_slots_for_date(
     target_date: date,
-    slot_minutes: int = 30,
+    slot_minutes: Optional[int] = None,
+    appointment_type: Optional[str] = None,
     db: AsyncSession = None,
 ) -> List[datetime]:
     """
-    Return start datetimes for available slots on target_date.
+    Return start datetimes, on the SLOT_STEP_MINUTES grid, for available slots
+    on target_date: those where at least one chair / provider eligible for
+    appointment_type is free for slot_minutes (default: the type's duration).
     Considers business hours and existing scheduled appointments.
     """
+    slot_minutes = slot_minutes or appointment_duration(appointment_type)
+    resources = eligible_resources(appointment_type)
+    cached = availability_cache.get(target_date, slot_minutes, resources)
+    if cached is not None:
+        return cached
+    version = availability_cache.version(target_date)
+
     start_of_day = datetime.combine(target_date, time(BUSINESS_OPEN_HOUR, 0))
     end_of_day = datetime.combine(target_date, time(BUSINESS_CLOSE_HOUR, 0))
 
-    # fetch scheduled appointments for that date
-    appointments = await list_appointments_between(
-        start_of_day, end_of_day, target_date=target_date, db=db
+    schedule = await _schedule_between(db, start_of_day, end_of_day)
+    slots = schedule.free_slots(
+        start_of_day,
+        end_of_day,
+        resources,
+        slot_minutes=slot_minutes,
+        step_minutes=SLOT_STEP_MINUTES,
     )
+    availability_cache.set(
+        target_date, slot_minutes, slots, version=version, resources=resources
+    )
+    return slots
 
-    slot_delta = timedelta(minutes=slot_minutes)
-    slots = []
-    cur = start_of_day
-    while cur + slot_delta <= end_of_day:
-        candidate_start = cur
-        candidate_end = cur + slot_delta
-
-        conflict = any(
-            _overlaps(candidate_start, candidate_end, appt.start_time, appt.end_time)
-            for appt in appointments
-        )
 
-        if not conflict:
-            slots.append(candidate_start)
+@with_db
+async def find_next_available_slots(
+    appointment_type: Optional[str] = None,
+    start: Optional[datetime] = None,
+    days: int = 30,
+    limit: int = 5,
+    step_minutes: int = SLOT_STEP_MINUTES,
+    db: AsyncSession = None,
+) -> List[datetime]:
+    """
+    Return the first `limit` start times, on the step_minutes grid from `start`
+    (default: now) through the next `days` days, where an appointment of this
+    type fits within business hours on a chair / provider eligible for it.
 
-        cur += slot_delta
+    One query streams the window's bookings in start order while a single
+    sweep walks the candidates; it stops reading as soon as `limit` are found.
+    """
+    duration = timedelta(minutes=appointment_duration(appointment_type))
+    step = timedelta(minutes=step_minutes)
+    resources = eligible_resources(appointment_type)
+    start = start or datetime.now()
+    window_end = datetime.combine(
+        start.date() + timedelta(days=days), time(BUSINESS_CLOSE_HOUR, 0)
+    )
+    if not resources:
+        return []
 
-    return slots
+    result = await db.stream(
+        select(Appointment.resource_id, Appointment.start_time, Appointment.end_time)
+        .where(
+            and_(
+                Appointment.status == AppointmentStatus.SCHEDULED.value,
+                # bookings never span midnight, so none that started before
+                # the first day can overlap it
+                Appointment.start_time >= datetime.combine(start.date(), time.min),
+                Appointment.start_time < window_end,
+                Appointment.resource_id.in_(resources),
+            )
+        )
+        .order_by(Appointment.start_time)
+        .execution_options(yield_per=500)
+    )
+    bookings = aiter(result)
+    upcoming = await anext(bookings, None)
+    # per resource, the latest end among its bookings that start before the
+    # current candidate ends
+    busy_until = dict.fromkeys(resources, datetime.min)
+
+    found: List[datetime] = []
+    try:
+        day = start.date()
+        while day <= window_end.date() and len(found) < limit:
+            cur = datetime.combine(day, time(BUSINESS_OPEN_HOUR, 0))
+            close = datetime.combine(day, time(BUSINESS_CLOSE_HOUR, 0))
+            if _is_business_day(cur):
+                while cur < start:
+                    cur += step
+                while cur + duration <= close and len(found) < limit:
+                    while upcoming is not None and upcoming[1] < cur + duration:
+                        resource = upcoming[0]
+                        busy_until[resource] = max(busy_until[resource], upcoming[2])
+                        upcoming = await anext(bookings, None)
+                    if any(until <= cur for until in busy_until.values()):
+                        found.append(cur)
+                    cur += step
+            day += timedelta(days=1)
+    finally:
+        await result.close()
+    return found
 
 
 @with_db
 async def book_appointment(
-    patient_id: int,
+    patient_id: str,
     appointment_type: str,
     start_time_iso: Optional[str] = None,
     target_date: Optional[date] = None,
-    duration_minutes: int = 30,
+    duration_minutes: Optional[int] = None,
     notes: Optional[str] = None,
     db: AsyncSession = None,
 ) -> Appointment:
     """
-    Book an appointment with optional target_date.
+    Book an appointment with optional target_date on the first free chair /
+    provider eligible for appointment_type. duration_minutes defaults to the
+    type's configured duration.
     """
     if start_time_iso:
         start_time = date_parser.parse(start_time_iso)
@@ -129,6 +356,8 @@ async def book_appointment(
     else:
         start_time = None
 
+    if duration_minutes is None:
+        duration_minutes = appointment_duration(appointment_type)
     duration = timedelta(minutes=duration_minutes)
 
     # Emergency: pick earliest slot today or target_date
@@ -137,7 +366,10 @@ async def book_appointment(
             if target_date is None:
                 target_date = datetime.now().date()
             slots = await list_available_slots_for_date(
-                target_date, slot_minutes=duration_minutes, db=db
+                target_date,
+                slot_minutes=duration_minutes,
+                appointment_type=appointment_type,
+                db=db,
             )
             if not slots:
                 raise ValueError(f"No available emergency slots on {target_date}.")
@@ -153,17 +385,18 @@ async def book_appointment(
             "Appointment must be within business hours Mon-Sat 08:00-18:00."
         )
 
-    # check conflicts
-    existing = await db.execute(
-        select(Appointment).where(
-            and_(
-                Appointment.status == AppointmentStatus.SCHEDULED.value,
-                Appointment.start_time < end_time,
-                Appointment.end_time > start_time,
-            )
-        )
-    )
-    if existing.scalars().first():
+    resources = eligible_resources(appointment_type)
+    if not resources:
+        raise ValueError(f"No chair is set up for {appointment_type} appointments.")
+
+    # hold the write lock from the conflict check until the insert commits,
+    # so concurrent chats can't both see the slot as free; the turn's staged
+    # writes (a cancellation, an earlier booking) count in the check
+    await acquire_write_lock(db, _booking_lock_key(start_time.date()))
+    await db.flush()
+    resource_id = await _first_free_resource(db, start_time, end_time, resources)
+    if resource_id is None:
+        await release_write_lock(db)
         raise ValueError("Requested time slot is not available due to conflict.")
 
     appt = Appointment(
@@ -172,11 +405,14 @@ async def book_appointment(
         start_time=start_time,
         end_time=end_time,
         target_date=target_date,
+        resource_id=resource_id,
         status=AppointmentStatus.SCHEDULED.value,
         notes=notes,
     )
     db.add(appt)
-    await db.commit()
+    await db.flush()
+    await commit(db)
+    _invalidate_slots(db, target_date, start_time.date())
     await db.refresh(appt)
     return appt
 
@@ -188,7 +424,8 @@ async def cancel_appointment(appointment_id: int, db: AsyncSession = None) -> bo
     if not appt:
         return False
     appt.status = AppointmentStatus.CANCELLED.value
-    await db.commit()
+    await commit(db)
+    _invalidate_slots(db, appt.target_date, appt.start_time.date())
     return True
 
 
@@ -196,34 +433,49 @@ async def cancel_appointment(appointment_id: int, db: AsyncSession = None) -> bo
 async def reschedule_appointment(
     appointment_id: int, new_start_iso: str, db: AsyncSession = None
 ) -> Appointment:
-    q = await db.execute(select(Appointment).where(Appointment.id == appointment_id))
+    new_start = date_parser.parse(new_start_iso)
+    # lock before reading, so the appointment can't change between the read
+    # and the conflict check
+    await acquire_write_lock(db, _booking_lock_key(new_start.date()))
+    await db.flush()
+    q = await db.execute(
+        select(Appointment)
+        .where(Appointment.id == appointment_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
     appt = q.scalars().first()
     if not appt:
+        await release_write_lock(db)
         raise ValueError("Appointment not found")
 
-    new_start = date_parser.parse(new_start_iso)
     new_end = new_start + (appt.end_time - appt.start_time)
 
     if not _within_business_hours(new_start, new_end):
+        await release_write_lock(db)
         raise ValueError("New time must be within business hours Mon-Sat 08:00-18:00.")
 
-    # check conflicts (exclude current appointment)
-    q2 = await db.execute(
-        select(Appointment).where(
-            and_(
-                Appointment.id != appointment_id,
-                Appointment.status == AppointmentStatus.SCHEDULED.value,
-                Appointment.start_time < new_end,
-                Appointment.end_time > new_start,
-            )
+    # check conflicts (exclude current appointment) under the write lock,
+    # keeping the same chair when it is free
+    resources = eligible_resources(appt.appointment_type)
+    if appt.resource_id in resources:
+        resources = (appt.resource_id,) + tuple(
+            r for r in resources if r != appt.resource_id
         )
+    resource_id = await _first_free_resource(
+        db, new_start, new_end, resources, exclude_id=appointment_id
     )
-    if q2.scalars().first():
+    if resource_id is None:
+        await release_write_lock(db)
         raise ValueError("Requested new time conflicts with existing appointment.")
 
+    old_dates = (appt.target_date, appt.start_time.date())
     appt.start_time = new_start
     appt.end_time = new_end
     appt.target_date = new_start.date()
-    await db.commit()
+    appt.resource_id = resource_id
+    await db.flush()
+    await commit(db)
+    _invalidate_slots(db, *old_dates, appt.target_date)
     await db.refresh(appt)
     return appt
@@ -5,11 +5,15 @@ from sqlalchemy import (
     String,
     DateTime,
     ForeignKey,
+    Index,
     func,
     Text,
 )
 from sqlalchemy.orm import relationship
+from app import config
 from app.db.base_model import BaseModel
+from datetime import date, datetime
+from typing import NamedTuple
 import enum
 
 
@@ -25,14 +29,40 @@ class AppointmentType(str, enum.Enum):
     EMERGENCY = "emergency"
 
 
+def default_resource() -> str:
+    """Resource for bookings that don't name one: the first configured chair."""
+    return config.CLINIC_RESOURCES[0]
+
+
 class Appointment(BaseModel):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # conflict checks: status = ? AND start_time < ? AND end_time > ?
+        Index(
+            "ix_appointments_status_start_time_end_time",
+            "status",
+            "start_time",
+            "end_time",
+        ),
+        # slot listings: target_date = ? AND status = ?
+        Index("ix_appointments_target_date_status", "target_date", "status"),
+        # per-chair conflict checks: resource_id IN (...) AND status = ?
+        # AND start_time BETWEEN ...
+        Index(
+            "ix_appointments_resource_id_status_start_time",
+            "resource_id",
+            "status",
+            "start_time",
+        ),
+    )
 
     patient_id = Column(String, ForeignKey("patients.id"), nullable=False, index=True)
     appointment_type = Column(String(50), nullable=False)
     start_time = Column(DateTime(timezone=False), nullable=False, index=True)
     end_time = Column(DateTime(timezone=False), nullable=False)
-    target_date = Column(Date, nullable=False, index=True)
+    # chair / provider (config.CLINIC_RESOURCES) the appointment occupies
+    resource_id = Column(String(32), nullable=False, default=default_resource)
+    target_date = Column(Date, nullable=False)
     status = Column(
         String(50), nullable=False, default=AppointmentStatus.SCHEDULED.value
     )
@@ -43,5 +73,20 @@ class Appointment(BaseModel):
         DateTime(timezone=False), server_default=func.now(), onupdate=func.now()
     )
 
-    # optional relationship to Patient (read-only here)
-    patient = relationship("Patient", backref="appointments", lazy="joined")
+    # optional relationship to Patient (read-only here). Never loaded
+    # implicitly: a query that needs it asks for it, e.g.
+    # .options(joinedload(Appointment.patient))
+    patient = relationship("Patient", backref="appointments", lazy="raise")
+
+
+class AppointmentRow(NamedTuple):
+    """Read-only appointment fields, selected with Core (app.db.readonly)."""
+
+    id: str
+    patient_id: str
+    appointment_type: str
+    start_time: datetime
+    end_time: datetime
+    target_date: date
+    resource_id: str
+    status: str
@@ -0,0 +1,92 @@
+# app/appointments/slots.py
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+Interval = Tuple[datetime, datetime]
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """
+    Collapse booked (start, end) intervals into a sorted list of disjoint intervals.
+    Touching intervals (one ends exactly when the next starts) are merged too.
+    """
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class ResourceSchedule:
+    """
+    Merged busy intervals per resource (chair / provider), built once from the
+    (resource_id, start, end) bookings of a span of days.
+    """
+
+    def __init__(self, bookings: Iterable[Tuple[str, datetime, datetime]]):
+        by_resource: Dict[str, List[Interval]] = {}
+        for resource, start, end in bookings:
+            by_resource.setdefault(resource, []).append((start, end))
+        self.busy = {
+            resource: merge_intervals(intervals)
+            for resource, intervals in by_resource.items()
+        }
+        # merged intervals are disjoint, so their ends are sorted too
+        self._ends = {
+            resource: [end for _, end in busy] for resource, busy in self.busy.items()
+        }
+
+    def is_free(self, resource: str, start: datetime, end: datetime) -> bool:
+        busy = self.busy.get(resource)
+        if not busy:
+            return True
+        i = bisect_right(self._ends[resource], start)
+        return i == len(busy) or busy[i][0] >= end
+
+    def first_free(
+        self, resources: Sequence[str], start: datetime, end: datetime
+    ) -> Optional[str]:
+        """The first of `resources` with nothing booked in [start, end)."""
+        for resource in resources:
+            if self.is_free(resource, start, end):
+                return resource
+        return None
+
+    def free_slots(
+        self,
+        day_start: datetime,
+        day_end: datetime,
+        resources: Sequence[str],
+        slot_minutes: int = 30,
+        step_minutes: Optional[int] = None,
+    ) -> List[datetime]:
+        """
+        Walk the candidate grid [day_start, day_end) once and return the start
+        of every candidate for which any of `resources` is free: one pointer
+        per resource walks its merged busy list once. Candidates are spaced by
+        `step_minutes` (defaults to the slot length).
+        """
+        slot_delta = timedelta(minutes=slot_minutes)
+        step_delta = timedelta(minutes=step_minutes or slot_minutes)
+        lanes = [self.busy.get(resource, ()) for resource in resources]
+        positions = [0] * len(lanes)
+
+        slots = []
+        cur = day_start
+        while lanes and cur + slot_delta <= day_end:
+            candidate_end = cur + slot_delta
+            for n, busy in enumerate(lanes):
+                i = positions[n]
+                while i < len(busy) and busy[i][1] <= cur:
+                    i += 1
+                positions[n] = i
+                if i == len(busy) or busy[i][0] >= candidate_end:
+                    slots.append(cur)
+                    break
+            cur += step_delta
+
+        return slots
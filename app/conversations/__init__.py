@@ -1 +1,8 @@
 from . import websocket_events
+
+
+def load_agent():
+    """Import the agent module, and with it pydantic-ai and the model SDK."""
+    from . import appointment_agent
+
+    return appointment_agent
@@ -1,31 +1,66 @@
 # app/conversations/agent.py
 
-import os
-from dataclasses import dataclass
-from typing import Dict, Optional
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from datetime import date, datetime
+from typing import Awaitable, Callable, List, Optional, Sequence, Union
 
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent, RunContext
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 
-from app.db.database import get_db
-from app.patient_info.models import Patient
-from app.appointments.models import Appointment, AppointmentType
-from app.patient_info.interface import add_patient, get_patient_by_phone
+from app import config
 from app.appointments.interface import (
     book_appointment,
     cancel_appointment,
-    list_appointments_for_patient,
+    find_next_available_slots,
+    list_appointment_rows_for_patient,
     list_available_slots_for_date,
 )
-from app.conversations.models import Conversation, SenderTypeEnum
+from app.appointments.models import Appointment, AppointmentRow, AppointmentType
+from app.conversations.history import (
+    fold_into_transcript,
+    split_history_window,
+    to_model_messages,
+)
+from app.conversations.intent_router import (
+    AVAILABLE_SLOTS,
+    CANCEL_APPOINTMENT,
+    LOOKUP_PATIENT,
+    appointment_type_in,
+    classify,
+)
+from app.conversations.models import Conversation, MessageRow, SenderTypeEnum
+from app.conversations.response_cache import response_cache
+from app.db.utils import commit, session_scope
+from app.metrics import (
+    AgentRunTiming,
+    registry,
+    time_agent_run,
+    timed,
+    timed_tool,
+)
+from app.patient_info.interface import add_patient, get_patient_row_by_phone
+from app.patient_info.models import Patient, PatientRow
+
+logger = logging.getLogger(__name__)
+
+
+def _configure_logfire():
+    # only imported (and configured) when tracing is turned on
+    import logfire
 
+    logfire.configure(token=config.LOGFIRE_AUTH_TOKEN)
+    logfire.instrument_pydantic_ai()
 
-import logfire
 
-# configure logfire
-logfire.configure(token=os.getenv("LOGFIRE_AUTH_TOKEN"))
-logfire.instrument_pydantic_ai()
+if config.LOGFIRE_ENABLED:
+    _configure_logfire()
+
 # ─────────────────────────────────────────────
 # Dependencies
 # ─────────────────────────────────────────────
@@ -35,7 +70,81 @@ logfire.instrument_pydantic_ai()
 class DentalDependencies:
     db: any
     conversation_id: Optional[int] = None
-    patient: Optional[Patient] = None
+    # the conversation's Patient, or the PatientRow a phone lookup found
+    patient: Optional[Union[Patient, PatientRow]] = None
+    # filled once per turn by load_turn_context(); tools keep them current
+    conversation: Optional[Conversation] = None
+    # AppointmentRow tuples; appointments booked this turn are appended as
+    # Appointment objects, which have the same fields
+    upcoming_appointments: List[Union[AppointmentRow, Appointment]] = field(
+        default_factory=list
+    )
+    messages: List[MessageRow] = field(default_factory=list)
+
+
+@timed("agent.load_context")
+async def load_turn_context(deps: DentalDependencies) -> DentalDependencies:
+    """
+    Load everything the instructions and tools read during a turn: the
+    conversation with its patient, the patient's upcoming appointments and the
+    recent message window. Three queries at most, instead of several per instruction.
+    """
+    from app.conversations.interface import get_message_rows
+
+    db = deps.db
+    result = await db.execute(
+        select(Conversation)
+        .where(Conversation.id == deps.conversation_id)
+        .options(joinedload(Conversation.patient))
+    )
+    deps.conversation = result.scalars().first() or next(
+        # created earlier in this unit of work and not written yet
+        (
+            pending
+            for pending in db.new
+            if isinstance(pending, Conversation) and pending.id == deps.conversation_id
+        ),
+        None,
+    )
+    deps.patient = deps.conversation.patient if deps.conversation else None
+
+    if deps.patient:
+        deps.upcoming_appointments = await list_appointment_rows_for_patient(
+            deps.patient.id, upcoming=True, db=db
+        )
+
+    # only messages newer than the earlier transcript are loaded; anything
+    # that no longer fits the window is folded into it once and persisted
+    conversation = deps.conversation
+    messages = list(
+        await get_message_rows(
+            deps.conversation_id,
+            since=conversation.transcript_until if conversation else None,
+            db=db,
+        )
+    )
+    older, deps.messages = split_history_window(messages)
+    if older and conversation:
+        conversation.earlier_transcript = fold_into_transcript(
+            conversation.earlier_transcript, older
+        )
+        conversation.transcript_until = older[-1].created_at
+        await commit(db)
+    return deps
+
+
+async def _set_active_patient(
+    deps: DentalDependencies, patient: Union[Patient, PatientRow]
+) -> None:
+    # with no stored conversation (none has the turn's id) the patient is
+    # still active for the turn, just not linked to a conversation
+    if deps.conversation is not None:
+        deps.conversation.patient_id = patient.id
+        await commit(deps.db)
+    deps.patient = patient
+    deps.upcoming_appointments = await list_appointment_rows_for_patient(
+        patient.id, upcoming=True, db=deps.db
+    )
 
 
 # ─────────────────────────────────────────────
@@ -55,8 +164,10 @@ class DentalOutput(BaseModel):
 # Initialize the Agent
 # ─────────────────────────────────────────────
 
+# the model client is created on the first run, not at import
 dental_agent = Agent(
     model="google-gla:gemini-2.5-flash",
+    defer_model_check=True,
     deps_type=DentalDependencies,
     output_type=DentalOutput,
     instructions=(
@@ -78,6 +189,7 @@ dental_agent = Agent(
         "5. Then help them **book an appointment** (Cleaning, General Checkup, Emergency) using `set_appointment`.\n"
         "6. If they seem frustrated or say things like 'I want to talk to a person', immediately use `escalate_to_human`.\n\n"
         "7. Help cancel existing appointments using cancel_patient_appointment.\n\n"
+        "8. For 'when is the next opening' questions, use find_next_available rather than checking days one by one.\n\n"
         "Always keep your messages kind, concise, and conversational."
     ),
 )
@@ -87,28 +199,29 @@ dental_agent = Agent(
 # Tools
 # ─────────────────────────────────────────────
 
+# Tools share ctx.deps.db (a single AsyncSession) and the per-turn context,
+# so they must not run concurrently.
+
 
-@dental_agent.tool
+@dental_agent.tool(sequential=True)
+@timed_tool
 async def find_patient(
     ctx: RunContext[DentalDependencies],
     phone: str,
 ) -> Optional[str]:
     """Look up a patient by phone number."""
     db = ctx.deps.db
-    patient = await get_patient_by_phone(db=db, phone_number=phone)
+    patient = await get_patient_row_by_phone(db=db, phone_number=phone)
     if patient:
-        conversation = await db.get(Conversation, ctx.deps.conversation_id)
-        conversation.patient_id = patient.id
-
-        await db.commit()
-        await db.refresh(conversation)
+        await _set_active_patient(ctx.deps, patient)
 
         return f"Patient found: {patient.full_name}, DOB: {patient.date_of_birth}, Insurance: {patient.insurance_name}."
     else:
         return "No existing patient found with that phone number."
 
 
-@dental_agent.tool
+@dental_agent.tool(sequential=True)
+@timed_tool
 async def register_patient(
     ctx: RunContext[DentalDependencies],
     full_name: str,
@@ -117,9 +230,8 @@ async def register_patient(
     insurance_name: Optional[str] = None,
 ) -> str:
     """Register a new patient in the database."""
-    print("Running register_patient")
+    logger.debug("Running register_patient")
     db = ctx.deps.db
-    active_conversation = await db.get(Conversation, ctx.deps.conversation_id)
     new_patient = await add_patient(
         db=db,
         full_name=full_name,
@@ -128,17 +240,16 @@ async def register_patient(
         insurance_name=insurance_name,
     )
 
-    active_conversation.patient_id = new_patient.id
-    await db.commit()
-    await db.refresh(active_conversation)
+    await _set_active_patient(ctx.deps, new_patient)
 
     return f"New patient {full_name} registered successfully."
 
 
-@dental_agent.tool
+@dental_agent.tool(sequential=True)
+@timed_tool
 async def cancel_patient_appointment(
     ctx: RunContext[DentalDependencies],
-    appointment_id: int,
+    appointment_id: str,
 ) -> str:
     """
     Cancel an existing appointment.
@@ -150,14 +261,16 @@ async def cancel_patient_appointment(
         Confirmation message for the user.
     """
     db = ctx.deps.db
-    active_conversation = await db.get(Conversation, ctx.deps.conversation_id)
-    active_patient = await db.get(Patient, active_conversation.patient_id)
-
-    if not active_patient:
+    if not ctx.deps.patient:
         return "Please provide your phone number first so I can identify you."
 
     success = await cancel_appointment(appointment_id=appointment_id, db=db)
     if success:
+        ctx.deps.upcoming_appointments = [
+            appt
+            for appt in ctx.deps.upcoming_appointments
+            if str(appt.id) != str(appointment_id)
+        ]
         return (
             f"Your appointment (ID: {appointment_id}) has been successfully cancelled."
         )
@@ -165,7 +278,8 @@ async def cancel_patient_appointment(
         return f"Sorry, I could not find an appointment with ID {appointment_id}."
 
 
-@dental_agent.tool
+@dental_agent.tool(sequential=True)
+@timed_tool
 async def set_appointment(
     ctx: RunContext[DentalDependencies],
     appointment_type: str,
@@ -174,10 +288,9 @@ async def set_appointment(
 ) -> str:
     """Book an appointment for the current patient on the given target_date."""
     db = ctx.deps.db
-    active_conversation = await db.get(Conversation, ctx.deps.conversation_id)
-    active_patient = await db.get(Patient, active_conversation.patient_id)
+    active_patient = ctx.deps.patient
 
-    if not active_conversation:
+    if not active_patient:
         return (
             "Please provide your phone number first so I can identify or register you."
         )
@@ -196,20 +309,29 @@ async def set_appointment(
     except ValueError as e:
         return f"Could not book appointment: {str(e)}"
 
+    ctx.deps.upcoming_appointments = sorted(
+        ctx.deps.upcoming_appointments + [appointment], key=lambda a: a.start_time
+    )
+
     # Format start_time for user-friendly output
     formatted_time = appointment.start_time.strftime("%A, %b %d at %I:%M %p")
     return f"Appointment booked for {active_patient.full_name} on {formatted_time} ({appointment.appointment_type})."
 
 
-@dental_agent.tool
+@dental_agent.tool(sequential=True)
+@timed_tool
 async def get_available_slots(
-    ctx: RunContext[DentalDependencies], target_date: date
+    ctx: RunContext[DentalDependencies],
+    target_date: date,
+    appointment_type: Optional[str] = None,
 ) -> str:
     """
     Fetch available appointment slots for the given target_date.
 
     Args:
         target_date: datetime.date object.
+        appointment_type: cleaning, general_checkup or emergency, when known;
+            slots fit its duration and only chairs that take it are considered.
 
     Returns:
         A readable list of available appointment times.
@@ -219,6 +341,7 @@ async def get_available_slots(
     # Fetch available slots
     appointment_slots = await list_available_slots_for_date(
         target_date=target_date,
+        appointment_type=appointment_type,
         db=db,
     )
 
@@ -230,7 +353,44 @@ async def get_available_slots(
     return f"Available appointment slots on {target_date.strftime('%A, %b %d')}: {slots_str}."
 
 
-@dental_agent.tool
+@dental_agent.tool(sequential=True)
+@timed_tool
+async def find_next_available(
+    ctx: RunContext[DentalDependencies],
+    appointment_type: str = AppointmentType.GENERAL.value,
+    from_date: Optional[date] = None,
+    days: int = 30,
+    limit: int = 5,
+) -> str:
+    """
+    Find the earliest open times for an appointment type across the coming
+    days, in one call. Use this for "when is the next opening" questions
+    instead of checking day by day.
+
+    Args:
+        appointment_type: cleaning, general_checkup or emergency.
+        from_date: first day to search; today if omitted.
+        days: how many days ahead to search.
+        limit: how many open times to return.
+    """
+    start = datetime.now()
+    if from_date:
+        start = max(start, datetime.combine(from_date, datetime.min.time()))
+    slots = await find_next_available_slots(
+        appointment_type=appointment_type,
+        start=start,
+        days=days,
+        limit=limit,
+        db=ctx.deps.db,
+    )
+    if not slots:
+        return f"Sorry, there are no openings for a {appointment_type} in the next {days} days."
+    slots_str = ", ".join(slot.strftime("%A, %b %d at %I:%M %p") for slot in slots)
+    return f"Next available {appointment_type} times: {slots_str}."
+
+
+@dental_agent.tool(sequential=True)
+@timed_tool
 async def escalate_to_human(
     ctx: RunContext[DentalDependencies], reason: Optional[str] = None
 ) -> str:
@@ -255,26 +415,12 @@ async def existing_appointment(ctx: RunContext[DentalDependencies]) -> str:
     Add context about the current patient's upcoming or existing appointments.
     This helps the agent respond naturally about scheduling, conflicts, or reminders.
     """
-    db = ctx.deps.db
-    active_conversation = await db.get(Conversation, ctx.deps.conversation_id)
-    active_patient = await db.get(Patient, active_conversation.patient_id)
+    active_patient = ctx.deps.patient
 
     if not active_patient:
         return "No patient identified yet. Ask for the phone number first."
 
-    appointments = await list_appointments_for_patient(
-        active_conversation.patient_id, db=db
-    )
-
-    if not appointments:
-        return f"Patient {active_patient.full_name} has no scheduled appointments."
-
-    # Build a summary of upcoming appointments
-    upcoming = [
-        appt
-        for appt in appointments
-        if appt.status == "scheduled" and appt.start_time >= datetime.now()
-    ]
+    upcoming = ctx.deps.upcoming_appointments
     if not upcoming:
         return f"Patient {active_patient.full_name} has no upcoming appointments."
 
@@ -292,40 +438,234 @@ async def existing_appointment(ctx: RunContext[DentalDependencies]) -> str:
 @dental_agent.instructions
 async def enrich_context(ctx: RunContext[DentalDependencies]) -> str:
     """Inject patient details into context if available."""
-    db = ctx.deps.db
-    active_conversation = await db.get(Conversation, ctx.deps.conversation_id)
-    active_patient = await db.get(Patient, active_conversation.patient_id)
+    active_patient = ctx.deps.patient
     if active_patient:
         return f"The current patient is {active_patient.full_name}, born {active_patient.date_of_birth}, phone {active_patient.phone_number}, insurance: {active_patient.insurance_name or 'none'}."
     return "No patient identified yet. Ask for phone number first."
 
 
 @dental_agent.instructions
-async def conversation_history(ctx: RunContext[str]) -> str:
-    from app.conversations.interface import get_messages
-
-    chat_message = await get_messages(conversation_id=ctx.deps.conversation_id)
-
-    if len(chat_message) > 0:
-        return f"Here is a list of previously exchange messages {
-            [
-                {
-                    'role': 'user'
-                    if m.sender_type == SenderTypeEnum.PATIENT.value
-                    else 'model',
-                    'timestamp': m.created_at,
-                    'content': m.content,
-                }
-                for m in chat_message
-            ]
-        }"
+async def earlier_transcript(ctx: RunContext[DentalDependencies]) -> str:
+    """Truncated older turns; recent turns go to the model as message history."""
+    conversation = ctx.deps.conversation
+    if conversation and conversation.earlier_transcript:
+        return (
+            "Earlier messages in this conversation, each truncated, oldest "
+            f"dropped first:\n{conversation.earlier_transcript}"
+        )
+    return ""
+
+
+# ─────────────────────────────────────────────
+# Fast path: mechanical requests answered without the model
+# ─────────────────────────────────────────────
+
+
+def _last_ai_message(deps: DentalDependencies) -> Optional[str]:
+    return next(
+        (
+            m.content
+            for m in reversed(deps.messages)
+            if m.sender_type == SenderTypeEnum.AI_AGENT.value
+        ),
+        None,
+    )
+
+
+def _requested_type(deps: DentalDependencies) -> Optional[str]:
+    """The appointment type the patient last asked about in this conversation."""
+    return next(
+        (
+            appointment_type
+            for m in reversed(deps.messages)
+            if m.sender_type == SenderTypeEnum.PATIENT.value
+            and (appointment_type := appointment_type_in(m.content))
+        ),
+        None,
+    )
+
+
+@dataclass
+class _ToolContext:
+    """The part of RunContext the tools use, for calling them directly."""
+
+    deps: DentalDependencies
+
 
+async def _fast_path(deps: DentalDependencies, message: str) -> Optional[str]:
+    """
+    Answer a bare phone number, "cancel appointment <id>" or a slots-for-a-day
+    request straight from the tools. None means the model should handle it.
+    """
+    intent = classify(message, _last_ai_message(deps))
+    if intent is None:
+        return None
+
+    ctx = _ToolContext(deps)
+    if intent.name == LOOKUP_PATIENT:
+        result = await find_patient(ctx, intent.phone)
+        if not result.startswith("Patient found"):
+            # a typo, another format or not a phone number at all: the model
+            # can tell those apart and ask, the fast path can't
+            return None
+        first_name = deps.patient.full_name.split()[0]
+        return (
+            f"Thanks, {first_name}! I found your profile. Would you like to book "
+            "a new appointment or manage an existing one?"
+        )
+
+    if intent.name == CANCEL_APPOINTMENT:
+        # only the identified patient's own upcoming appointments
+        if not deps.patient or all(
+            str(a.id) != intent.appointment_id for a in deps.upcoming_appointments
+        ):
+            return None
+        result = await cancel_patient_appointment(ctx, intent.appointment_id)
+        return f"{result} Is there anything else I can help you with?"
+
+    if intent.name == AVAILABLE_SLOTS:
+        # slots must fit the appointment's length: a 45-minute cleaning can't
+        # start in the last half hour
+        appointment_type = intent.appointment_type or _requested_type(deps)
+        result = await get_available_slots(ctx, intent.target_date, appointment_type)
+        if result.startswith("Available"):
+            return f"{result} Which time works best for you?"
+        return f"{result} Would you like to try another day?"
+
+    return None
+
+
+async def _route(deps: DentalDependencies, message: str) -> Optional[str]:
+    if not config.INTENT_ROUTER_ENABLED:
+        return None
+    started = time.perf_counter()
+    reply = await _fast_path(deps, message)
+    if reply is not None:
+        registry.observe("agent.fast_path", time.perf_counter() - started)
+    return reply
+
+
+# ─────────────────────────────────────────────
+# Response cache: FAQ answers reused across conversations
+# ─────────────────────────────────────────────
+
+# the assistant's last message only offered more help; anything else it asked
+# is a pending question the next reply may depend on
+_OPEN_OFFER = re.compile(
+    r"\b(?:anything else|how can i help|what can i do for you)\b", re.IGNORECASE
+)
+
+
+def _cache_context(deps: DentalDependencies) -> Optional[str]:
+    """The cache partition for this turn, or None if it must not use the cache."""
+    if not config.RESPONSE_CACHE_ENABLED:
+        return None
+    # once a patient is identified, the instructions carry their profile and
+    # appointments, so any reply may restate them without a tool call: not
+    # shareable with anyone else
+    if deps.patient:
+        return None
+    last_ai_message = (_last_ai_message(deps) or "").rstrip()
+    if last_ai_message.endswith("?") and not _OPEN_OFFER.search(last_ai_message):
+        return None
+    return "anonymous"
+
+
+def _remember(
+    context: Optional[str],
+    message: str,
+    output: DentalOutput,
+    run: AgentRunTiming,
+):
+    # only replies the model wrote from the message alone: no tool results,
+    # no follow-up action
+    if context is not None and not run.tool_calls and not output.next_action:
+        response_cache.set(context, message, output.message)
+
+
+def _turn_messages(message: Union[str, Sequence[str]]) -> List[str]:
+    return [message] if isinstance(message, str) else list(message)
+
+
+async def _prepare_turn(db, conversation_id, messages: List[str]):
+    deps = await load_turn_context(
+        DentalDependencies(db=db, conversation_id=conversation_id)
+    )
+    # the current messages are already stored; don't send them twice
+    history = deps.messages
+    tail = history[-len(messages) :]
+    if len(tail) == len(messages) and all(
+        stored.sender_type == SenderTypeEnum.PATIENT.value and stored.content == text
+        for stored, text in zip(tail, messages)
+    ):
+        history = history[: -len(messages)]
+    return deps, to_model_messages(history)
+
+
+@asynccontextmanager
+async def _turn_session(db):
+    """The caller's session (so the turn uses one connection), else a new one."""
+    if db is not None:
+        yield db
     else:
-        return "No conversational history"
+        async with session_scope() as session:
+            yield session
 
 
-async def handle_user_message(conversation_id, message):
-    async for db in get_db():
-        deps = DentalDependencies(db=db, conversation_id=conversation_id)
-        result = await dental_agent.run(message, deps=deps)
+async def handle_user_message(conversation_id, message, db=None):
+    """
+    The reply to the patient's stored `message`; a list of messages sent back
+    to back is answered in one turn, as one prompt.
+    """
+    messages = _turn_messages(message)
+    message = "\n".join(messages)
+    async with _turn_session(db) as session:
+        deps, history = await _prepare_turn(session, conversation_id, messages)
+        reply = await _route(deps, message)
+        if reply is not None:
+            return reply
+        context = _cache_context(deps)
+        if context is not None:
+            reply = response_cache.get(context, message)
+            if reply is not None:
+                return reply
+        with time_agent_run() as run:
+            result = await dental_agent.run(message, deps=deps, message_history=history)
+        _remember(context, message, result.output, run)
         return result.output.message
+
+
+async def stream_user_message(
+    conversation_id, message, on_delta: Callable[[str], Awaitable[None]], db=None
+) -> str:
+    """
+    Like handle_user_message, but await on_delta(text) with each new piece of
+    the reply as the model streams it. Returns the complete reply.
+    """
+    messages = _turn_messages(message)
+    message = "\n".join(messages)
+    async with _turn_session(db) as session:
+        deps, history = await _prepare_turn(session, conversation_id, messages)
+        reply = await _route(deps, message)
+        context = _cache_context(deps)
+        if reply is None and context is not None:
+            reply = response_cache.get(context, message)
+        if reply is not None:
+            await on_delta(reply)
+            return reply
+        # includes the time on_delta spends emitting the streamed pieces
+        with time_agent_run() as run:
+            async with dental_agent.run_stream(
+                message, deps=deps, message_history=history
+            ) as result:
+                sent = ""
+                async for output in result.stream_output(
+                    debounce_by=config.STREAM_DEBOUNCE_SECONDS or None
+                ):
+                    text = output.message or ""
+                    if len(text) > len(sent) and text.startswith(sent):
+                        await on_delta(text[len(sent) :])
+                        sent = text
+                final = await result.get_output()
+        _remember(context, message, final, run)
+        return final.message
@@ -1,8 +1,11 @@
 import asyncio
+import functools
 import random
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
 import argparse
 
+from faker import Faker
 from sqlalchemy.future import select
 
 from app.conversations.models import (
@@ -11,9 +14,15 @@ from app.conversations.models import (
     ConversationStatusEnum,
     SenderTypeEnum,
 )
+from app.patient_info.fixtures import bulk_patient_id
 from app.patient_info.models import Patient
+from app.db.bulk import SEED_BLOCK, SeedReport, block_rng, bulk_seed
 from app.db.database import AsyncSessionLocal  # your AsyncSession factory
 
+# bulk conversation n has id "cnv<n:09d>"; its messages "msg<n:07d><i:02d>"
+MAX_BULK_CONVERSATIONS = 10_000_000
+MAX_MESSAGES_PER_CONVERSATION = 100
+
 
 async def create_fixtures(conversation_count: int):
     async with AsyncSessionLocal() as db:  # assumes async_session() gives AsyncSession
@@ -63,6 +72,125 @@ async def create_fixtures(conversation_count: int):
         print(f"Created {len(conversations)} conversations with sample messages.")
 
 
+# ----------------------------
+# Bulk seeding
+# ----------------------------
+
+
+@functools.cache
+def _sentences():
+    pool = Faker()
+    pool.seed_instance(0)
+    return [pool.sentence(nb_words=10) for _ in range(500)]
+
+
+def conversation_block(
+    seed: int,
+    block: int,
+    lo: int,
+    hi: int,
+    first_day: date,
+    days: int,
+    patients: int,
+    messages_per_conversation: int,
+) -> dict:
+    """
+    Conversations [block * SEED_BLOCK, ...) within [lo, hi), each started at a
+    random minute of the `days` days from first_day, with its messages 30 s
+    apart alternating patient / assistant. 70% belong to a bulk-seeded patient.
+    """
+    rng = block_rng("conversations", seed, block)
+    sentences = _sentences()
+    now = datetime.now(timezone.utc)
+    first = datetime.combine(first_day, time.min)
+    escalated = ConversationStatusEnum.ESCALATED.value
+    conversations, messages = [], []
+    for n in range(block * SEED_BLOCK, min((block + 1) * SEED_BLOCK, hi)):
+        started_at = first + timedelta(minutes=rng.randrange(days * 24 * 60))
+        patient = rng.randrange(patients) if patients and rng.random() < 0.7 else None
+        status = rng.choice(
+            [ConversationStatusEnum.CLOSED.value] * 8
+            + [ConversationStatusEnum.ACTIVE.value, escalated]
+        )
+        contents = [rng.choice(sentences) for _ in range(messages_per_conversation)]
+        if n < lo:
+            continue
+        conversation_id = f"cnv{n:09d}"
+        conversations.append(
+            {
+                "id": conversation_id,
+                "patient_id": bulk_patient_id(patient) if patient is not None else None,
+                "status": status,
+                "started_at": started_at,
+                "escalated_at": started_at if status == escalated else None,
+                "closed_at": None,
+                "earlier_transcript": None,
+                "transcript_until": None,
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+        for i, content in enumerate(contents):
+            if status == escalated and i == len(contents) - 1:
+                sender_type = SenderTypeEnum.HUMAN_AGENT.value
+            elif i % 2:
+                sender_type = SenderTypeEnum.AI_AGENT.value
+            else:
+                sender_type = SenderTypeEnum.PATIENT.value
+            sent_at = started_at + timedelta(seconds=30 * i)
+            messages.append(
+                {
+                    "id": f"msg{n:07d}{i:02d}",
+                    "conversation_id": conversation_id,
+                    "sender_type": sender_type,
+                    "content": content,
+                    "meta": None,
+                    "created_at": sent_at,
+                    "updated_at": sent_at,
+                }
+            )
+    return {"conversations": conversations, "messages": messages}
+
+
+async def seed_conversations(
+    count: int,
+    patients: int = 0,
+    messages_per_conversation: int = 10,
+    days: int = 365,
+    first_day: Optional[date] = None,
+    start: int = 0,
+    seed: int = 0,
+    chunk_size: int = 10_000,
+    workers: int = 0,
+) -> SeedReport:
+    """
+    Bulk-insert conversations start .. start + count - 1 and their messages,
+    spread over `days` days from first_day (default: ending today).
+    """
+    if start + count > MAX_BULK_CONVERSATIONS:
+        raise ValueError(f"at most {MAX_BULK_CONVERSATIONS} bulk conversations")
+    if not 0 < messages_per_conversation <= MAX_MESSAGES_PER_CONVERSATION:
+        raise ValueError(
+            f"messages_per_conversation must be 1..{MAX_MESSAGES_PER_CONVERSATION}"
+        )
+    if first_day is None:
+        first_day = date.today() - timedelta(days=days)
+    return await bulk_seed(
+        conversation_block,
+        [Conversation.__table__, Message.__table__],
+        start,
+        start + count,
+        seed=seed,
+        # chunk_size counts messages, the bulk of the rows
+        chunk_size=max(1, chunk_size // messages_per_conversation),
+        workers=workers,
+        first_day=first_day,
+        days=days,
+        patients=patients,
+        messages_per_conversation=messages_per_conversation,
+    )
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Create sample conversations and messages"
@@ -73,6 +201,40 @@ if __name__ == "__main__":
         default=5,
         help="Number of conversations to create (default: 5)",
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Use the chunked Core-insert pipeline (for large counts)",
+    )
+    parser.add_argument(
+        "--patients",
+        type=int,
+        default=0,
+        help="Number of bulk-seeded patients to attach conversations to",
+    )
+    parser.add_argument("--messages-per-conversation", type=int, default=10)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--start", type=int, default=0, help="First bulk index")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument(
+        "--workers", type=int, default=0, help="Generator processes (0 = inline)"
+    )
     args = parser.parse_args()
 
-    asyncio.run(create_fixtures(args.count))
+    if args.bulk:
+        report = asyncio.run(
+            seed_conversations(
+                args.count,
+                patients=args.patients,
+                messages_per_conversation=args.messages_per_conversation,
+                days=args.days,
+                start=args.start,
+                seed=args.seed,
+                chunk_size=args.chunk_size,
+                workers=args.workers,
+            )
+        )
+        print(f"✅ Seeded {report}")
+    else:
+        asyncio.run(create_fixtures(args.count))
@@ -0,0 +1,96 @@
+# app/conversations/history.py
+from typing import List, Optional, Tuple
+
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelRequest,
+    ModelResponse,
+    TextPart,
+    UserPromptPart,
+)
+
+from app import config
+from app.conversations.models import MessageRow, SenderTypeEnum
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting English chat text
+    return len(text) // 4 + 1
+
+
+def split_history_window(
+    messages: List[MessageRow],
+    max_messages: int = config.HISTORY_MAX_MESSAGES,
+    token_budget: int = config.HISTORY_TOKEN_BUDGET,
+) -> Tuple[List[MessageRow], List[MessageRow]]:
+    """
+    Split chronologically ordered messages into (older, window): the window is
+    the newest messages that fit both the message cap and the token budget.
+    """
+    keep = 0
+    tokens = 0
+    for message in reversed(messages[-max_messages:] if max_messages else []):
+        tokens += estimate_tokens(message.content)
+        if tokens > token_budget:
+            break
+        keep += 1
+
+    cut = len(messages) - keep
+    return messages[:cut], messages[cut:]
+
+
+def fold_into_transcript(
+    transcript: Optional[str],
+    messages: List[MessageRow],
+    line_chars: int = config.HISTORY_TRANSCRIPT_LINE_CHARS,
+    max_chars: int = config.HISTORY_TRANSCRIPT_MAX_CHARS,
+) -> str:
+    """
+    Append one "Patient: ..." / "Assistant: ..." line per message to the
+    transcript of messages that left the history window, each cut to
+    line_chars, and drop the oldest lines once it exceeds max_chars.
+
+    This is a truncated transcript, not a summary: nothing is condensed, so
+    once max_chars is reached the earliest turns are lost. Only newly folded
+    messages are serialized; the existing lines are kept as-is.
+    """
+    lines = transcript.splitlines() if transcript else []
+    for message in messages:
+        speaker = (
+            "Patient"
+            if message.sender_type == SenderTypeEnum.PATIENT.value
+            else "Assistant"
+        )
+        text = " ".join(message.content.split())
+        if len(text) > line_chars:
+            text = text[: line_chars - 1] + "…"
+        lines.append(f"{speaker}: {text}")
+
+    total = sum(len(line) + 1 for line in lines)
+    while lines and total > max_chars:
+        total -= len(lines.pop(0)) + 1
+    return "\n".join(lines)
+
+
+def to_model_messages(messages: List[MessageRow]) -> List[ModelMessage]:
+    """Convert stored messages into pydantic-ai message history."""
+    history: List[ModelMessage] = []
+    for message in messages:
+        if message.sender_type == SenderTypeEnum.PATIENT.value:
+            history.append(
+                ModelRequest(
+                    parts=[
+                        UserPromptPart(
+                            content=message.content, timestamp=message.created_at
+                        )
+                    ]
+                )
+            )
+        else:
+            history.append(
+                ModelResponse(
+                    parts=[TextPart(content=message.content)],
+                    timestamp=message.created_at,
+                )
+            )
+    return history
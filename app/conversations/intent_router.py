@@ -0,0 +1,235 @@
+# app/conversations/intent_router.py
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional
+
+from app.appointments.models import AppointmentType
+from app.patient_info.interface import normalize_phone
+
+LOOKUP_PATIENT = "lookup_patient"
+CANCEL_APPOINTMENT = "cancel_appointment"
+AVAILABLE_SLOTS = "available_slots"
+
+# longer messages are conversational enough to leave to the model
+MAX_MESSAGE_CHARS = 80
+
+_WEEKDAYS = {
+    name: i
+    for i, names in enumerate(
+        [
+            ("monday", "mon"),
+            ("tuesday", "tue", "tues"),
+            ("wednesday", "wed"),
+            ("thursday", "thu", "thur", "thurs"),
+            ("friday", "fri"),
+            ("saturday", "sat"),
+            ("sunday", "sun"),
+        ]
+    )
+    for name in names
+}
+_MONTHS = {
+    name: i + 1
+    for i, names in enumerate(
+        [
+            ("january", "jan"),
+            ("february", "feb"),
+            ("march", "mar"),
+            ("april", "apr"),
+            ("may",),
+            ("june", "jun"),
+            ("july", "jul"),
+            ("august", "aug"),
+            ("september", "sep", "sept"),
+            ("october", "oct"),
+            ("november", "nov"),
+            ("december", "dec"),
+        ]
+    )
+    for name in names
+}
+
+_FILLER = r"(?:please|thanks|thank you|pls)"
+_PHONE = re.compile(r"^\+?[\d\s().-]{7,20}$")
+_CANCEL = re.compile(
+    r"^(?:please\s+)?cancel\s+(?:my\s+)?(?:appointment|appt|booking)\s*"
+    r"(?:id\s*)?[:#]?\s*(?P<id>[A-Za-z0-9_-]{12})\s*[.!]?$",
+    re.IGNORECASE,
+)
+_SLOTS = re.compile(
+    r"^(?:(?:hi|hey|hello)[,!]?\s+)?"
+    r"(?:(?:what|which|any|are there(?: any)?|do you have(?: any)?|show(?: me)?)"
+    r"\s+)?"
+    r"(?:free\s+|open\s+|available\s+)?"
+    # not "appointments": "any appointments tomorrow?" may ask about their own
+    r"(?:slots?|times?|openings?|availability)\s+"
+    r"(?:do you have\s+|are\s+)?(?:available\s+|open\s+|free\s+|left\s+)?"
+    r"(?P<when>.+?)\s*\??$",
+    re.IGNORECASE,
+)
+# "for a cleaning", "check-up": the type decides how long a free slot must be
+_APPOINTMENT_TYPE = re.compile(
+    r"(?:\bfor\s+(?:an?\s+)?)?\b(?P<type>cleaning|clean|check[\s-]?up|exam|emergency)s?\b",
+    re.IGNORECASE,
+)
+_TYPE_WORDS = {
+    "cleaning": AppointmentType.CLEANING.value,
+    "clean": AppointmentType.CLEANING.value,
+    "checkup": AppointmentType.GENERAL.value,
+    "exam": AppointmentType.GENERAL.value,
+    "emergency": AppointmentType.EMERGENCY.value,
+}
+_ISO_DATE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
+# 12-03-1990, 03.12.1990, 1990 01 01: digits enough for a phone number, but a date
+_DATE_SHAPED = re.compile(r"^(\d{1,4})[\s./-](\d{1,2})[\s./-](\d{1,4})$")
+_NUMERIC_DATE = re.compile(r"^(\d{1,2})/(\d{1,2})(?:/(\d{2}|\d{4}))?$")
+_MONTH_DAY = re.compile(r"^([a-z]+)\.?\s+(\d{1,2})(?:st|nd|rd|th)?(?:,?\s+(\d{4}))?$")
+_DAY_MONTH = re.compile(
+    r"^(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?([a-z]+)(?:,?\s+(\d{4}))?$"
+)
+
+# the assistant's last message was asking which day the patient wants
+_ASKED_FOR_DAY = re.compile(
+    r"\b(?:which|what)\s+(?:day|date)\b|\bwhen would you like\b", re.IGNORECASE
+)
+_ASKED_FOR_BIRTH_DATE = re.compile(r"\bbirth\b|\bdob\b", re.IGNORECASE)
+
+
+@dataclass
+class Intent:
+    name: str
+    phone: Optional[str] = None
+    appointment_id: Optional[str] = None
+    target_date: Optional[date] = None
+    appointment_type: Optional[str] = None
+
+
+def _next_weekday(today: date, weekday: int, skip_today: bool) -> date:
+    days = (weekday - today.weekday()) % 7
+    if days == 0 and skip_today:
+        days = 7
+    return today + timedelta(days=days)
+
+
+def _with_year(
+    today: date, month: int, day: int, year: Optional[str]
+) -> Optional[date]:
+    try:
+        if year:
+            year = int(year)
+            return date(year + 2000 if year < 100 else year, month, day)
+        candidate = date(today.year, month, day)
+        # "March 3" in December means next year's
+        return candidate if candidate >= today else date(today.year + 1, month, day)
+    except ValueError:
+        return None
+
+
+def appointment_type_in(text: str) -> Optional[str]:
+    """The appointment type a message names (cleaning, check-up...), if any."""
+    match = _APPOINTMENT_TYPE.search(text)
+    if not match:
+        return None
+    word = re.sub(r"[\s-]", "", match.group("type").lower())
+    return _TYPE_WORDS[word]
+
+
+def _looks_like_date(text: str) -> bool:
+    match = _DATE_SHAPED.match(text)
+    if not match:
+        return False
+    first, middle, last = match.groups()
+    if len(first) == 4:
+        year, day_or_month = first, (middle, last)
+    elif len(last) == 4:
+        year, day_or_month = last, (first, middle)
+    else:
+        return False
+    a, b = map(int, day_or_month)
+    return 1800 <= int(year) <= 2100 and 1 <= min(a, b) <= 12 and max(a, b) <= 31
+
+
+def parse_day(text: str, today: Optional[date] = None) -> Optional[date]:
+    """
+    Parse a stand-alone day reference: today, tomorrow, (next) friday,
+    2025-11-07, 11/7, Nov 7, 7th of November. None if it is anything else.
+    """
+    today = today or date.today()
+    text = re.sub(rf"[\s,.!]*\b{_FILLER}\b[\s,.!]*$", "", text.strip().lower())
+    text = re.sub(r"^(?:on|for|this)\s+", "", text)
+    text = re.sub(r"^the\s+", "", text).strip(" .!?")
+
+    if text == "today":
+        return today
+    if text == "tomorrow":
+        return today + timedelta(days=1)
+
+    skip_today = text.startswith("next ")
+    weekday = text.removeprefix("next ").strip()
+    if weekday in _WEEKDAYS:
+        return _next_weekday(today, _WEEKDAYS[weekday], skip_today)
+
+    if match := _ISO_DATE.match(text):
+        try:
+            return date(*map(int, match.groups()))
+        except ValueError:
+            return None
+    if match := _NUMERIC_DATE.match(text):
+        month, day, year = match.groups()
+        return _with_year(today, int(month), int(day), year)
+    if match := _MONTH_DAY.match(text):
+        month, day, year = match.groups()
+        if month in _MONTHS:
+            return _with_year(today, _MONTHS[month], int(day), year)
+    if match := _DAY_MONTH.match(text):
+        day, month, year = match.groups()
+        if month in _MONTHS:
+            return _with_year(today, _MONTHS[month], int(day), year)
+    return None
+
+
+def classify(
+    message: str, last_ai_message: Optional[str] = None, today: Optional[date] = None
+) -> Optional[Intent]:
+    """
+    Recognise the mechanical requests the fast path can answer without the
+    model. Returns None whenever the message is not an exact fit.
+    """
+    text = message.strip()
+    if not text or len(text) > MAX_MESSAGE_CHARS:
+        return None
+
+    if (
+        _PHONE.match(text)
+        and 7 <= sum(c.isdigit() for c in text) <= 15
+        and not _looks_like_date(text)
+        # digits answering "what's your date of birth?" are a date (19900101)
+        and not (last_ai_message and _ASKED_FOR_BIRTH_DATE.search(last_ai_message))
+    ):
+        return Intent(LOOKUP_PATIENT, phone=normalize_phone(text))
+
+    if match := _CANCEL.match(text):
+        return Intent(CANCEL_APPOINTMENT, appointment_id=match.group("id"))
+
+    if match := _SLOTS.match(text):
+        when = match.group("when")
+        appointment_type = appointment_type_in(when)
+        target = parse_day(_APPOINTMENT_TYPE.sub("", when), today)
+        if target:
+            return Intent(
+                AVAILABLE_SLOTS, target_date=target, appointment_type=appointment_type
+            )
+        return None
+
+    # a bare day answering "which day works for you?"
+    if (
+        last_ai_message
+        and _ASKED_FOR_DAY.search(last_ai_message)
+        and not _ASKED_FOR_BIRTH_DATE.search(last_ai_message)
+    ):
+        target = parse_day(text, today)
+        if target:
+            return Intent(AVAILABLE_SLOTS, target_date=target)
+
+    return None
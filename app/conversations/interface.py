@@ -1,32 +1,50 @@
-from typing import List, Optional
-from datetime import datetime
+import logging
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Sequence, Union
+from contextlib import nullcontext
+from datetime import datetime, timezone
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.conversations import appointment_agent
 from app.conversations.models import (
     Conversation,
     Message,
+    MessageRow,
     ConversationStatusEnum,
     SenderTypeEnum,
 )
-from app.db.utils import with_db
+from app.db.pagination import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_PAGE_SIZE,
+    Page,
+    fetch_page,
+    project,
+    stream_scalars,
+)
+from app import config
+from app.conversations.message_log import message_log
+from app.db.base_model import new_id
+from app.db.readonly import fetch_as, select_as
+from app.db.utils import commit, unit_of_work, with_db
+
+logger = logging.getLogger(__name__)
 # ----------------------------
 # Conversation CRUD
 # ----------------------------
 
 
 @with_db
-async def create_conversation(db: AsyncSession = None) -> Conversation:
+async def create_conversation(
+    conversation_id: Optional[str] = None, db: AsyncSession = None
+) -> Conversation:
     conversation = Conversation(
+        id=conversation_id or new_id(),
         status=ConversationStatusEnum.ACTIVE.value,
         started_at=datetime.utcnow(),
     )
 
     db.add(conversation)
-    await db.commit()
-    await db.refresh(conversation)
+    await commit(db)
     return conversation
 
 
@@ -50,8 +68,7 @@ async def update_conversation_status(
     conversation.status = status
     if status == ConversationStatusEnum.ESCALATED.value:
         conversation.escalated_at = datetime.utcnow()
-    await db.commit()
-    await db.refresh(conversation)
+    await commit(db)
     return conversation
 
 
@@ -75,23 +92,59 @@ async def close_conversation(
         return None
     conversation.status = ConversationStatusEnum.CLOSED.value
     conversation.closed_at = datetime.utcnow()
-    await db.commit()
-    await db.refresh(conversation)
+    await commit(db)
     return conversation
 
 
+def _conversations_query(
+    patient_id: Optional[str], columns: Optional[Sequence[str]], keys=()
+):
+    query = select(Conversation).options(*project(Conversation, columns, keys))
+    if patient_id is not None:
+        query = query.where(Conversation.patient_id == patient_id)
+    return query
+
+
 @with_db
 async def list_conversations(
-    patient_id: Optional[int] = None, db: AsyncSession = None
+    patient_id: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    db: AsyncSession = None,
 ) -> List[Conversation]:
-    query = select(Conversation)
-    if patient_id is not None:
-        query = query.where(Conversation.patient_id == patient_id)
+    """Every matching conversation at once, newest first; see list_conversations_page."""
+    query = _conversations_query(patient_id, columns)
     query = query.order_by(Conversation.started_at.desc())
     result = await db.execute(query)
     return result.scalars().all()
 
 
+@with_db
+async def list_conversations_page(
+    patient_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    columns: Optional[Sequence[str]] = None,
+    db: AsyncSession = None,
+) -> Page[Conversation]:
+    """Conversations newest first, one keyset page at a time."""
+    keys = (Conversation.started_at, Conversation.id)
+    query = _conversations_query(patient_id, columns, keys)
+    return await fetch_page(db, query, keys, cursor, limit, descending=True)
+
+
+def stream_conversations(
+    patient_id: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    db: AsyncSession = None,
+) -> AsyncIterator[Conversation]:
+    """Matching conversations newest first, fetched batch_size at a time."""
+    query = _conversations_query(patient_id, columns).order_by(
+        Conversation.started_at.desc(), Conversation.id.desc()
+    )
+    return stream_scalars(query, batch_size, db)
+
+
 # ----------------------------
 # Message CRUD
 # ----------------------------
@@ -102,30 +155,146 @@ async def create_message(
     conversation_id: str,
     sender_type: str,
     content: str,
-    patient_id: Optional[int] = None,
+    patient_id: Optional[str] = None,
     metadata: Optional[dict] = None,
     db: AsyncSession = None,
 ) -> Message:
+    if message_log.running and not _pending_in(db, conversation_id):
+        # write-behind: buffered now, group-committed by the message log
+        now = datetime.now(timezone.utc)
+        row = {
+            "id": new_id(),
+            "conversation_id": conversation_id,
+            "sender_type": getattr(sender_type, "value", sender_type),
+            "content": content,
+            "meta": metadata,
+            "created_at": now,
+            "updated_at": now,
+        }
+        await message_log.append(row)
+        return Message(**row)
+
     message = Message(
         conversation_id=conversation_id,
         sender_type=sender_type,
         content=content,
         meta=metadata,
+        # stamped now, not at flush: a turn's messages are flushed together
+        created_at=datetime.now(timezone.utc),
     )
     db.add(message)
-    await db.commit()
-    await db.refresh(message)
+    await commit(db)
     return message
 
 
-@with_db
-async def get_messages(conversation_id: str, db: AsyncSession = None) -> List[Message]:
-    result = await db.execute(
+def _pending_in(db: AsyncSession, conversation_id: str) -> bool:
+    """Whether the conversation is created but not yet flushed in `db`."""
+    return any(
+        isinstance(obj, Conversation) and obj.id == conversation_id for obj in db.new
+    )
+
+
+def _naive(value: datetime) -> datetime:
+    # SQLite hands back naive UTC; new objects hold aware UTC
+    return value.replace(tzinfo=None) if value.tzinfo else value
+
+
+def _messages_query(
+    conversation_id: str,
+    since: Optional[datetime],
+    columns: Optional[Sequence[str]],
+    keys=(),
+):
+    query = (
         select(Message)
         .where(Message.conversation_id == conversation_id)
-        .order_by(Message.created_at.asc())
+        .options(*project(Message, columns, keys))
     )
-    return result.scalars().all()
+    if since is not None:
+        query = query.where(Message.created_at > since)
+    return query
+
+
+@with_db
+async def get_messages(
+    conversation_id: str,
+    since: Optional[datetime] = None,
+    columns: Optional[Sequence[str]] = None,
+    db: AsyncSession = None,
+) -> List[Message]:
+    """
+    Messages of a conversation in order, optionally only those created after
+    `since`. `columns` loads only those, e.g. ["sender_type", "created_at"]
+    to skip content and meta.
+    """
+    # taken before the query: a flush finishing in between then shows up in
+    # both, never in neither
+    buffered = message_log.pending(conversation_id)
+    query = _messages_query(conversation_id, since, columns)
+    result = await db.execute(query.order_by(Message.created_at.asc()))
+    return _with_buffered(result.scalars().all(), buffered, since)
+
+
+@with_db
+async def get_message_rows(
+    conversation_id: str,
+    since: Optional[datetime] = None,
+    db: AsyncSession = None,
+) -> List[MessageRow]:
+    """get_messages as read-only MessageRow tuples, e.g. for the history window."""
+    buffered = [
+        MessageRow._make(getattr(message, name) for name in MessageRow._fields)
+        for message in message_log.pending(conversation_id)
+    ]
+    query = select_as(MessageRow, Message).where(
+        Message.conversation_id == conversation_id
+    )
+    if since is not None:
+        query = query.where(Message.created_at > since)
+    rows = await fetch_as(db, query.order_by(Message.created_at.asc()), MessageRow)
+    return _with_buffered(rows, buffered, since)
+
+
+def _with_buffered(stored: Sequence, buffered: Sequence, since: Optional[datetime]):
+    """Stored messages followed by the write-behind ones not flushed yet."""
+    if not buffered:
+        return stored
+    # buffered messages are newer than every flushed one of the conversation
+    seen = {message.id for message in stored}
+    return list(stored) + [
+        message
+        for message in buffered
+        if message.id not in seen
+        and (since is None or _naive(message.created_at) > _naive(since))
+    ]
+
+
+@with_db
+async def get_messages_page(
+    conversation_id: str,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    columns: Optional[Sequence[str]] = None,
+    db: AsyncSession = None,
+) -> Page[Message]:
+    """Messages of a conversation oldest first, one keyset page at a time."""
+    keys = (Message.created_at, Message.id)
+    query = _messages_query(conversation_id, None, columns, keys)
+    return await fetch_page(db, query, keys, cursor, limit)
+
+
+def stream_messages(
+    conversation_id: str,
+    since: Optional[datetime] = None,
+    columns: Optional[Sequence[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    db: AsyncSession = None,
+) -> AsyncIterator[Message]:
+    """Messages of a conversation oldest first, fetched batch_size at a time."""
+    query = _messages_query(conversation_id, since, columns).order_by(
+        Message.created_at.asc(), Message.id.asc()
+    )
+    return stream_scalars(query, batch_size, db)
 
 
 @with_db
@@ -157,52 +326,165 @@ async def update_message_content(
     message.content = content
     if metadata:
         message.metadata = metadata
-    await db.commit()
-    await db.refresh(message)
+    await commit(db)
     return message
 
 
+def _turn(db: AsyncSession):
+    """One commit for the whole turn, or one per write with the unit of work off."""
+    return unit_of_work(db) if config.TURN_UNIT_OF_WORK else nullcontext()
+
+
+def _patient_messages(content: Union[str, Sequence[str]]) -> List[str]:
+    return [content] if isinstance(content, str) else list(content)
+
+
+async def _store_patient_messages(
+    db: AsyncSession, conversation_id: str, contents: List[str], stored: List[Message]
+) -> None:
+    """Store each message on its own, appending them to `stored` as they are."""
+    for text in contents:
+        stored.append(
+            await create_message(
+                conversation_id=conversation_id,
+                sender_type=SenderTypeEnum.PATIENT,
+                content=text,
+                db=db,
+            )
+        )
+
+
+async def _keep_patient_messages(
+    db: AsyncSession,
+    messages: List[Message],
+    conversation: Optional[Conversation] = None,
+) -> None:
+    """
+    A failed turn rolls back what it staged, the patient's messages with it:
+    commit those messages (and the conversation, if the turn created it) on
+    their own, so what the patient said stays in the history.
+    """
+    if not messages:
+        return
+    try:
+        lost = []
+        for message in messages:
+            if message_log.holds(message.conversation_id, message.id):
+                continue  # buffered: the message log commits it
+            if await db.get(Message, message.id) is not None:
+                continue  # committed before the turn failed
+            lost.append(message)
+        if not lost:
+            return
+        if (
+            conversation is not None
+            and await db.get(Conversation, conversation.id) is None
+        ):
+            db.add(conversation)
+        db.add_all(lost)
+        await db.commit()
+    except Exception:
+        # the turn's own error is the one to report
+        logger.exception(
+            "Could not keep the patient's messages of a failed turn",
+            extra={"conversation_id": messages[0].conversation_id},
+        )
+
+
 @with_db
 async def process_user_message(
     conversation_id: int = None,
-    content: str = None,
+    content: Union[str, Sequence[str]] = None,
     db: AsyncSession = None,
 ):
     """
     Create conversation/message, send to agent, store response, and return AI reply.
 
+    The whole turn runs on `db`: the conversation, the messages and whatever
+    the agent's tools stage are committed together at the end. If the turn
+    fails, the patient's messages are still committed.
+
     Args:
         conversation_id: existing conversation ID (if any)
         patient_id: patient ID (used if conversation needs creation)
-        content: patient message text
+        content: patient message text, or several messages sent back to back:
+            each is stored as its own message and the agent answers them in
+            one turn
 
     Returns:
         conversation_id, ai_message
     """
-    # If no conversation exists, create one
-    if not conversation_id:
-        conversation = await create_conversation(db=db)
-        conversation_id = conversation.id
+    # Get AI agent response (imported on first use: it pulls in pydantic-ai and
+    # the model SDK)
+    from app.conversations import appointment_agent
+
+    contents = _patient_messages(content)
+    conversation = None
+    stored: List[Message] = []
+    try:
+        async with _turn(db):
+            # If no conversation exists, create one
+            if not conversation_id:
+                conversation = await create_conversation(db=db)
+                conversation_id = conversation.id
+
+            # Store patient's messages
+            await _store_patient_messages(db, conversation_id, contents, stored)
+
+            ai_response = await appointment_agent.handle_user_message(
+                conversation_id=conversation_id, message=contents, db=db
+            )
+
+            # Store AI response
+            await create_message(
+                conversation_id=conversation_id,
+                sender_type=SenderTypeEnum.AI_AGENT,
+                content=ai_response,
+                db=db,
+            )
+    except Exception:
+        await _keep_patient_messages(db, stored, conversation)
+        raise
 
-    # Store patient's message
-    msg = await create_message(
-        conversation_id=conversation_id,
-        sender_type=SenderTypeEnum.PATIENT,
-        content=content,
-        db=db,
-    )
+    return conversation_id, ai_response
 
-    # Get AI agent response
-    ai_response = await appointment_agent.handle_user_message(
-        conversation_id=conversation_id, message=msg.content
-    )
 
-    # Store AI response
-    ai_msg = await create_message(
-        conversation_id=conversation_id,
-        sender_type=SenderTypeEnum.AI_AGENT,
-        content=ai_response,
-        db=db,
-    )
+@with_db
+async def stream_user_message(
+    conversation_id: str,
+    content: Union[str, Sequence[str]],
+    on_delta: Callable[[str], Awaitable[None]],
+    db: AsyncSession = None,
+) -> str:
+    """
+    Streaming variant of process_user_message for an existing conversation.
 
-    return conversation_id, ai_response
+    Stores the patient's messages, awaits on_delta(text) for each chunk of the
+    AI reply as it is generated, then stores the complete reply once and
+    returns it.
+    """
+    from app.conversations import appointment_agent
+
+    contents = _patient_messages(content)
+    stored: List[Message] = []
+    try:
+        async with _turn(db):
+            await _store_patient_messages(db, conversation_id, contents, stored)
+
+            ai_response = await appointment_agent.stream_user_message(
+                conversation_id=conversation_id,
+                message=contents,
+                on_delta=on_delta,
+                db=db,
+            )
+
+            await create_message(
+                conversation_id=conversation_id,
+                sender_type=SenderTypeEnum.AI_AGENT,
+                content=ai_response,
+                db=db,
+            )
+    except Exception:
+        await _keep_patient_messages(db, stored)
+        raise
+    return ai_response
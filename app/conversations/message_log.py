@@ -0,0 +1,363 @@
+# app/conversations/message_log.py
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DataError, IntegrityError, StatementError
+
+from app import config
+from app.conversations.models import Message
+from app.db.utils import session_scope
+from app.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+_DATETIMES = ("created_at", "updated_at")
+
+
+def _refused(exc: Exception) -> bool:
+    """Whether the database refused the rows themselves (a constraint, a bad value)."""
+    return isinstance(exc, (IntegrityError, DataError)) or type(exc) is StatementError
+
+
+def _to_line(row: dict) -> str:
+    line = {k: v.isoformat() if k in _DATETIMES and v else v for k, v in row.items()}
+    return json.dumps(line) + "\n"
+
+
+def _fsync_and_close(fd: int) -> None:
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _Journal:
+    """
+    Append-only JSON-lines copy of the buffered messages. Every append is
+    written through to the OS, which is enough to survive a crash of the
+    process; with fsync, sync() also forces it to disk, to survive a power
+    loss or an OS crash. The disk sync runs in a thread, and one sync covers
+    every line appended before it started, so concurrent appends share it
+    instead of queueing one sync each. A flush rotates the
+    active file into a numbered segment and deletes the segments once their
+    rows are committed. Rows the database refused go to "<path>.rejected".
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = Path(path)
+        self.fsync = fsync
+        self._segment = max((n for n, _ in self._segments()), default=0)
+        # held open across appends; rotate() and close() close it
+        self._file = open(self.path, "a", encoding="utf-8")  # noqa: SIM115
+        self._appended = 0
+        self._synced = 0
+        self._sync_task: Optional[asyncio.Task] = None
+
+    def _segments(self):
+        for segment in self.path.parent.glob(f"{self.path.name}.*"):
+            suffix = segment.name.rpartition(".")[2]
+            if suffix.isdigit():
+                yield int(suffix), segment
+
+    def append(self, row: dict) -> None:
+        self._file.write(_to_line(row))
+        self._file.flush()
+        self._appended += 1
+
+    async def sync(self) -> None:
+        """Wait until every line appended so far is on disk."""
+        target = self._appended
+        while self._synced < target:
+            if self._sync_task is None:
+                self._sync_task = asyncio.create_task(self._fsync())
+            await asyncio.shield(self._sync_task)
+
+    async def _fsync(self) -> None:
+        upto = self._appended
+        # a duplicate descriptor stays valid if rotate() closes the file meanwhile
+        fd = os.dup(self._file.fileno())
+        try:
+            await asyncio.to_thread(_fsync_and_close, fd)
+            self._synced = max(self._synced, upto)
+        finally:
+            self._sync_task = None
+
+    def reject(self, row: dict) -> None:
+        with open(f"{self.path}.rejected", "a", encoding="utf-8") as f:
+            f.write(_to_line(row))
+
+    def rotate(self) -> int:
+        """Move what was appended so far into a segment; returns its number."""
+        self._file.close()
+        self._segment += 1
+        if self.path.exists():
+            self.path.rename(f"{self.path}.{self._segment}")
+        self._file = open(self.path, "a", encoding="utf-8")  # noqa: SIM115
+        return self._segment
+
+    def committed(self, upto: int) -> None:
+        for n, segment in list(self._segments()):
+            if n <= upto:
+                segment.unlink(missing_ok=True)
+
+    def replay(self) -> List[dict]:
+        rows = []
+        files = [segment for _, segment in sorted(self._segments())] + [self.path]
+        for path in files:
+            if not path.exists():
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        # torn final line of a crashed write
+                        continue
+                    for key in _DATETIMES:
+                        if row.get(key):
+                            row[key] = datetime.fromisoformat(row[key])
+                    rows.append(row)
+        return rows
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class MessageLog:
+    """
+    Write-behind buffer for chat messages.
+
+    append() keeps the row in memory, ordered per conversation, and returns
+    without touching the database; pending() lets history loads read through
+    the buffer. A background flusher group-commits everything buffered, from
+    all conversations, in one transaction at most `max_delay` seconds after
+    the first unflushed append (the durability bound), or as soon as
+    `max_batch` rows are waiting. Appends wait for a flush once `max_pending`
+    rows are buffered. With a journal, buffered rows survive a crash of the
+    process (and, with journal_fsync, of the machine) and are inserted on the
+    next start().
+
+    A row the database refuses (say, its conversation was deleted) would fail
+    every batch it is in: when a batch is refused, its rows are inserted one
+    by one instead and the refused ones set aside, logged and, with a
+    journal, kept in its .rejected file.
+    """
+
+    def __init__(
+        self,
+        max_delay: float = 0.05,
+        max_batch: int = 500,
+        max_pending: int = 10_000,
+        journal_path: str = "",
+        journal_fsync: bool = False,
+    ):
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.journal_path = journal_path
+        self.journal_fsync = journal_fsync
+        self._journal: Optional[_Journal] = None
+        # rows in arrival order, and the same rows per conversation
+        self._rows: List[dict] = []
+        self._by_conversation: Dict[str, List[dict]] = {}
+        self._first_pending_at: Optional[float] = None
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        self.appended = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.failures = 0
+        self.rejected = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    async def start(self) -> None:
+        """Open the journal, insert what a previous process left in it, and start flushing."""
+        if self._task:
+            return
+        if self.journal_path:
+            self._journal = _Journal(self.journal_path, fsync=self.journal_fsync)
+            leftover = self._journal.replay()
+            if leftover:
+                segment = self._journal.rotate()
+                await self._write(leftover, skip_existing=True)
+                self._journal.committed(segment)
+                logger.warning(
+                    "Recovered buffered messages from the journal",
+                    extra={"messages": len(leftover)},
+                )
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush everything buffered and stop the flusher."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._journal:
+            self._journal.close()
+            self._journal = None
+
+    async def append(self, row: dict) -> None:
+        if len(self._rows) >= self.max_pending:
+            await self.flush()
+        if self._journal:
+            self._journal.append(row)
+        self._rows.append(row)
+        self._by_conversation.setdefault(row["conversation_id"], []).append(row)
+        self.appended += 1
+        if self._first_pending_at is None:
+            # starts the flusher's max_delay countdown
+            self._first_pending_at = time.monotonic()
+            self._wakeup.set()
+        elif len(self._rows) >= self.max_batch:
+            self._wakeup.set()
+        # buffered first: a flush rotating the journal meanwhile takes the row
+        if self._journal and self._journal.fsync:
+            await self._journal.sync()
+
+    def holds(self, conversation_id: str, message_id: str) -> bool:
+        """Whether the message is buffered, waiting for a flush."""
+        return any(
+            row["id"] == message_id
+            for row in self._by_conversation.get(conversation_id, ())
+        )
+
+    def pending(self, conversation_id: str) -> List[Message]:
+        """Buffered messages of the conversation, oldest first, as transient objects."""
+        return [
+            Message(**row) for row in self._by_conversation.get(conversation_id, ())
+        ]
+
+    async def flush(self) -> int:
+        """Group-commit every buffered row; returns how many were written."""
+        async with self._flush_lock:
+            if not self._rows:
+                return 0
+            batch = self._rows
+            self._rows = []
+            self._first_pending_at = None
+            segment = self._journal.rotate() if self._journal else None
+            started = time.perf_counter()
+            try:
+                await self._write(batch)
+            except Exception:
+                # keep them buffered (and journaled) for the next attempt
+                self._rows = batch + self._rows
+                self._first_pending_at = time.monotonic()
+                self.failures += 1
+                logger.exception("Message flush failed", extra={"messages": len(batch)})
+                raise
+            registry.observe("messages.flush", time.perf_counter() - started)
+            if self._journal:
+                self._journal.committed(segment)
+            # each conversation's flushed rows are the oldest of its list
+            for conversation_id, count in Counter(
+                row["conversation_id"] for row in batch
+            ).items():
+                rows = self._by_conversation[conversation_id]
+                del rows[:count]
+                if not rows:
+                    del self._by_conversation[conversation_id]
+            self.flushed += len(batch)
+            self.flushes += 1
+            return len(batch)
+
+    async def _write(self, rows: List[dict], skip_existing: bool = False) -> None:
+        """
+        Insert rows in one transaction or, if the database refuses it, one
+        row per transaction, setting aside the rows it refuses. Other errors
+        (the database is down, locked...) propagate for a retry of them all.
+        """
+        try:
+            await self._insert(rows, skip_existing)
+            return
+        except Exception as exc:
+            if not _refused(exc):
+                raise
+        # rows a retry interrupted earlier already committed are skipped
+        for row in rows:
+            try:
+                await self._insert([row], skip_existing=True)
+            except Exception as exc:
+                if not _refused(exc):
+                    raise
+                self._set_aside(row, exc)
+
+    def _set_aside(self, row: dict, exc: Exception) -> None:
+        self.rejected += 1
+        registry.increment("messages.rejected")
+        if self._journal:
+            self._journal.reject(row)
+        logger.error(
+            "Message refused by the database, set aside",
+            extra={
+                "message_id": row["id"],
+                "conversation_id": row["conversation_id"],
+                "error": str(getattr(exc, "orig", None) or exc),
+            },
+        )
+
+    async def _insert(self, rows: List[dict], skip_existing: bool = False) -> None:
+        async with session_scope() as db:
+            if skip_existing:
+                ids = [row["id"] for row in rows]
+                existing = set(
+                    (
+                        await db.execute(select(Message.id).where(Message.id.in_(ids)))
+                    ).scalars()
+                )
+                rows = [row for row in rows if row["id"] not in existing]
+            # one transaction, executemany in chunks of max_batch
+            for i in range(0, len(rows), self.max_batch):
+                await db.execute(
+                    insert(Message.__table__), rows[i : i + self.max_batch]
+                )
+            await db.commit()
+
+    async def _run(self) -> None:
+        while True:
+            if self._first_pending_at is None:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            remaining = self._first_pending_at + self.max_delay - time.monotonic()
+            if remaining > 0 and len(self._rows) < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            try:
+                await self.flush()
+            except Exception:  # noqa: BLE001 - flush() logged it; retry later
+                await asyncio.sleep(self.max_delay)
+
+
+message_log = MessageLog(
+    max_delay=config.MESSAGE_FLUSH_INTERVAL_MS / 1000,
+    max_batch=config.MESSAGE_FLUSH_BATCH,
+    max_pending=config.MESSAGE_MAX_PENDING,
+    journal_path=config.MESSAGE_JOURNAL_PATH,
+    journal_fsync=config.MESSAGE_JOURNAL_FSYNC,
+)
@@ -1,8 +1,10 @@
-from sqlalchemy import Column, ForeignKey, DateTime, Integer, String, Text, JSON, func
+from sqlalchemy import Column, ForeignKey, DateTime, Index, String, Text, JSON, func
 from sqlalchemy.orm import relationship
 import enum
+from datetime import datetime
+from typing import NamedTuple
 from app.db.base_model import BaseModel
-from app.patient_info.models import Patient
+from app.patient_info.models import Patient  # noqa: F401 - maps relationship("Patient")
 
 
 class SenderTypeEnum(str, enum.Enum):
@@ -19,15 +21,24 @@ class ConversationStatusEnum(str, enum.Enum):
 
 class Conversation(BaseModel):
     __tablename__ = "conversations"
-    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=True)
+    __table_args__ = (
+        Index("ix_conversations_patient_id_started_at", "patient_id", "started_at"),
+    )
+
+    patient_id = Column(String(length=12), ForeignKey("patients.id"), nullable=True)
     status = Column(
         String(50), default=ConversationStatusEnum.ACTIVE.value, nullable=False
     )
     started_at = Column(DateTime(timezone=True), server_default=func.now())
     escalated_at = Column(DateTime(timezone=True), nullable=True)
     closed_at = Column(DateTime(timezone=True), nullable=True)
+    # truncated transcript of messages folded out of the history window, and the
+    # created_at of the last message folded into it
+    earlier_transcript = Column(Text, nullable=True)
+    transcript_until = Column(DateTime(timezone=True), nullable=True)
 
-    patient = relationship("Patient", backref="conversations", lazy="selectin")
+    # never loaded implicitly: .options(joinedload(Conversation.patient)) where needed
+    patient = relationship("Patient", backref="conversations", lazy="raise")
     messages = relationship(
         "Message", back_populates="conversation", cascade="all, delete-orphan"
     )
@@ -35,6 +46,11 @@ class Conversation(BaseModel):
 
 class Message(BaseModel):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index(
+            "ix_messages_conversation_id_created_at", "conversation_id", "created_at"
+        ),
+    )
 
     conversation_id = Column(String(), ForeignKey("conversations.id"), nullable=False)
     sender_type = Column(String(50), nullable=False)
@@ -42,3 +58,12 @@ class Message(BaseModel):
     meta = Column(JSON, nullable=True)  # optional: attachments, AI model info, etc.
 
     conversation = relationship("Conversation", back_populates="messages")
+
+
+class MessageRow(NamedTuple):
+    """Read-only message fields for history loads, selected with Core (app.db.readonly)."""
+
+    id: str
+    sender_type: str
+    content: str
+    created_at: datetime
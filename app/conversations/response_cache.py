@@ -0,0 +1,186 @@
+# app/conversations/response_cache.py
+import math
+import re
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Optional, Tuple
+
+from app import config
+from app.metrics import registry
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize(message: str) -> str:
+    """Lowercase words only: "What are your HOURS?!" -> "what are your hours"."""
+    return " ".join(_WORD.findall(message.lower()))
+
+
+def _features(text: str) -> Dict[int, float]:
+    """Hashed word and character-trigram counts."""
+    counts: Dict[int, float] = {}
+    padded = f" {text} "
+    grams = [padded[i : i + 3] for i in range(len(padded) - 2)] + [
+        f"w:{word}" for word in text.split()
+    ]
+    for gram in grams:
+        bucket = zlib.crc32(gram.encode())
+        counts[bucket] = counts.get(bucket, 0.0) + 1.0
+    return counts
+
+
+class _VectorIndex:
+    """
+    Cosine-similarity lookup over hashed n-gram vectors of normalized
+    messages. An inverted index: only entries sharing an n-gram get scored.
+    """
+
+    def __init__(self, dims: int):
+        self.dims = dims
+        self._vectors: Dict[Hashable, Dict[int, float]] = {}
+        self._postings: Dict[int, Dict[Hashable, float]] = {}
+
+    def vector(self, text: str) -> Dict[int, float]:
+        folded: Dict[int, float] = {}
+        for bucket, count in _features(text).items():
+            folded[bucket % self.dims] = folded.get(bucket % self.dims, 0.0) + count
+        norm = math.sqrt(sum(v * v for v in folded.values())) or 1.0
+        return {k: v / norm for k, v in folded.items()}
+
+    def add(self, key: Hashable, vector: Dict[int, float]) -> None:
+        self._vectors[key] = vector
+        for bucket, weight in vector.items():
+            self._postings.setdefault(bucket, {})[key] = weight
+
+    def remove(self, key: Hashable) -> None:
+        for bucket in self._vectors.pop(key):
+            posting = self._postings[bucket]
+            del posting[key]
+            if not posting:
+                del self._postings[bucket]
+
+    def nearest(self, vector: Dict[int, float]) -> Tuple[Optional[Hashable], float]:
+        scores: Dict[Hashable, float] = {}
+        for bucket, weight in vector.items():
+            for key, stored in self._postings.get(bucket, {}).items():
+                scores[key] = scores.get(key, 0.0) + weight * stored
+        if not scores:
+            return None, 0.0
+        key = max(scores, key=scores.__getitem__)
+        return key, scores[key]
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+
+@dataclass
+class _Entry:
+    expires_at: float
+    reply: str
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of agent replies keyed by (context, normalized message).
+
+    `context` is whatever the reply may depend on besides the message (the
+    agent only uses "anonymous"); lookups only match entries with the same
+    context. A miss on the exact key falls back to the most similar cached
+    message, if its cosine similarity reaches `similarity`.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 512,
+        ttl_seconds: float = 3600.0,
+        similarity: float = 0.9,
+        dims: int = 2048,
+    ):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self.dims = dims
+        self._entries: "OrderedDict[Tuple[Hashable, str], _Entry]" = OrderedDict()
+        self._indexes: Dict[Hashable, _VectorIndex] = {}
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        return (self.exact_hits + self.similar_hits) / lookups if lookups else 0.0
+
+    def get(self, context: Hashable, message: str) -> Optional[str]:
+        text = normalize(message)
+        key = (context, text)
+        hit = "exact"
+        if not self._live(key):
+            index = self._indexes.get(context)
+            if self.similarity > 1 or not index or not text:
+                key = None
+            else:
+                key, score = index.nearest(index.vector(text))
+                if not self._live(key) or score < self.similarity:
+                    key = None
+                hit = "similar"
+        if key is None:
+            self.misses += 1
+            registry.increment("response_cache.miss")
+            return None
+
+        self._entries.move_to_end(key)
+        if hit == "exact":
+            self.exact_hits += 1
+        else:
+            self.similar_hits += 1
+        registry.increment(f"response_cache.hit_{hit}")
+        return self._entries[key].reply
+
+    def set(self, context: Hashable, message: str, reply: str) -> None:
+        text = normalize(message)
+        if self.maxsize <= 0 or not text:
+            return
+        key = (context, text)
+        if key in self._entries:
+            self._discard(key)
+        self._entries[key] = _Entry(time.monotonic() + self.ttl_seconds, reply)
+        index = self._indexes.setdefault(context, _VectorIndex(self.dims))
+        index.add(key, index.vector(text))
+        while len(self._entries) > self.maxsize:
+            self._discard(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._indexes.clear()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def _live(self, key) -> bool:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        if entry.expires_at < time.monotonic():
+            self._discard(key)
+            return False
+        return True
+
+    def _discard(self, key) -> None:
+        del self._entries[key]
+        index = self._indexes[key[0]]
+        index.remove(key)
+        if not index:
+            del self._indexes[key[0]]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_cache = ResponseCache(
+    maxsize=config.RESPONSE_CACHE_SIZE,
+    ttl_seconds=config.RESPONSE_CACHE_TTL_SECONDS,
+    similarity=config.RESPONSE_CACHE_SIMILARITY,
+)
@@ -0,0 +1,133 @@
+# app/conversations/turn_queue.py
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class TurnQueue:
+    """
+    Runs agent turns outside the Socket.IO event handlers.
+
+    - at most `max_concurrency` turns (model calls) run at the same time
+    - each conversation has a single worker, so its turns run in arrival order
+    - messages that arrive while a conversation is waiting or mid-turn are
+      coalesced into that conversation's next turn: the handler gets them as
+      a list, in arrival order
+    - once `max_waiting` conversations are queued for a slot, new conversations
+      are refused so the caller can tell the client to retry; so are messages
+      to a conversation that already has `max_inbox` waiting for its next turn
+    - a turn that raises is handed to `on_failure(conversation_id, messages)`,
+      so the patient hears about it instead of waiting for a reply
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str, List[str]], Awaitable[None]],
+        max_concurrency: int = 8,
+        max_waiting: int = 200,
+        max_inbox: int = 20,
+        on_failure: Optional[Callable[[str, List[str]], Awaitable[None]]] = None,
+    ):
+        self._handler = handler
+        self._on_failure = on_failure
+        self.max_concurrency = max_concurrency
+        self.max_waiting = max_waiting
+        self.max_inbox = max_inbox
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._inbox: Dict[str, List[str]] = {}
+        self._workers: Set[asyncio.Task] = set()
+        self._running = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def waiting(self) -> int:
+        """Conversations queued for a slot (not currently running a turn)."""
+        return len(self._inbox) - self._running
+
+    def has_room(self, conversation_id: Optional[str] = None) -> bool:
+        """Whether submit() would take a message for the conversation (None: a new one)."""
+        inbox = self._inbox.get(conversation_id) if conversation_id else None
+        if inbox is not None:
+            return len(inbox) < self.max_inbox
+        return self.waiting < self.max_waiting
+
+    def submit(self, conversation_id: str, content: str) -> bool:
+        """Queue a patient message. Returns False when the queue is saturated."""
+        if not self.has_room(conversation_id):
+            self.rejected += 1
+            return False
+
+        inbox = self._inbox.get(conversation_id)
+        if inbox is not None:
+            if inbox:
+                self.coalesced += 1
+            inbox.append(content)
+            self.submitted += 1
+            return True
+
+        self._inbox[conversation_id] = [content]
+        self.submitted += 1
+        self._idle.clear()
+        worker = asyncio.create_task(self._drain(conversation_id))
+        self._workers.add(worker)
+        worker.add_done_callback(self._workers.discard)
+        return True
+
+    async def _drain(self, conversation_id: str):
+        inbox = self._inbox[conversation_id]
+        try:
+            while inbox:
+                async with self._slots:
+                    self._running += 1
+                    # everything queued so far becomes one turn
+                    messages = inbox[:]
+                    inbox.clear()
+                    try:
+                        await self._handler(conversation_id, messages)
+                        self.completed += 1
+                    except Exception:
+                        self.failed += 1
+                        logger.exception(
+                            "Agent turn failed for conversation %s", conversation_id
+                        )
+                        await self._failed(conversation_id, messages)
+                    finally:
+                        self._running -= 1
+        finally:
+            del self._inbox[conversation_id]
+            if not self._inbox:
+                self._idle.set()
+
+    async def _failed(self, conversation_id: str, messages: List[str]):
+        if self._on_failure is None:
+            return
+        try:
+            await self._on_failure(conversation_id, messages)
+        except Exception:
+            logger.exception(
+                "Could not report the failed turn of conversation %s", conversation_id
+            )
+
+    async def join(self):
+        """Wait until every queued turn has finished."""
+        await self._idle.wait()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._running,
+            "waiting": self.waiting,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
@@ -1,54 +1,153 @@
+import logging
+from typing import List
+
+from app import config
 from app.conversations import interface as converstaion_interface
+from app.conversations.turn_queue import TurnQueue
+from app.db.base_model import new_id
+from app.metrics import time_stage, timed
 from app.websocket_app import sio
+from app.websocket_manager import StickyRoutingMixin
+
+logger = logging.getLogger(__name__)
 
 
 @sio.event(namespace="/conversations")
 async def connect(sid, environ):
-    print("Connected to /conversations:", sid)
+    logger.info("Connected to /conversations", extra={"sid": sid})
 
 
 @sio.event(namespace="/conversations")
 async def disconnect(sid):
-    print("Disconnected from /conversations:", sid)
+    logger.info("Disconnected from /conversations", extra={"sid": sid})
+
+
+@timed("socket.reply")
+async def _reply(conversation_id: str, messages: List[str]):
+    """
+    Run the agent for the patient's messages (each stored on its own, answered
+    in one turn) and emit the reply to the conversation room, streaming
+    `message_delta` events first when streaming is enabled.
+    """
+    room = str(conversation_id)
+
+    if config.STREAM_RESPONSES:
+
+        async def on_delta(delta: str):
+            await sio.emit(
+                "message_delta",
+                {"conversation_id": room, "delta": delta},
+                room=room,
+                namespace="/conversations",
+            )
+
+        ai_message = await converstaion_interface.stream_user_message(
+            conversation_id=conversation_id, content=messages, on_delta=on_delta
+        )
+    else:
+        _, ai_message = await converstaion_interface.process_user_message(
+            conversation_id=conversation_id, content=messages
+        )
+
+    with time_stage("socket.emit"):
+        await sio.emit(
+            "new_message",
+            {"conversation_id": room, "content": ai_message},
+            room=room,
+            namespace="/conversations",
+        )
+
+
+async def _turn_failed(conversation_id: str, messages: List[str]):
+    """
+    Answer a turn that raised with TURN_FAILED_REPLY, flagged as an error, so
+    the client stops waiting (and drops a half-streamed reply).
+    """
+    room = str(conversation_id)
+    await sio.emit(
+        "new_message",
+        {"conversation_id": room, "content": config.TURN_FAILED_REPLY, "error": True},
+        room=room,
+        namespace="/conversations",
+    )
+
+
+turn_queue = TurnQueue(
+    _reply,
+    max_concurrency=config.AGENT_MAX_CONCURRENCY,
+    max_waiting=config.AGENT_QUEUE_MAX_WAITING,
+    max_inbox=config.AGENT_QUEUE_MAX_INBOX,
+    on_failure=_turn_failed,
+)
+
+
+def _is_local(conversation_id: str) -> bool:
+    """Whether this worker's turn queue runs the conversation's turns."""
+    manager = sio.manager
+    return not isinstance(manager, StickyRoutingMixin) or manager.is_local(
+        conversation_id
+    )
+
+
+async def _busy(sid, payload: dict):
+    """Tell the sender to resend `payload` later."""
+    await sio.emit("busy", payload, to=sid, namespace="/conversations")
+
+
+async def _enqueue(sid, conversation_id: str, content: str):
+    """
+    Hand the message to the turn queue of the worker that owns the
+    conversation; tell the sender to retry if that queue is full.
+    """
+    if not _is_local(conversation_id):
+        await sio.manager.route_turn(sid, conversation_id, content)
+        return
+
+    if not turn_queue.submit(conversation_id, content):
+        await _busy(sid, {"conversation_id": conversation_id, "content": content})
+
+
+if isinstance(sio.manager, StickyRoutingMixin):
+    sio.manager.turn_handler = _enqueue
 
 
 @sio.event(namespace="/conversations")
+@timed("socket.start_conversation")
 async def start_conversation(sid, data):
     content = data["content"]
 
-    conversation_id, ai_message = await converstaion_interface.process_user_message(
-        conversation_id=None, content=content
-    )
+    # no conversation row for a turn the queue would refuse: the client resends
+    # without an id; a turn routed to another worker is checked there
+    conversation_id = new_id()
+    if _is_local(conversation_id) and not turn_queue.has_room():
+        await _busy(sid, {"content": content})
+        return
+
+    # create the conversation up front so the client is in the room before
+    # any streamed chunks are emitted
+    await converstaion_interface.create_conversation(conversation_id=conversation_id)
 
     await sio.emit(
         "conversation_started",
-        {"conversation_id": str(conversation_id)},
+        {"conversation_id": conversation_id},
         to=sid,
         namespace="/conversations",
     )
 
-    await sio.enter_room(sid, str(conversation_id), namespace="/conversations")
+    await sio.enter_room(sid, conversation_id, namespace="/conversations")
 
-    await sio.emit(
-        "new_message",
-        {"conversation_id": str(conversation_id), "content": ai_message},
-        room=str(conversation_id),
-        namespace="/conversations",
-    )
+    await _enqueue(sid, conversation_id, content)
 
 
 @sio.event(namespace="/conversations")
+@timed("socket.send_message")
 async def send_message(sid, data):
     conversation_id = data.get("conversation_id")
-    content = data["content"]
-
-    conversation_id, ai_message = await converstaion_interface.process_user_message(
-        conversation_id=conversation_id, content=content
-    )
+    if not conversation_id:
+        return await start_conversation(sid, data)
 
-    await sio.emit(
-        "new_message",
-        {"conversation_id": str(conversation_id), "content": ai_message},
-        room=str(conversation_id),
-        namespace="/conversations",
-    )
+    conversation_id = str(conversation_id)
+    # (re)join the room so a client that reconnected to another worker still
+    # gets the reply
+    await sio.enter_room(sid, conversation_id, namespace="/conversations")
+    await _enqueue(sid, conversation_id, data["content"])
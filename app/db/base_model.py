@@ -3,12 +3,17 @@ import datetime
 from nanoid import generate
 from sqlalchemy import Column, DateTime, String
 from .database import Base
+from .serialization import serializer
+
+
+def new_id() -> str:
+    return generate(size=12)
 
 
 class BaseModel(Base):
     __abstract__ = True
 
-    id = Column(String(length=12), primary_key=True, default=lambda: generate(size=12))
+    id = Column(String(length=12), primary_key=True, default=new_id)
     created_at = Column(
         DateTime(timezone=True),
         default=lambda: datetime.datetime.now(datetime.timezone.utc),
@@ -19,8 +24,11 @@ class BaseModel(Base):
         onupdate=lambda: datetime.datetime.now(datetime.timezone.utc),
     )
 
+    def __init__(self, **kwargs):
+        # ids are client-side, so assign one now rather than at flush: new
+        # objects can be referenced before anything is written
+        kwargs.setdefault("id", new_id())
+        super().__init__(**kwargs)
+
     def as_dict(self):
-        dict_ = {}
-        for key in self.__mapper__.c.keys():
-            dict_[key] = getattr(self, key)
-        return dict_
+        return serializer(type(self))(self)
@@ -0,0 +1,128 @@
+# app/db/bulk.py
+import asyncio
+import functools
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import Table, insert
+
+from app.db.utils import session_scope
+
+# Rows are generated in blocks of SEED_BLOCK consecutive indices, each from its
+# own RNG seeded with (seed, block): the same seed gives the same rows whatever
+# the chunk size, start offset or number of worker processes.
+SEED_BLOCK = 1000
+
+# make_block(seed, block, lo, hi, **params) -> {table name: rows} for the
+# indices of `block` within [lo, hi); it must be a module-level function so
+# worker processes can unpickle it, and agree with bulk_seed's block_size
+BlockFactory = Callable[..., Dict[str, List[dict]]]
+
+
+@dataclass
+class SeedReport:
+    rows: Dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return sum(self.rows.values())
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        counts = ", ".join(f"{n} {table}" for table, n in self.rows.items())
+        return f"{counts} in {self.seconds:.1f} s ({self.rows_per_second:,.0f} rows/s)"
+
+
+def block_rng(name: str, seed: int, block: int) -> random.Random:
+    """The RNG for one block of rows of a generator called `name`."""
+    return random.Random(f"{name}:{seed}:{block}")
+
+
+def _blocks(lo: int, hi: int, block_size: int) -> Iterator[int]:
+    return iter(range(lo // block_size, (hi + block_size - 1) // block_size))
+
+
+def _generate_chunk(
+    make_block: BlockFactory, blocks: Sequence[int], lo: int, hi: int
+) -> Dict[str, List[dict]]:
+    chunk: Dict[str, List[dict]] = {}
+    for block in blocks:
+        for table, rows in make_block(block=block, lo=lo, hi=hi).items():
+            chunk.setdefault(table, []).extend(rows)
+    return chunk
+
+
+def _chunks(lo: int, hi: int, chunk_size: int, block_size: int) -> Iterator[Tuple]:
+    blocks_per_chunk = max(1, chunk_size // block_size)
+    pending = []
+    for block in _blocks(lo, hi, block_size):
+        pending.append(block)
+        if len(pending) == blocks_per_chunk:
+            yield tuple(pending)
+            pending = []
+    if pending:
+        yield tuple(pending)
+
+
+async def _insert_chunk(tables: Sequence[Table], chunk: Dict[str, List[dict]]):
+    async with session_scope() as db:
+        # Core executemany, parents before children, one transaction per chunk
+        for table in tables:
+            rows = chunk.get(table.name)
+            if rows:
+                await db.execute(insert(table), rows)
+        await db.commit()
+
+
+async def bulk_seed(
+    make_block: BlockFactory,
+    tables: Sequence[Table],
+    lo: int,
+    hi: int,
+    seed: int = 0,
+    chunk_size: int = 10_000,
+    workers: int = 0,
+    block_size: int = SEED_BLOCK,
+    **params,
+) -> SeedReport:
+    """
+    Generate rows for indices [lo, hi) with make_block and insert them chunk by
+    chunk with Core insert() executemany. Generation streams: at most a few
+    chunks are held in memory. With workers > 0, chunks are generated in that
+    many processes while the previous ones are inserted.
+    """
+    factory = functools.partial(make_block, seed=seed, **params)
+    report = SeedReport(rows={table.name: 0 for table in tables})
+    started = time.perf_counter()
+
+    async def store(chunk):
+        await _insert_chunk(tables, chunk)
+        for table, rows in chunk.items():
+            report.rows[table] = report.rows.get(table, 0) + len(rows)
+
+    chunks = _chunks(lo, hi, chunk_size, block_size)
+    if not workers:
+        for blocks in chunks:
+            await store(_generate_chunk(factory, blocks, lo, hi))
+    else:
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(workers) as pool:
+            in_flight = []
+            for blocks in chunks:
+                in_flight.append(
+                    loop.run_in_executor(pool, _generate_chunk, factory, blocks, lo, hi)
+                )
+                if len(in_flight) > workers * 2:
+                    await store(await in_flight.pop(0))
+            for future in in_flight:
+                await store(await future)
+
+    report.seconds = time.perf_counter() - started
+    return report
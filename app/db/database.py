@@ -1,9 +1,54 @@
 # app/db/database.py
+from typing import Optional
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app import config
 
-engine = create_async_engine(config.SQLALCHEMY_DATABASE_URL, echo=True)
+
+def _sqlite_pragma_listener(pragmas: dict):
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return apply_pragmas
+
+
+def build_engine(
+    url: str = config.SQLALCHEMY_DATABASE_URL,
+    echo: bool = config.DB_ECHO,
+    sqlite_pragmas: Optional[dict] = None,
+    **engine_kwargs,
+):
+    """
+    Create the async engine from app.config. Pool settings apply to file-backed
+    SQLite and server databases; SQLite connections also get the configured PRAGMAs.
+    """
+    is_sqlite = url.startswith("sqlite")
+    if not (is_sqlite and ":memory:" in url):
+        engine_kwargs.setdefault("pool_size", config.DB_POOL_SIZE)
+        engine_kwargs.setdefault("max_overflow", config.DB_MAX_OVERFLOW)
+        engine_kwargs.setdefault("pool_timeout", config.DB_POOL_TIMEOUT)
+    if not is_sqlite:
+        engine_kwargs.setdefault("pool_recycle", config.DB_POOL_RECYCLE)
+        engine_kwargs.setdefault("pool_pre_ping", True)
+
+    new_engine = create_async_engine(url, echo=echo, **engine_kwargs)
+
+    if is_sqlite:
+        pragmas = config.SQLITE_PRAGMAS if sqlite_pragmas is None else sqlite_pragmas
+        if pragmas:
+            event.listen(
+                new_engine.sync_engine, "connect", _sqlite_pragma_listener(pragmas)
+            )
+
+    return new_engine
+
+
+engine = build_engine()
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -0,0 +1,143 @@
+# app/db/pagination.py
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import AsyncIterator, Generic, List, Optional, Sequence, TypeVar
+
+from sqlalchemy import Select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.db.database import AsyncSessionLocal
+from app.db.utils import current_session
+
+T = TypeVar("T")
+
+# Page size when a caller doesn't pick one, and the most one page may hold
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Rows per fetch when streaming
+DEFAULT_BATCH_SIZE = 1000
+
+
+@dataclass
+class Page(Generic[T]):
+    items: List[T]
+    # pass back as `cursor` for the next page; None on the last one
+    next_cursor: Optional[str] = None
+
+
+def project(
+    model, columns: Optional[Sequence[str]], keys: Sequence[ColumnElement] = ()
+) -> list:
+    """
+    Loader options that fetch only `columns`, the primary key and the keyset
+    `keys` of `model`. Touching any other column raises instead of
+    lazy-loading it, which an AsyncSession can't do anyway.
+    """
+    if not columns:
+        return []
+    names = dict.fromkeys([*columns, *(key.key for key in keys)])
+    return [load_only(*(getattr(model, name) for name in names), raiseload=True)]
+
+
+def _encode(values: Sequence) -> str:
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str, keys: Sequence[ColumnElement]) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError
+        decoded = []
+        for key, value in zip(keys, values):
+            python_type = key.type.python_type
+            if value is not None and python_type in (date, datetime):
+                value = python_type.fromisoformat(value)
+            decoded.append(value)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid page cursor.") from None
+    return decoded
+
+
+def _after(keys: Sequence[ColumnElement], values: Sequence, descending: bool):
+    """Rows strictly after `values` in (keys...) order, as an OR of prefixes."""
+    clauses = []
+    for i, key in enumerate(keys):
+        prefix = [keys[j] == values[j] for j in range(i)]
+        step = key < values[i] if descending else key > values[i]
+        clauses.append(and_(*prefix, step))
+    return or_(*clauses)
+
+
+def keyset(
+    query: Select,
+    keys: Sequence[ColumnElement],
+    cursor: Optional[str] = None,
+    descending: bool = False,
+) -> Select:
+    """
+    Order `query` by `keys` (the last one unique, e.g. the primary key) and,
+    given a cursor from a previous page, start right after its last row.
+    """
+    if cursor:
+        query = query.where(_after(keys, _decode(cursor, keys), descending))
+    return query.order_by(*(k.desc() if descending else k.asc() for k in keys))
+
+
+async def fetch_page(
+    db: AsyncSession,
+    query: Select,
+    keys: Sequence[ColumnElement],
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+) -> Page:
+    """
+    One page of `query`'s entities in keyset order. Reads limit + 1 rows to
+    know whether another page follows, so no COUNT or OFFSET is needed.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    result = await db.execute(keyset(query, keys, cursor, descending).limit(limit + 1))
+    items = list(result.scalars())
+    if len(items) <= limit:
+        return Page(items)
+    items = items[:limit]
+    last = items[-1]
+    return Page(items, _encode([getattr(last, key.key) for key in keys]))
+
+
+async def stream_scalars(
+    query: Select,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    db: Optional[AsyncSession] = None,
+) -> AsyncIterator:
+    """
+    Yield `query`'s entities from a server-side cursor, batch_size rows at a
+    time, so memory stays flat however many rows match. Uses `db`, else the
+    ambient session, else a session held open until the iteration ends.
+    """
+    db = db or current_session()
+    if db is None:
+        # not made ambient: a generator may be closed from another context
+        async with AsyncSessionLocal() as db:
+            async for item in stream_scalars(query, batch_size, db):
+                yield item
+        return
+
+    result = await db.stream_scalars(query.execution_options(yield_per=batch_size))
+    try:
+        # a partition per fetch: iterating rows one by one costs a greenlet
+        # switch each
+        async for partition in result.partitions():
+            for item in partition:
+                yield item
+    finally:
+        await result.close()
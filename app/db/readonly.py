@@ -0,0 +1,32 @@
+# app/db/readonly.py
+from typing import List, NamedTuple, Optional, Type, TypeVar
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+R = TypeVar("R", bound=NamedTuple)
+
+
+def select_as(row_type: Type[R], model) -> Select:
+    """A Core select of the `model` columns named by row_type's fields, in that order."""
+    return select(*(getattr(model, name) for name in row_type._fields))
+
+
+async def fetch_as(db: AsyncSession, query: Select, row_type: Type[R]) -> List[R]:
+    """
+    Run a select_as() query into row_type tuples: no ORM objects, identity
+    map, relationship loaders or change tracking, just the selected columns.
+    For read-only paths; the results can't be modified or flushed.
+
+    Runs on the session's connection, inside its transaction, but past the
+    ORM execution layer: pending changes are not autoflushed first.
+    """
+    result = await (await db.connection()).execute(query)
+    return list(map(row_type._make, result))
+
+
+async def fetch_one_as(
+    db: AsyncSession, query: Select, row_type: Type[R]
+) -> Optional[R]:
+    row = (await (await db.connection()).execute(query.limit(1))).first()
+    return None if row is None else row_type._make(row)
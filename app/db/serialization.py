@@ -0,0 +1,37 @@
+# app/db/serialization.py
+from operator import attrgetter
+from typing import Any, Callable, Dict
+
+_serializers: Dict[type, Callable[[Any], dict]] = {}
+
+
+def serializer(model: type) -> Callable[[Any], dict]:
+    """
+    obj -> {column attribute: value} for instances of `model`, built once per
+    mapped class. Values are left as Python objects (datetimes, enums...);
+    app.json_codec encodes them.
+    """
+    to_dict = _serializers.get(model)
+    if to_dict is not None:
+        return to_dict
+
+    keys = tuple(model.__mapper__.c.keys())
+    get = attrgetter(*keys)
+
+    def to_dict(obj) -> dict:
+        # loaded columns sit in the instance dict; reading them there skips
+        # the attribute instrumentation
+        state = obj.__dict__
+        try:
+            return {key: state[key] for key in keys}
+        except KeyError:
+            # expired or deferred columns: let the attributes load or raise
+            values = get(obj)
+            return dict(zip(keys, values if len(keys) > 1 else (values,)))
+
+    _serializers[model] = to_dict
+    return to_dict
+
+
+def to_dict(obj) -> dict:
+    return serializer(type(obj))(obj)
@@ -1,30 +1,190 @@
 # app/db/utils.py
 import inspect
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from functools import wraps
-from app.db.database import get_db
+from typing import Callable, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import AsyncSessionLocal
+from app.metrics import time_stage
+
+# Session of the innermost with_db call / session_scope in the current task
+_ambient_session: ContextVar[Optional[AsyncSession]] = ContextVar(
+    "ambient_db_session", default=None
+)
+
+# Session running a unit_of_work() in the current task
+_unit_of_work: ContextVar[Optional[AsyncSession]] = ContextVar(
+    "unit_of_work", default=None
+)
+
+# Active count_queries() counter in the current task (and tasks it spawns)
+_query_counter: ContextVar[Optional["QueryCounter"]] = ContextVar(
+    "query_counter", default=None
+)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.count += 1
+        counter.statements.append(statement)
+
+
+@contextmanager
+def count_queries():
+    """Count SQL statements executed on any engine inside the block."""
+    counter = QueryCounter()
+    token = _query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_counter.reset(token)
+
+
+def current_session() -> Optional[AsyncSession]:
+    return _ambient_session.get()
+
+
+@asynccontextmanager
+async def session_scope():
+    """Open a session, make it ambient for nested with_db calls, and close it on exit."""
+    async with AsyncSessionLocal() as session:
+        token = _ambient_session.set(session)
+        try:
+            yield session
+        finally:
+            _ambient_session.reset(token)
+
+
+@asynccontextmanager
+async def unit_of_work(db: AsyncSession):
+    """
+    Stage the block's writes on `db` and commit them together when it exits
+    (roll back if it raises). commit(db) calls inside only stage, and autoflush
+    is off, so nothing is written (and on SQLite no write lock is held) until
+    then. A booking takes the write lock for its conflict check and flushes
+    its row; both are held until the block commits.
+    """
+    token = _unit_of_work.set(db)
+    autoflush = db.sync_session.autoflush
+    db.sync_session.autoflush = False
+    try:
+        yield db
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    finally:
+        db.sync_session.autoflush = autoflush
+        _unit_of_work.reset(token)
+
+
+def in_unit_of_work(db: AsyncSession) -> bool:
+    return db is not None and _unit_of_work.get() is db
+
+
+async def commit(db: AsyncSession) -> None:
+    """Commit db, or leave it to the enclosing unit_of_work() if there is one."""
+    if not in_unit_of_work(db):
+        await db.commit()
+
+
+def after_commit(db: AsyncSession, callback: Callable[[], None]) -> None:
+    """
+    Run `callback` once db's writes are committed: now, or when the enclosing
+    unit_of_work() commits.
+    """
+    if in_unit_of_work(db):
+        event.listen(
+            db.sync_session, "after_commit", lambda session: callback(), once=True
+        )
+    else:
+        callback()
 
 
 def with_db(func):
-    """Decorator to automatically inject a DB session if not provided."""
+    """
+    Decorator to automatically inject a DB session if not provided.
+
+    An explicit `db` becomes the ambient session for nested calls; without one,
+    the ambient session is reused, or a new one is opened and closed afterwards.
+    Each call is timed as the `<domain>.<function>` metrics stage.
+    """
+    params = list(inspect.signature(func).parameters)
+
+    # Only apply if the function has a 'db' argument
+    if "db" not in params:
+        return func
+    db_index = params.index("db")
+    # app.conversations.interface.create_message -> conversations.create_message
+    domain = func.__module__.removesuffix(".interface").rpartition(".")[2]
+    stage = f"{domain}.{func.__name__}"
 
     @wraps(func)
     async def wrapper(*args, **kwargs):
-        sig = inspect.signature(func)
-        params = sig.parameters
+        with time_stage(stage):
+            return await _call(args, kwargs)
 
-        # Only apply if the function has a 'db' argument
-        if "db" not in params:
-            return await func(*args, **kwargs)
+    async def _call(args, kwargs):
+        db = args[db_index] if len(args) > db_index else kwargs.get("db")
 
-        db = kwargs.get("db", None)
+        if db is not None:
+            token = _ambient_session.set(db)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _ambient_session.reset(token)
 
-        # If a db session was not provided, open a new one
-        if db is None:
-            gen = get_db()
-            db = await anext(gen)
+        db = _ambient_session.get()
+        if db is not None:
             kwargs["db"] = db
+            return await func(*args, **kwargs)
 
-        # Run the wrapped function
-        return await func(*args, **kwargs)
+        # No session anywhere up the call chain: own one for this call only
+        async with session_scope() as db:
+            kwargs["db"] = db
+            return await func(*args, **kwargs)
 
     return wrapper
+
+
+async def acquire_write_lock(db: AsyncSession, key: str) -> None:
+    """
+    Serialize a read-check-write sequence (e.g. a slot conflict check followed by
+    an insert) across sessions and processes until the transaction ends.
+
+    SQLite: upgrade to the database write lock with BEGIN IMMEDIATE.
+    PostgreSQL: take a transaction-scoped advisory lock on `key`.
+    """
+    conn = await db.connection()
+    if conn.dialect.name == "sqlite":
+        raw = await conn.get_raw_connection()
+        # pysqlite only opens a transaction on the first write, and that write
+        # already holds the lock, so only issue BEGIN when none is open yet
+        if not raw.driver_connection.in_transaction:
+            await conn.exec_driver_sql("BEGIN IMMEDIATE")
+    elif conn.dialect.name == "postgresql":
+        await conn.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": key}
+        )
+
+
+async def release_write_lock(db: AsyncSession) -> None:
+    """
+    End the transaction acquire_write_lock() started when nothing was written.
+    Inside a unit of work the lock is kept until the turn commits: ending the
+    transaction early would commit or discard what the turn has staged.
+    """
+    if not in_unit_of_work(db):
+        await db.rollback()
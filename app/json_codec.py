@@ -0,0 +1,85 @@
+# app/json_codec.py
+"""
+One JSON encoder for everything the app sends: Socket.IO packets (passed as
+the server's `json` module), the Socket.IO message queue and FastAPI
+responses, built on orjson.
+
+Datetimes and dates become ISO 8601 strings (aware ones keep their offset),
+enums their value.
+"""
+
+import enum
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+import orjson
+from fastapi.responses import JSONResponse as _JSONResponse
+
+
+def _default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=_default)
+
+
+def _fallback(default: Optional[Callable]) -> Callable:
+    if default is None:
+        return _default
+
+    def chained(value):
+        try:
+            return _default(value)
+        except TypeError:
+            return default(value)
+
+    return chained
+
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def dumps_bytes(obj: Any, default: Optional[Callable] = None) -> bytes:
+    try:
+        return orjson.dumps(obj, default=_fallback(default), option=_OPTIONS)
+    except orjson.JSONEncodeError as exc:
+        # e.g. an int over 64 bits: the stdlib encoder has no such limits
+        if isinstance(exc.__cause__, TypeError):
+            raise exc.__cause__ from None
+        return _dumps_stdlib(obj, default).encode()
+
+
+def loads(s, **kwargs) -> Any:
+    return orjson.loads(s)
+
+
+def _dumps_stdlib(obj: Any, default: Optional[Callable]) -> str:
+    if default is None:
+        return _encoder.encode(obj)
+    return json.dumps(
+        obj, separators=(",", ":"), ensure_ascii=False, default=_fallback(default)
+    )
+
+
+def dumps(obj: Any, default: Optional[Callable] = None, **kwargs) -> str:
+    """
+    json.dumps stand-in. Other keyword arguments (separators, indent...) are
+    accepted and ignored: the output is always compact.
+    """
+    return dumps_bytes(obj, default).decode()
+
+
+class JSONResponse(_JSONResponse):
+    """FastAPI's JSONResponse, rendered with this module's encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
@@ -0,0 +1,235 @@
+# app/metrics.py
+import asyncio
+import functools
+import json
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence
+
+from app import config
+
+# seconds; le="+Inf" is implied
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)  # fmt: skip
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC_NAME = "chat_stage_duration_seconds"
+COUNTER_NAME = "chat_events_total"
+
+
+class AgentRunTiming:
+    """Tool calls made, and time spent in them, during one agent run."""
+
+    __slots__ = ("tool_calls", "tool_seconds")
+
+    def __init__(self):
+        self.tool_calls = 0
+        self.tool_seconds = 0.0
+
+
+# the agent run in progress, if any (see time_agent_run)
+_agent_run: ContextVar[Optional[AgentRunTiming]] = ContextVar("agent_run", default=None)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; quantiles are interpolated within buckets."""
+
+    __slots__ = ("bounds", "count", "counts", "sum")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.bounds[i - 1] if i else 0.0
+                if i == len(self.bounds):
+                    return lower  # beyond the last bound
+                upper = self.bounds[i]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+
+class MetricsRegistry:
+    def __init__(
+        self, enabled: bool = True, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+
+    def observe(self, stage: str, seconds: float):
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def increment(self, event: str, amount: int = 1):
+        if self.enabled:
+            self.counters[event] = self.counters.get(event, 0) + amount
+
+    def reset(self):
+        self.histograms.clear()
+        self.counters.clear()
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            stage: {
+                "count": h.count,
+                "sum": h.sum,
+                **{f"p{int(q * 100)}": h.quantile(q) for q in QUANTILES},
+            }
+            for stage, h in sorted(self.histograms.items())
+        }
+
+    def render_prometheus(self) -> str:
+        """
+        Prometheus text exposition: one histogram plus p50/p95/p99 gauges, and
+        one counter for events such as cache hits.
+        """
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent in each stage of a chat turn.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        for stage, h in sorted(self.histograms.items()):
+            cumulative = 0
+            bounds = [repr(bound) for bound in h.bounds] + ["+Inf"]
+            for bound, bucket_count in zip(bounds, h.counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'{METRIC_NAME}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {h.sum}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {h.count}')
+
+        lines += [
+            f"# HELP {METRIC_NAME}_quantile Estimated latency quantiles per stage.",
+            f"# TYPE {METRIC_NAME}_quantile gauge",
+        ]
+        for stage, h in sorted(self.histograms.items()):
+            for q in QUANTILES:
+                lines.append(
+                    f'{METRIC_NAME}_quantile{{stage="{stage}",quantile="{q}"}} '
+                    f"{h.quantile(q)}"
+                )
+
+        if self.counters:
+            lines += [
+                f"# HELP {COUNTER_NAME} Chat events, e.g. response cache hits.",
+                f"# TYPE {COUNTER_NAME} counter",
+            ]
+            for event, value in sorted(self.counters.items()):
+                lines.append(f'{COUNTER_NAME}{{event="{event}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        """Write the current p50/p95/p99 snapshot to `path` as JSON."""
+        _write_snapshot(path, self.snapshot(), dict(self.counters))
+
+
+def _write_snapshot(path: str, snapshot: Dict[str, dict], counters: Dict[str, int]):
+    with open(path, "w") as f:
+        json.dump(
+            {"generated_at": time.time(), "stages": snapshot, "counters": counters},
+            f,
+            indent=2,
+        )
+
+
+registry = MetricsRegistry(enabled=config.METRICS_ENABLED)
+
+
+@contextmanager
+def time_stage(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(stage, time.perf_counter() - started)
+
+
+def timed(stage: str):
+    """Record each call of an async function under `stage`."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                registry.observe(stage, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+def timed_tool(func):
+    """
+    Record an agent tool as `tool.<name>`; its time is left out of the
+    surrounding run's `agent.model` stage.
+    """
+    stage = f"tool.{func.__name__}"
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            registry.observe(stage, elapsed)
+            run = _agent_run.get()
+            if run is not None:
+                run.tool_calls += 1
+                run.tool_seconds += elapsed
+
+    return wrapper
+
+
+@contextmanager
+def time_agent_run():
+    """
+    Time an agent run as `agent.run`, and the part of it not spent in tools
+    (model requests, mostly) as `agent.model`. Yields the run's AgentRunTiming.
+    """
+    run = AgentRunTiming()
+    token = _agent_run.set(run)
+    started = time.perf_counter()
+    try:
+        yield run
+    finally:
+        elapsed = time.perf_counter() - started
+        _agent_run.reset(token)
+        registry.observe("agent.run", elapsed)
+        registry.observe("agent.model", elapsed - run.tool_seconds)
+
+
+async def dump_periodically(path: str, interval: float):
+    """Background task: rewrite the metrics file every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        # snapshot on the loop, write the file off it
+        await asyncio.to_thread(
+            _write_snapshot, path, registry.snapshot(), dict(registry.counters)
+        )
@@ -1,13 +1,21 @@
 import asyncio
+import functools
+from datetime import date, datetime, timezone
 from random import randint
 from faker import Faker
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.patient_info.models import Patient
+from app.db.bulk import SEED_BLOCK, SeedReport, block_rng, bulk_seed
 from app.db.database import AsyncSessionLocal  # ✅ use the session factory directly
 
 fake = Faker()
 
+# bulk-seeded patient n has id "pat<n:09d>" and phone +91<5000000000 + n>,
+# below the 6000000000+ range create_patients draws from
+BULK_PHONE_BASE = 5_000_000_000
+_DOB_RANGE = (date(1945, 1, 1).toordinal(), date(2007, 12, 31).toordinal())
+
 
 async def create_patients(count: int, db: AsyncSession = None):
     """Create a given number of fake patient records."""
@@ -37,6 +45,75 @@ async def _create_patients(count: int, db: AsyncSession):
     return patients
 
 
+# ----------------------------
+# Bulk seeding
+# ----------------------------
+
+
+def bulk_patient_id(n: int) -> str:
+    return f"pat{n:09d}"
+
+
+def bulk_phone_number(n: int) -> str:
+    return f"+91{BULK_PHONE_BASE + n}"
+
+
+@functools.cache
+def _name_pools():
+    """Faker names and insurers, drawn once per process with a fixed seed."""
+    pool = Faker()
+    pool.seed_instance(0)
+    return (
+        [pool.first_name() for _ in range(1000)],
+        [pool.last_name() for _ in range(1000)],
+        [pool.company() for _ in range(200)],
+    )
+
+
+def patient_block(seed: int, block: int, lo: int, hi: int) -> dict:
+    """Patient rows for indices [block * SEED_BLOCK, ...) that fall in [lo, hi)."""
+    rng = block_rng("patients", seed, block)
+    first_names, last_names, insurers = _name_pools()
+    now = datetime.now(timezone.utc)
+    rows = []
+    for n in range(block * SEED_BLOCK, min((block + 1) * SEED_BLOCK, hi)):
+        full_name = f"{rng.choice(first_names)} {rng.choice(last_names)}"
+        date_of_birth = date.fromordinal(rng.randint(*_DOB_RANGE))
+        insurance_name = rng.choice(insurers) if rng.random() < 0.5 else None
+        if n >= lo:
+            rows.append(
+                {
+                    "id": bulk_patient_id(n),
+                    "full_name": full_name,
+                    "phone_number": bulk_phone_number(n),
+                    "date_of_birth": date_of_birth,
+                    "insurance_name": insurance_name,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+    return {"patients": rows}
+
+
+async def seed_patients(
+    count: int,
+    start: int = 0,
+    seed: int = 0,
+    chunk_size: int = 10_000,
+    workers: int = 0,
+) -> SeedReport:
+    """Bulk-insert patients start .. start + count - 1 (see patient_block)."""
+    return await bulk_seed(
+        patient_block,
+        [Patient.__table__],
+        start,
+        start + count,
+        seed=seed,
+        chunk_size=chunk_size,
+        workers=workers,
+    )
+
+
 if __name__ == "__main__":
     import argparse
 
@@ -47,6 +124,25 @@ if __name__ == "__main__":
         default=10,
         help="Number of fake patients to create (default: 10)",
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Use the chunked Core-insert pipeline (for large counts)",
+    )
+    parser.add_argument("--start", type=int, default=0, help="First bulk index")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument(
+        "--workers", type=int, default=0, help="Generator processes (0 = inline)"
+    )
     args = parser.parse_args()
 
-    asyncio.run(create_patients(args.count))
+    if args.bulk:
+        report = asyncio.run(
+            seed_patients(
+                args.count, args.start, args.seed, args.chunk_size, args.workers
+            )
+        )
+        print(f"✅ Seeded {report}")
+    else:
+        asyncio.run(create_patients(args.count))
@@ -1,9 +1,36 @@
 # app/patient_info/interface.py
+from typing import AsyncIterator, Optional, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from datetime import date
-from app.db.utils import with_db
-from app.patient_info.models import Patient
+from app.db.pagination import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_PAGE_SIZE,
+    Page,
+    fetch_page,
+    project,
+    stream_scalars,
+)
+from app.db.readonly import fetch_one_as, select_as
+from app.db.base_model import new_id
+from app.db.utils import commit, with_db
+from app.patient_info.models import Patient, PatientRow
+
+
+def normalize_phone(phone_number: str) -> str:
+    """
+    The stored form of a phone number: its digits, after a "+" if it had
+    one. "+1 (555) 000-1234" -> "+15550001234".
+    """
+    digits = "".join(c for c in phone_number if c.isdigit())
+    return f"+{digits}" if phone_number.strip().startswith("+") else digits
+
+
+def _matches_phone(phone_number: str):
+    # compare digits with digits, whether or not either side had the "+";
+    # an IN on the exact stored forms keeps the unique index usable
+    digits = normalize_phone(phone_number).lstrip("+")
+    return Patient.phone_number.in_((digits, f"+{digits}"))
 
 
 @with_db
@@ -14,40 +41,78 @@ async def add_patient(
     insurance_name: str | None = None,
     db: AsyncSession = None,
 ):
+    # the id is set here rather than on flush: inside a turn's unit of work
+    # the row is only written when the turn commits
     new_patient = Patient(
+        id=new_id(),
         full_name=full_name,
-        phone_number=phone_number,
+        phone_number=normalize_phone(phone_number),
         date_of_birth=date_of_birth,
         insurance_name=insurance_name,
     )
     db.add(new_patient)
-    await db.commit()
-    await db.refresh(new_patient)
+    await commit(db)
     return new_patient
 
 
 @with_db
-async def get_patient_by_id(patient_id: int, db: AsyncSession = None):
+async def get_patient_by_id(patient_id: str, db: AsyncSession = None):
     result = await db.execute(select(Patient).where(Patient.id == patient_id))
     return result.scalars().first()
 
 
 @with_db
 async def get_patient_by_phone(phone_number: str, db: AsyncSession = None):
-    result = await db.execute(
-        select(Patient).where(Patient.phone_number == phone_number)
-    )
+    result = await db.execute(select(Patient).where(_matches_phone(phone_number)))
     return result.scalars().first()
 
 
 @with_db
-async def list_patients(db: AsyncSession = None):
-    result = await db.execute(select(Patient))
+async def get_patient_row_by_phone(
+    phone_number: str, db: AsyncSession = None
+) -> Optional[PatientRow]:
+    """get_patient_by_phone as a read-only PatientRow tuple."""
+    query = select_as(PatientRow, Patient).where(_matches_phone(phone_number))
+    return await fetch_one_as(db, query, PatientRow)
+
+
+@with_db
+async def list_patients(
+    columns: Optional[Sequence[str]] = None, db: AsyncSession = None
+):
+    """Every patient at once; use list_patients_page or stream_patients on big tables."""
+    result = await db.execute(select(Patient).options(*project(Patient, columns)))
     return result.scalars().all()
 
 
 @with_db
-async def delete_patient(patient_id: int, db: AsyncSession = None):
+async def list_patients_page(
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    columns: Optional[Sequence[str]] = None,
+    db: AsyncSession = None,
+) -> Page[Patient]:
+    """
+    Patients in id order, one keyset page at a time. `columns` loads only
+    those (plus the id), e.g. ["full_name", "phone_number"].
+    """
+    keys = (Patient.id,)
+    query = select(Patient).options(*project(Patient, columns, keys))
+    return await fetch_page(db, query, keys, cursor, limit)
+
+
+def stream_patients(
+    columns: Optional[Sequence[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    db: AsyncSession = None,
+) -> AsyncIterator[Patient]:
+    """Every patient in id order, fetched batch_size at a time."""
+    query = select(Patient).options(*project(Patient, columns)).order_by(Patient.id)
+    return stream_scalars(query, batch_size, db)
+
+
+@with_db
+async def delete_patient(patient_id: str, db: AsyncSession = None):
     result = await db.execute(select(Patient).where(Patient.id == patient_id))
     patient = result.scalars().first()
     if patient:
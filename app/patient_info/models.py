@@ -1,4 +1,7 @@
 # app/patient_info/models.py
+from datetime import date
+from typing import NamedTuple, Optional
+
 from sqlalchemy import Column, String, Date
 from app.db.base_model import BaseModel
 
@@ -10,3 +13,13 @@ class Patient(BaseModel):
     phone_number = Column(String(15), nullable=False, unique=True)
     date_of_birth = Column(Date, nullable=False)
     insurance_name = Column(String(100), nullable=True)
+
+
+class PatientRow(NamedTuple):
+    """Read-only patient fields, selected with Core (app.db.readonly)."""
+
+    id: str
+    full_name: str
+    phone_number: str
+    date_of_birth: date
+    insurance_name: Optional[str]
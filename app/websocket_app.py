@@ -1,23 +1,102 @@
 # websocket_app.py
+import asyncio
+import logging
+from datetime import date
+
 import socketio
 
-# Create global Socket.IO server
+from app import config, json_codec
+from app.appointments.cache import AvailabilityCache, availability_cache
+from app.websocket_manager import (
+    StickyRoutingMixin,
+    build_client_manager,
+    claim_worker_id,
+)
+
+# Create global Socket.IO server; with a message queue configured, rooms and
+# emits are shared between all workers
 sio = socketio.AsyncServer(
     async_mode="asgi",
     cors_allowed_origins="*",
-    logger=True,
-    engineio_logger=True,
+    # packets are encoded with orjson when it is installed
+    json=json_codec,
+    client_manager=build_client_manager(
+        config.SOCKETIO_MESSAGE_QUEUE,
+        channel=config.SOCKETIO_CHANNEL,
+        worker_count=config.WORKER_COUNT,
+    ),
+    # named loggers, so levels and sampling come from app/logging_config.py
+    logger=logging.getLogger("socketio.server"),
+    engineio_logger=logging.getLogger("engineio.server"),
 )
 
+logger = logging.getLogger(__name__)
+
 
 @sio.event
 async def connect(sid, environ):
-    print(f"Client connected: {sid}")
+    logger.info("Client connected", extra={"sid": sid})
 
 
 @sio.event
 async def disconnect(sid):
-    print(f"Client disconnected: {sid}")
+    logger.info("Client disconnected", extra={"sid": sid})
+
+
+AVAILABILITY_CACHE = "availability"
+
+# broadcasts in flight, referenced until they finish
+_broadcasts = set()
+
+
+def share_invalidations(manager: StickyRoutingMixin, cache: AvailabilityCache):
+    """
+    Send the cache's invalidations to the other workers over the message
+    queue, and apply theirs: a booking on one worker drops the slots every
+    worker cached for that day.
+    """
+
+    async def broadcast(dates):
+        try:
+            await manager.broadcast_invalidation(
+                AVAILABILITY_CACHE, [d.isoformat() for d in dates]
+            )
+        except Exception:
+            logger.exception("Availability invalidation not broadcast")
+
+    def publish(dates):
+        task = asyncio.get_running_loop().create_task(broadcast(dates))
+        _broadcasts.add(task)
+        task.add_done_callback(_broadcasts.discard)
+
+    def receive(name, keys):
+        if name == AVAILABILITY_CACHE:
+            cache.invalidate_local(*(date.fromisoformat(key) for key in keys))
+
+    cache.on_invalidate = publish
+    manager.invalidation_handler = receive
+
+
+def start_client_manager():
+    """
+    With a message queue, claim this process's worker id; then start
+    listening on the queue at startup rather than on the first connection,
+    so a worker without clients still receives routed turns. Without one
+    there is a single worker and nothing to claim.
+    """
+    if not sio.manager_initialized:
+        if isinstance(sio.manager, StickyRoutingMixin):
+            sio.manager.worker_id = claim_worker_id(
+                config.WORKER_COUNT,
+                config.WORKER_ID,
+                namespace=(
+                    f"{config.SQLALCHEMY_DATABASE_URL}|{config.SOCKETIO_MESSAGE_QUEUE}"
+                    f"|{config.SOCKETIO_CHANNEL}"
+                ),
+            )
+            share_invalidations(sio.manager, availability_cache)
+        sio.manager_initialized = True
+        sio.manager.initialize()
 
 
 # ASGI app (mountable in FastAPI)
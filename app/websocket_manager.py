@@ -0,0 +1,284 @@
+# app/websocket_manager.py
+import asyncio
+import functools
+import logging
+import os
+import tempfile
+import time
+import zlib
+from collections import defaultdict
+from typing import Awaitable, Callable, ClassVar, Dict, Optional, Set
+
+import aiosqlite
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+from app import json_codec
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: worker ids are taken on trust there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+TURN_METHOD = "turn"
+INVALIDATE_METHOD = "invalidate"
+
+# lock files of the worker ids this process holds, open until it exits
+_worker_locks = []
+
+
+class MemoryManager(AsyncPubSubManager):
+    """
+    In-process stand-in for a message queue: every manager on the same channel
+    in this process sees each published message. Meant for tests.
+    """
+
+    name = "memory"
+    _subscribers: ClassVar[Dict[str, Set[asyncio.Queue]]] = defaultdict(set)
+
+    async def _publish(self, data):
+        message = json_codec.dumps(data)
+        for queue in self._subscribers[self.channel]:
+            queue.put_nowait(message)
+
+    async def _listen(self):
+        queue = asyncio.Queue()
+        self._subscribers[self.channel].add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers[self.channel].discard(queue)
+
+
+class SQLiteManager(AsyncPubSubManager):
+    """
+    Shares Socket.IO events between processes through a SQLite table that every
+    worker polls. Good enough for tests and several workers on one host; use
+    Redis or RabbitMQ across hosts.
+    """
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path: str,
+        channel: str = "socketio",
+        write_only: bool = False,
+        logger=None,
+        poll_interval: float = 0.02,
+        retention_seconds: float = 60,
+    ):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._conn = None
+        self._connecting = asyncio.Lock()
+        self._published = 0
+
+    async def _connection(self):
+        async with self._connecting:
+            if self._conn is None:
+                conn = await aiosqlite.connect(self.path, isolation_level=None)
+                await conn.execute("PRAGMA journal_mode=WAL")
+                await conn.execute("PRAGMA busy_timeout=5000")
+                await conn.execute(
+                    "CREATE TABLE IF NOT EXISTS socketio_messages ("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                    "channel TEXT NOT NULL, "
+                    "payload TEXT NOT NULL, "
+                    "created_at REAL NOT NULL)"
+                )
+                self._conn = conn
+        return self._conn
+
+    async def _publish(self, data):
+        conn = await self._connection()
+        now = time.time()
+        await conn.execute(
+            "INSERT INTO socketio_messages (channel, payload, created_at) "
+            "VALUES (?, ?, ?)",
+            (self.channel, json_codec.dumps(data), now),
+        )
+        self._published += 1
+        if self._published % 500 == 0:
+            await conn.execute(
+                "DELETE FROM socketio_messages WHERE created_at < ?",
+                (now - self.retention_seconds,),
+            )
+
+    async def _listen(self):
+        conn = await self._connection()
+        async with conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM socketio_messages"
+        ) as cursor:
+            (last_id,) = await cursor.fetchone()
+
+        while True:
+            async with conn.execute(
+                "SELECT id, payload FROM socketio_messages "
+                "WHERE channel = ? AND id > ? ORDER BY id",
+                (self.channel, last_id),
+            ) as cursor:
+                rows = await cursor.fetchall()
+            if not rows:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            for last_id, payload in rows:
+                yield payload
+
+
+class StickyRoutingMixin:
+    """
+    Pins each conversation's agent turns to one worker.
+
+    The owner is `crc32(conversation_id) % worker_count`. Other workers publish
+    the turn on the message queue instead of running it, and the owner hands it
+    to `turn_handler(sid, conversation_id, content)`.
+
+    Also carries cache invalidations between workers: broadcast_invalidation()
+    reaches `invalidation_handler(cache, keys)` on every other worker.
+    """
+
+    worker_id: int = 0
+    worker_count: int = 1
+    turn_handler: Optional[Callable[[str, str, str], Awaitable[None]]] = None
+    invalidation_handler: Optional[Callable[[str, list], None]] = None
+
+    def owner(self, conversation_id: str) -> int:
+        return zlib.crc32(conversation_id.encode()) % self.worker_count
+
+    def is_local(self, conversation_id: str) -> bool:
+        return self.owner(conversation_id) == self.worker_id
+
+    async def route_turn(self, sid: str, conversation_id: str, content: str):
+        await self._publish(
+            {
+                "method": TURN_METHOD,
+                "worker": self.owner(conversation_id),
+                "sid": sid,
+                "conversation_id": conversation_id,
+                "content": content,
+                "host_id": self.host_id,
+            }
+        )
+
+    async def broadcast_invalidation(self, cache: str, keys: list):
+        await self._publish(
+            {
+                "method": INVALIDATE_METHOD,
+                "cache": cache,
+                "keys": keys,
+                "host_id": self.host_id,
+            }
+        )
+
+    async def _listen(self):
+        async for message in super()._listen():
+            data = message
+            if not isinstance(data, dict):
+                try:
+                    data = json_codec.loads(message)
+                except ValueError:
+                    pass
+            if isinstance(data, dict) and data.get("method") == TURN_METHOD:
+                if data.get("worker") == self.worker_id and self.turn_handler:
+                    try:
+                        await self.turn_handler(
+                            data["sid"], data["conversation_id"], data["content"]
+                        )
+                    except Exception:
+                        logger.exception("Routed agent turn failed")
+                continue
+            if isinstance(data, dict) and data.get("method") == INVALIDATE_METHOD:
+                # the publisher hears its own broadcast too
+                if data.get("host_id") != self.host_id and self.invalidation_handler:
+                    try:
+                        self.invalidation_handler(data["cache"], data["keys"])
+                    except Exception:
+                        logger.exception("Cache invalidation failed")
+                continue
+            yield message
+
+
+def claim_worker_id(
+    worker_count: int, worker_id: Optional[int] = None, namespace: str = ""
+) -> int:
+    """
+    Reserve a worker id for this process with an exclusive lock on a file per
+    id, released when the process exits: `worker_id` if given, otherwise the
+    first free one in range(worker_count), so `uvicorn --workers N` processes
+    number themselves. Processes of one deployment pass the same `namespace`.
+
+    Raises RuntimeError if the id is held by another process on this host, or
+    if every id is: two workers with one id would both run its turns.
+    """
+    candidates = [worker_id] if worker_id is not None else range(worker_count)
+    if fcntl is None:
+        return candidates[0]
+    if worker_id is not None and not 0 <= worker_id < worker_count:
+        raise RuntimeError(f"WORKER_ID {worker_id} is outside 0..{worker_count - 1}")
+    prefix = os.path.join(
+        tempfile.gettempdir(), f"dental-chatbot-{zlib.crc32(namespace.encode()):08x}"
+    )
+    for candidate in candidates:
+        # held open for the life of the process: closing it releases the claim
+        lock = open(f"{prefix}-worker-{candidate}.lock", "w")  # noqa: SIM115
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            continue
+        _worker_locks.append(lock)
+        logger.info(
+            "Worker id claimed",
+            extra={"worker_id": candidate, "worker_count": worker_count},
+        )
+        return candidate
+    if worker_id is not None:
+        raise RuntimeError(f"Worker id {worker_id} is already taken by another process")
+    raise RuntimeError(
+        f"All {worker_count} worker ids are taken: start at most WORKER_COUNT workers"
+    )
+
+
+@functools.cache
+def _sticky(manager_class):
+    name = f"Sticky{manager_class.__name__}"
+    return type(name, (StickyRoutingMixin, manager_class), {})
+
+
+def build_client_manager(
+    url: str,
+    channel: str = "socketio",
+    worker_id: int = 0,
+    worker_count: int = 1,
+):
+    """
+    Client manager for a message queue URL, or None for the default in-process
+    manager. Supported: memory://, sqlite:///path, redis://, rediss://,
+    valkey://, amqp://, amqps://.
+    """
+    if not url:
+        if worker_count > 1:
+            raise ValueError("Running several workers needs SOCKETIO_MESSAGE_QUEUE")
+        return None
+
+    scheme = url.split("://", 1)[0].split("+", 1)[0].lower()
+    if scheme == "memory":
+        manager = _sticky(MemoryManager)(channel=channel)
+    elif scheme == "sqlite":
+        manager = _sticky(SQLiteManager)(url[len("sqlite:///") :], channel=channel)
+    elif scheme in ("redis", "rediss", "valkey", "valkeys"):
+        manager = _sticky(socketio.AsyncRedisManager)(url, channel=channel)
+    elif scheme in ("amqp", "amqps"):
+        manager = _sticky(socketio.AsyncAioPikaManager)(url, channel=channel)
+    else:
+        raise ValueError(f"Unsupported Socket.IO message queue: {url}")
+
+    manager.worker_id = worker_id
+    manager.worker_count = worker_count
+    return manager
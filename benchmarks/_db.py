@@ -0,0 +1,33 @@
+# benchmarks/_db.py
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+# register every table on Base.metadata
+import app.appointments.models
+import app.conversations.models
+import app.patient_info.models  # noqa: F401
+from app.db.database import AsyncSessionLocal, Base, build_engine
+
+
+@asynccontextmanager
+async def temp_database(**engine_kwargs):
+    """
+    Create a throwaway SQLite file with the full schema and point
+    AsyncSessionLocal (and so every with_db call) at it. `engine_kwargs` go to
+    build_engine, so the configured pool and PRAGMAs apply unless overridden.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(
+            f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}", **engine_kwargs
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        previous = AsyncSessionLocal.kw["bind"]
+        AsyncSessionLocal.configure(bind=engine)
+        try:
+            yield engine
+        finally:
+            AsyncSessionLocal.configure(bind=previous)
+            await engine.dispose()
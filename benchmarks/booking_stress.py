@@ -0,0 +1,88 @@
+# benchmarks/booking_stress.py
+"""
+Fire many simultaneous bookings at the same slot and check exactly one wins.
+
+    uv run python -m benchmarks.booking_stress --clients 300
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.appointments.interface import book_appointment
+from app.appointments.models import Appointment, AppointmentStatus
+from app.patient_info.models import Patient
+from benchmarks._db import temp_database
+
+
+def next_business_day() -> date:
+    day = date.today() + timedelta(days=1)
+    while day.weekday() == 6:
+        day += timedelta(days=1)
+    return day
+
+
+async def main(clients: int):
+    async with temp_database(
+        pool_size=20,
+        max_overflow=0,
+        pool_timeout=120,
+        connect_args={"timeout": 120},
+    ) as engine:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            patients = [
+                Patient(
+                    full_name=f"Stress Patient {i}",
+                    phone_number=f"+1555{i:07d}",
+                    date_of_birth=date(1990, 1, 1),
+                )
+                for i in range(clients)
+            ]
+            db.add_all(patients)
+            await db.commit()
+
+        slot = datetime.combine(next_business_day(), datetime.min.time()).replace(
+            hour=10
+        )
+
+        async def attempt(patient_id):
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                try:
+                    await book_appointment(
+                        patient_id=patient_id,
+                        appointment_type="cleaning",
+                        start_time_iso=slot.isoformat(),
+                        db=db,
+                    )
+                    return True
+                except ValueError:
+                    return False
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(attempt(p.id) for p in patients))
+        elapsed = time.perf_counter() - started
+
+        async with AsyncSession(engine) as db:
+            booked = await db.scalar(
+                select(func.count(Appointment.id)).where(
+                    Appointment.status == AppointmentStatus.SCHEDULED.value
+                )
+            )
+
+    print(
+        f"{clients} concurrent bookings in {elapsed:.2f}s: "
+        f"{sum(results)} succeeded, {booked} rows scheduled"
+    )
+    assert sum(results) == 1 and booked == 1, "slot was double-booked"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent booking stress test.")
+    parser.add_argument("--clients", type=int, default=300)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.clients))
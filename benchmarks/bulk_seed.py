@@ -0,0 +1,123 @@
+# benchmarks/bulk_seed.py
+"""
+Rows/sec of the bulk fixture pipeline (app/db/bulk.py) against the old
+one-ORM-object-at-a-time fixtures, on throwaway SQLite files.
+
+Seeds patients, a span of conflict-free appointments and conversations with
+their messages, once inline and once with --workers generator processes, then
+checks that both databases hold identical rows, that no two scheduled
+appointments overlap, and that every phone number is unique.
+
+    uv run python -m benchmarks.bulk_seed --patients 100000 --conversations 20000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import time
+
+from sqlalchemy import text
+
+from app.appointments.fixtures import seed_appointments
+from app.conversations.fixtures import seed_conversations
+from app.db.utils import session_scope
+from app.patient_info.fixtures import create_patients, seed_patients
+from benchmarks._db import temp_database
+
+CHECKSUMS = {
+    "patients": "SELECT id, full_name, phone_number, date_of_birth, insurance_name "
+    "FROM patients ORDER BY id",
+    "appointments": "SELECT id, patient_id, start_time, end_time, status "
+    "FROM appointments ORDER BY id",
+    "messages": "SELECT id, conversation_id, sender_type, content "
+    "FROM messages ORDER BY id",
+}
+OVERLAPS = """
+SELECT count(*) FROM appointments a JOIN appointments b
+  ON a.target_date = b.target_date AND a.id < b.id
+ AND a.status = 'scheduled' AND b.status = 'scheduled'
+ AND a.start_time < b.end_time AND b.start_time < a.end_time
+"""
+
+
+async def checksums() -> dict:
+    sums = {}
+    async with session_scope() as db:
+        for table, query in CHECKSUMS.items():
+            digest = hashlib.sha256()
+            for row in (await db.execute(text(query))).all():
+                digest.update(repr(tuple(row)).encode())
+            sums[table] = digest.hexdigest()[:16]
+    return sums
+
+
+async def seed_all(args, workers: int) -> dict:
+    async with temp_database():
+        for name, job in (
+            ("patients", seed_patients(args.patients, seed=args.seed, workers=workers)),
+            (
+                "appointments",
+                seed_appointments(
+                    args.days, args.patients, seed=args.seed, workers=workers
+                ),
+            ),
+            (
+                "conversations",
+                seed_conversations(
+                    args.conversations,
+                    patients=args.patients,
+                    messages_per_conversation=args.messages_per_conversation,
+                    seed=args.seed,
+                    workers=workers,
+                ),
+            ),
+        ):
+            report = await job
+            print(f"  {name:>13}: {report}")
+
+        async with session_scope() as db:
+            overlaps = (await db.execute(text(OVERLAPS))).scalar()
+            duplicate_phones = (
+                await db.execute(
+                    text("SELECT count(*) - count(DISTINCT phone_number) FROM patients")
+                )
+            ).scalar()
+        print(
+            f"  overlapping appointments: {overlaps}, duplicate phones: {duplicate_phones}"
+        )
+        return await checksums()
+
+
+async def legacy(count: int) -> float:
+    async with temp_database():
+        started = time.perf_counter()
+        await create_patients(count)
+        return count / (time.perf_counter() - started)
+
+
+async def main(args):
+    print(f"legacy create_patients({args.legacy_patients}):")
+    print(f"  {await legacy(args.legacy_patients):,.0f} rows/s")
+
+    runs = {}
+    for workers in dict.fromkeys([0, args.workers]):
+        print(f"bulk pipeline, workers={workers}:")
+        runs[workers] = await seed_all(args, workers)
+
+    if len({tuple(sums.items()) for sums in runs.values()}) > 1:
+        raise SystemExit(f"seeded rows differ between runs: {runs}")
+    print(f"identical rows across runs: {', '.join(runs[0].values())}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk fixture seeding throughput.")
+    parser.add_argument("--patients", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=730, help="of appointments")
+    parser.add_argument("--conversations", type=int, default=20_000)
+    parser.add_argument("--messages-per-conversation", type=int, default=10)
+    parser.add_argument("--legacy-patients", type=int, default=5_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -0,0 +1,255 @@
+# benchmarks/chair_capacity.py
+"""
+Capacity-aware slot search and booking with --chairs chairs over a month.
+
+Seeds a month of bookings per chair (random 30/45/60-minute appointments,
+--fill of each day booked), with emergencies restricted to the last two
+chairs, then:
+
+- lists a month of general_checkup / emergency slots with
+  list_available_slots_for_date, and times its in-memory per-resource sweep
+  (ResourceSchedule) against a brute-force per-candidate, per-chair overlap
+  scan of the same rows; all three must agree
+- finds the next emergency / cleaning openings with find_next_available_slots
+- fires --burst concurrent bookings at one free slot: exactly one per chair
+  must win, and no chair may end up double-booked
+
+    uv run python -m benchmarks.chair_capacity --chairs 10 --days 30
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from functools import partial
+
+from sqlalchemy import func, insert, select, text
+
+from app import config
+from app.appointments.cache import availability_cache
+from app.appointments.interface import (
+    BUSINESS_CLOSE_HOUR,
+    BUSINESS_OPEN_HOUR,
+    _is_business_day,
+    book_appointment,
+    eligible_resources,
+    find_next_available_slots,
+    list_available_slots_for_date,
+)
+from app.appointments.models import Appointment, AppointmentStatus
+from app.appointments.slots import ResourceSchedule
+from app.db.utils import count_queries, session_scope
+from app.patient_info.fixtures import bulk_patient_id, seed_patients
+from benchmarks._db import temp_database
+
+OVERLAPS = """
+SELECT count(*) FROM appointments a JOIN appointments b
+  ON a.resource_id = b.resource_id AND a.id < b.id
+ AND a.status = 'scheduled' AND b.status = 'scheduled'
+ AND a.start_time < b.end_time AND b.start_time < a.end_time
+"""
+
+
+def business_days(first_day: date, days: int):
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        if _is_business_day(datetime.combine(day, datetime.min.time())):
+            yield day
+
+
+async def seed_month(first_day: date, days: int, fill: float, seed: int) -> list:
+    """Conflict-free bookings per chair; returns their (resource, start, end)."""
+    rng = random.Random(seed)
+    rows = []
+    for day in business_days(first_day, days):
+        opening = datetime.combine(day, datetime.min.time()).replace(
+            hour=BUSINESS_OPEN_HOUR
+        )
+        close = opening.replace(hour=BUSINESS_CLOSE_HOUR)
+        for resource in config.CLINIC_RESOURCES:
+            cursor = opening
+            while True:
+                end = cursor + timedelta(minutes=rng.choice((30, 45, 60)))
+                if end > close:
+                    break
+                if rng.random() >= fill:
+                    cursor += timedelta(minutes=30)
+                    continue
+                rows.append(
+                    {
+                        "id": f"cap{len(rows):09d}",
+                        "patient_id": bulk_patient_id(len(rows) % 100),
+                        "appointment_type": "general_checkup",
+                        "start_time": cursor,
+                        "end_time": end,
+                        "target_date": day,
+                        "resource_id": resource,
+                        "status": AppointmentStatus.SCHEDULED.value,
+                    }
+                )
+                cursor = end
+    async with session_scope() as db:
+        await db.execute(insert(Appointment.__table__), rows)
+        await db.commit()
+    return [(r["resource_id"], r["start_time"], r["end_time"]) for r in rows]
+
+
+def sweep(bookings: list, first_day: date, days: int, resources) -> dict:
+    schedule = ResourceSchedule(bookings)
+    slots = {}
+    for day in business_days(first_day, days):
+        opening = datetime.combine(day, datetime.min.time()).replace(
+            hour=BUSINESS_OPEN_HOUR
+        )
+        close = opening.replace(hour=BUSINESS_CLOSE_HOUR)
+        slots[day] = schedule.free_slots(opening, close, resources)
+    return slots
+
+
+def brute_force(bookings: list, first_day: date, days: int, resources) -> dict:
+    """Per candidate, scan every booking of every eligible chair."""
+    by_day = {}
+    for resource, start, end in bookings:
+        by_day.setdefault(start.date(), []).append((resource, start, end))
+    slots = {}
+    step = timedelta(minutes=30)
+    for day in business_days(first_day, days):
+        cur = datetime.combine(day, datetime.min.time()).replace(
+            hour=BUSINESS_OPEN_HOUR
+        )
+        close = cur.replace(hour=BUSINESS_CLOSE_HOUR)
+        slots[day] = []
+        while cur + step <= close:
+            if any(
+                not any(
+                    r == resource and s < cur + step and cur < e
+                    for r, s, e in by_day.get(day, ())
+                )
+                for resource in resources
+            ):
+                slots[day].append(cur)
+            cur += step
+    return slots
+
+
+async def month_of_slots(first_day: date, days: int, appointment_type: str) -> dict:
+    return {
+        day: await list_available_slots_for_date(day, appointment_type=appointment_type)
+        for day in business_days(first_day, days)
+    }
+
+
+async def timed(repeat: int, search):
+    timings = []
+    for _ in range(repeat):
+        availability_cache.clear()
+        with count_queries() as queries:
+            started = time.perf_counter()
+            result = await search()
+            timings.append(time.perf_counter() - started)
+    return result, statistics.median(timings) * 1000, queries.count
+
+
+async def burst(day: date, clients: int) -> int:
+    """Concurrent general_checkup bookings at 08:00 on `day`; returns the winners."""
+
+    async def attempt(n: int) -> bool:
+        try:
+            await book_appointment(
+                patient_id=bulk_patient_id(n % 100),
+                appointment_type="general_checkup",
+                start_time_iso=f"{day.isoformat()} 08:00",
+            )
+            return True
+        except ValueError:
+            return False
+
+    return sum(await asyncio.gather(*(attempt(n) for n in range(clients))))
+
+
+async def main(args):
+    chairs = [f"chair-{n}" for n in range(1, args.chairs + 1)]
+    saved = config.CLINIC_RESOURCES, config.APPOINTMENT_RESOURCES
+    config.CLINIC_RESOURCES = chairs
+    config.APPOINTMENT_RESOURCES = {"emergency": chairs[-2:][::-1]}
+    first_day = date.today() + timedelta(days=1)
+    try:
+        async with temp_database():
+            await seed_patients(100)
+            bookings = await seed_month(first_day, args.days, args.fill, args.seed)
+            print(
+                f"{len(bookings)} bookings on {args.chairs} chairs over {args.days} days "
+                f"(fill {args.fill:.0%})"
+            )
+
+            print(f"{'':>38} {'p50 ms':>8} {'queries':>8} {'slots':>6}")
+            for appointment_type in ("general_checkup", "emergency"):
+                resources = eligible_resources(appointment_type)
+                slots, ms, queries = await timed(
+                    args.repeat,
+                    partial(month_of_slots, first_day, args.days, appointment_type),
+                )
+                count = sum(map(len, slots.values()))
+                label = f"month of {appointment_type} slots"
+                print(f"{label:>38} {ms:>8.1f} {queries:>8} {count:>6}")
+                for name, engine in (
+                    ("in memory: sweep", sweep),
+                    ("in memory: brute force", brute_force),
+                ):
+                    started = time.perf_counter()
+                    in_memory = engine(bookings, first_day, args.days, resources)
+                    engine_ms = (time.perf_counter() - started) * 1000
+                    assert in_memory == slots, (name, appointment_type)
+                    print(f"{name:>38} {engine_ms:>8.1f} {'-':>8} {count:>6}")
+
+            start = datetime.combine(first_day, datetime.min.time())
+            for appointment_type in ("emergency", "cleaning"):
+                found, ms, queries = await timed(
+                    args.repeat,
+                    partial(
+                        find_next_available_slots,
+                        appointment_type,
+                        start=start,
+                        days=args.days,
+                    ),
+                )
+                label = f"next {appointment_type}"
+                print(f"{label:>38} {ms:>8.1f} {queries:>8} {len(found):>6}")
+
+            # a day after the seeded month is empty on every chair
+            day = next(business_days(first_day + timedelta(days=args.days), 7))
+            started = time.perf_counter()
+            won = await burst(day, args.burst)
+            elapsed = time.perf_counter() - started
+            async with session_scope() as db:
+                overlaps = (await db.execute(text(OVERLAPS))).scalar()
+                chairs_used = (
+                    await db.execute(
+                        select(
+                            func.count(func.distinct(Appointment.resource_id))
+                        ).where(Appointment.target_date == day)
+                    )
+                ).scalar()
+            print(
+                f"{args.burst} concurrent bookings for one slot in {elapsed:.2f}s: "
+                f"{won} succeeded on {chairs_used} chairs; overlapping bookings: {overlaps}"
+            )
+            if won != args.chairs or chairs_used != args.chairs or overlaps:
+                raise SystemExit("capacity check failed")
+    finally:
+        config.CLINIC_RESOURCES, config.APPOINTMENT_RESOURCES = saved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-chair slot search and booking.")
+    parser.add_argument("--chairs", type=int, default=10)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--fill", type=float, default=0.8)
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -0,0 +1,78 @@
+# benchmarks/explain_query_plans.py
+"""
+Print SQLite's EXPLAIN QUERY PLAN for the hot query shapes and flag full scans.
+
+    uv run alembic upgrade head
+    uv run python -m benchmarks.explain_query_plans
+"""
+
+import argparse
+from datetime import date, datetime, time
+
+from sqlalchemy import create_engine, select
+
+from app import config
+from app.appointments.models import Appointment, AppointmentStatus
+from app.conversations.models import Conversation, Message
+
+
+def hot_queries():
+    day = date(2025, 11, 10)
+    day_start = datetime.combine(day, time(8, 0))
+    day_end = datetime.combine(day, time(18, 0))
+    scheduled = AppointmentStatus.SCHEDULED.value
+
+    return {
+        "get_messages": select(Message.id, Message.content)
+        .where(Message.conversation_id == "conversation1")
+        .order_by(Message.created_at.asc()),
+        "appointment conflict check": select(Appointment.id)
+        .where(
+            Appointment.status == scheduled,
+            Appointment.start_time >= datetime.combine(day, time.min),
+            Appointment.start_time < day_end,
+            Appointment.end_time > day_start,
+        )
+        .limit(1),
+        "slots for date": select(Appointment.start_time, Appointment.end_time).where(
+            Appointment.target_date == day,
+            Appointment.status == scheduled,
+        ),
+        "list_conversations": select(Conversation.id)
+        .where(Conversation.patient_id == "patient00001")
+        .order_by(Conversation.started_at.desc()),
+    }
+
+
+def main(url: str):
+    engine = create_engine(url)
+    full_scans = []
+    with engine.connect() as conn:
+        for name, stmt in hot_queries().items():
+            sql = str(
+                stmt.compile(
+                    dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+                )
+            )
+            plan = [
+                row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+            ]
+            print(f"-- {name}")
+            for detail in plan:
+                print(f"   {detail}")
+            if any(d.startswith("SCAN") and "INDEX" not in d for d in plan):
+                full_scans.append(name)
+    engine.dispose()
+
+    if full_scans:
+        print(f"\nFull table scans: {', '.join(full_scans)}")
+    else:
+        print("\nAll hot queries use an index.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Explain hot query plans.")
+    parser.add_argument("--url", default=config.ALEMBIC_DATABASE_URL)
+    args = parser.parse_args()
+
+    main(args.url)
@@ -0,0 +1,98 @@
+# benchmarks/history_prompt_size.py
+"""
+Grow a conversation turn by turn with a stub model and record how many
+characters reach the model each turn: the bounded history window + truncated
+transcript of earlier messages versus the old "repr every message into the instructions" approach.
+
+    uv run python -m benchmarks.history_prompt_size --turns 250
+"""
+
+import argparse
+import asyncio
+import time
+
+from pydantic_ai.messages import ModelRequest, ModelResponse, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from app.conversations import appointment_agent
+from app.conversations.interface import (
+    create_conversation,
+    get_messages,
+    process_user_message,
+)
+from app.conversations.models import SenderTypeEnum
+from benchmarks._db import temp_database
+
+REPORT_AT = (10, 50, 100, 200, 250, 500)
+
+
+def prompt_chars(messages) -> int:
+    chars = 0
+    for message in messages:
+        if isinstance(message, ModelRequest) and message.instructions:
+            chars += len(message.instructions)
+        for part in message.parts:
+            content = getattr(part, "content", "")
+            chars += len(content) if isinstance(content, str) else 0
+    return chars
+
+
+def legacy_prompt_chars(messages) -> int:
+    """Size of the history string the old conversation_history instruction built."""
+    return len(
+        f"Here is a list of previously exchange messages {
+            [
+                {
+                    'role': 'user'
+                    if m.sender_type == SenderTypeEnum.PATIENT.value
+                    else 'model',
+                    'timestamp': m.created_at,
+                    'content': m.content,
+                }
+                for m in messages
+            ]
+        }"
+    )
+
+
+async def main(turns: int):
+    sizes = []
+
+    def reply(messages, info: AgentInfo):
+        sizes.append(prompt_chars(messages))
+        return ModelResponse(
+            parts=[
+                ToolCallPart(
+                    tool_name=info.output_tools[0].name,
+                    args={"message": "Sure! Which day works best for your cleaning?"},
+                )
+            ]
+        )
+
+    async with temp_database():
+        conversation = await create_conversation()
+        with appointment_agent.dental_agent.override(model=FunctionModel(reply)):
+            print(
+                f"{'turn':>6} {'messages':>9} {'prompt chars':>13} {'legacy chars':>13} {'turn ms':>8}"
+            )
+            for turn in range(1, turns + 1):
+                started = time.perf_counter()
+                await process_user_message(
+                    conversation_id=conversation.id,
+                    content=f"Message {turn}: I'd like to book a cleaning next week, mornings please.",
+                )
+                elapsed = time.perf_counter() - started
+                if turn in REPORT_AT or turn == turns:
+                    messages = await get_messages(conversation.id)
+                    print(
+                        f"{turn:>6} {len(messages):>9} {sizes[-1]:>13} "
+                        f"{legacy_prompt_chars(messages):>13} {elapsed * 1000:>8.1f}"
+                    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prompt size vs conversation length.")
+    parser.add_argument("--turns", type=int, default=250)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.turns))
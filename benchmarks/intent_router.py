@@ -0,0 +1,326 @@
+# benchmarks/intent_router.py
+"""
+Replay a corpus of patient messages through process_user_message with the
+intent router on and off. The model is a stub that waits --llm-ms before
+answering, so the saving is what the fast path avoids of a model round trip.
+Reports the LLM-bypass rate, routing mistakes against the expected intent,
+fast-path replies that are wrong (patient not identified, appointment not
+cancelled, slots other than the bookable ones for the day and type) and the
+per-turn latency of both runs.
+
+    uv run python -m benchmarks.intent_router --llm-ms 800 --repeat 3
+"""
+
+import argparse
+import asyncio
+import re
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, NamedTuple, Optional
+
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from app import config
+from app.appointments.interface import list_available_slots_for_date
+from app.appointments.models import Appointment, AppointmentStatus
+from app.conversations import appointment_agent
+from app.conversations.intent_router import (
+    AVAILABLE_SLOTS,
+    CANCEL_APPOINTMENT,
+    LOOKUP_PATIENT,
+)
+from app.conversations.interface import process_user_message
+from app.conversations.models import Conversation, Message, SenderTypeEnum
+from app.db.utils import session_scope
+from app.metrics import registry
+from app.patient_info.models import Patient
+from benchmarks._db import temp_database
+
+PHONE = "+15550001234"
+ASK_DAY = "Which day works best for you?"
+ASK_DOB = "Could you tell me your date of birth?"
+
+
+class Case(NamedTuple):
+    """
+    One corpus line: the last assistant message, the patient's message and
+    the fast-path intent expected (None: the model). Slot requests also give
+    the day they mean, as a function of today, and the appointment type.
+    """
+
+    previous: Optional[str]
+    message: str
+    intent: Optional[str]
+    day: Optional[Callable[[date], date]] = None
+    appointment_type: Optional[str] = None
+
+
+def weekday(n: int, skip_today: bool = False) -> Callable[[date], date]:
+    def day(today: date) -> date:
+        ahead = (n - today.weekday()) % 7
+        return today + timedelta(days=ahead or (7 if skip_today else 0))
+
+    return day
+
+
+def month_day(month: int, day_of_month: int) -> Callable[[date], date]:
+    def day(today: date) -> date:
+        this_year = date(today.year, month, day_of_month)
+        return (
+            this_year if this_year >= today else this_year.replace(year=today.year + 1)
+        )
+
+    return day
+
+
+def today(day: date) -> date:
+    return day
+
+
+def tomorrow(day: date) -> date:
+    return day + timedelta(days=1)
+
+
+# {phone} is a registered patient; {appointment_id} one of theirs, and
+# "identified" conversations already know who the patient is.
+CORPUS = [
+    Case(None, "{phone}", LOOKUP_PATIENT),
+    Case(None, "+1 555-000-1234", LOOKUP_PATIENT),
+    Case(None, "1 (555) 000 1234", LOOKUP_PATIENT),
+    Case("Could I have your phone number?", "{phone}", LOOKUP_PATIENT),
+    # nobody has this number: the model asks whether it's a typo or registers them
+    Case(None, "+1 (555) 987 6543", None),
+    Case(None, "my number is {phone}", None),
+    Case(None, "12-03-1990", None),
+    Case(None, "03.12.1990", None),
+    Case(None, "Hi, I'd like to book a cleaning", None),
+    Case(None, "Hello!", None),
+    Case(None, "What time do you open on Saturday?", None),
+    Case(None, "any slots tomorrow?", AVAILABLE_SLOTS, tomorrow),
+    Case(
+        None,
+        "any slots for a cleaning tomorrow?",
+        AVAILABLE_SLOTS,
+        tomorrow,
+        "cleaning",
+    ),
+    Case(None, "What slots do you have on Friday?", AVAILABLE_SLOTS, weekday(4)),
+    Case(
+        None, "availability next monday", AVAILABLE_SLOTS, weekday(0, skip_today=True)
+    ),
+    Case(None, "Any openings on Nov 3rd?", AVAILABLE_SLOTS, month_day(11, 3)),
+    Case(None, "show me free slots today", AVAILABLE_SLOTS, today),
+    Case(
+        None,
+        "open slots friday for an emergency",
+        AVAILABLE_SLOTS,
+        weekday(4),
+        "emergency",
+    ),
+    Case(None, "any appointments tomorrow?", None),
+    Case(None, "slots for a filling and a cleaning?", None),
+    Case(ASK_DAY, "Friday", AVAILABLE_SLOTS, weekday(4)),
+    Case(ASK_DAY, "tomorrow please", AVAILABLE_SLOTS, tomorrow),
+    Case(ASK_DAY, "next tuesday", AVAILABLE_SLOTS, weekday(1, skip_today=True)),
+    Case(ASK_DAY, "the 3rd of December", AVAILABLE_SLOTS, month_day(12, 3)),
+    Case(ASK_DAY, "whenever you're free", None),
+    Case(ASK_DOB, "1990-01-01", None),
+    Case(ASK_DOB, "1990 01 01", None),
+    Case(ASK_DOB, "19900101", None),
+    Case(ASK_DOB, "March 3rd", None),
+    Case("identified", "cancel appointment {appointment_id}", CANCEL_APPOINTMENT),
+    Case(
+        "identified",
+        "Please cancel my appointment #{appointment_id}",
+        CANCEL_APPOINTMENT,
+    ),
+    Case(None, "cancel appointment {appointment_id}", None),
+    Case("identified", "cancel appointment abcdefghijkl", None),
+    Case("identified", "can I move my appointment to next week?", None),
+    Case("identified", "I need to cancel, something came up", None),
+    Case(
+        None, "I have a toothache and it really hurts when I drink something cold", None
+    ),
+    Case(None, "Do you take Delta Dental insurance?", None),
+]
+
+
+def stub_model(llm_ms: float) -> FunctionModel:
+    async def reply(messages, info: AgentInfo) -> ModelResponse:
+        await asyncio.sleep(llm_ms / 1000)
+        return ModelResponse(
+            parts=[
+                ToolCallPart(
+                    tool_name=info.output_tools[0].name,
+                    args={"message": "Happy to help with that."},
+                )
+            ]
+        )
+
+    return FunctionModel(reply)
+
+
+async def seed_patient() -> Patient:
+    async with session_scope() as db:
+        patient = Patient(
+            full_name="Router Bench",
+            phone_number=PHONE,
+            date_of_birth=date(1990, 1, 1),
+        )
+        db.add(patient)
+        await db.commit()
+        return patient
+
+
+async def seed_case(patient: Patient, previous, message: str):
+    """A fresh conversation for one corpus line; returns (id, message, appointment id)."""
+    async with session_scope() as db:
+        identified = previous == "identified"
+        conversation = Conversation(
+            patient_id=patient.id if identified else None, status="active"
+        )
+        db.add(conversation)
+        await db.flush()
+
+        start = datetime.combine(date.today() + timedelta(days=3), datetime.min.time())
+        appointment = Appointment(
+            patient_id=patient.id,
+            appointment_type="cleaning",
+            start_time=start.replace(hour=10),
+            end_time=start.replace(hour=10, minute=30),
+            target_date=start.date(),
+            status=AppointmentStatus.SCHEDULED.value,
+        )
+        db.add(appointment)
+        if previous and not identified:
+            db.add(
+                Message(
+                    conversation_id=conversation.id,
+                    sender_type=SenderTypeEnum.AI_AGENT.value,
+                    content=previous,
+                )
+            )
+        await db.commit()
+        content = message.format(phone=PHONE, appointment_id=appointment.id)
+        return conversation.id, content, appointment.id
+
+
+async def wrong_reply(
+    case: Case, patient: Patient, conversation_id: str, appointment_id: str, reply: str
+) -> Optional[str]:
+    """Why a fast-path reply is wrong for its corpus line, or None if it is right."""
+    if case.intent == LOOKUP_PATIENT:
+        async with session_scope() as db:
+            conversation = await db.get(Conversation, conversation_id)
+        if conversation.patient_id != patient.id:
+            return "the patient was not identified"
+        if patient.full_name.split()[0] not in reply:
+            return "the reply does not greet the patient"
+    elif case.intent == CANCEL_APPOINTMENT:
+        async with session_scope() as db:
+            appointment = await db.get(Appointment, appointment_id)
+        if appointment.status != AppointmentStatus.CANCELLED.value:
+            return "the appointment is still scheduled"
+    elif case.intent == AVAILABLE_SLOTS:
+        day = case.day(date.today())
+        if day.strftime("%A, %b %d") not in reply:
+            return f"the reply is not about {day}"
+        slots = await list_available_slots_for_date(
+            day, appointment_type=case.appointment_type
+        )
+        offered = re.findall(r"\d{2}:\d{2} [AP]M", reply)
+        if offered != [slot.strftime("%I:%M %p") for slot in slots]:
+            return f"offered {offered}, free {len(slots)} {case.appointment_type} slots"
+    return None
+
+
+def bypassed() -> int:
+    stats = registry.snapshot().get("agent.fast_path")
+    return stats["count"] if stats else 0
+
+
+async def replay(patient: Patient, enabled: bool, repeat: int):
+    """Per-turn seconds, the corpus lines the fast path answered and its wrong replies."""
+    config.INTENT_ROUTER_ENABLED = enabled
+    latencies, hits, wrong = [], [], []
+    for _ in range(repeat):
+        for line, case in enumerate(CORPUS):
+            conversation_id, content, appointment_id = await seed_case(
+                patient, case.previous, case.message
+            )
+            before = bypassed()
+            started = time.perf_counter()
+            _, reply = await process_user_message(
+                conversation_id=conversation_id, content=content
+            )
+            latencies.append(time.perf_counter() - started)
+            if bypassed() > before:
+                hits.append(line)
+                error = await wrong_reply(
+                    case, patient, conversation_id, appointment_id, reply
+                )
+                if error:
+                    wrong.append((line, error))
+    return latencies, hits, wrong
+
+
+async def main(llm_ms: float, repeat: int):
+    registry.reset()
+    router_enabled = config.INTENT_ROUTER_ENABLED
+    # the stub's replies would otherwise be served from the response cache
+    cache_enabled, config.RESPONSE_CACHE_ENABLED = config.RESPONSE_CACHE_ENABLED, False
+    async with temp_database():
+        patient = await seed_patient()
+        with appointment_agent.dental_agent.override(model=stub_model(llm_ms)):
+            baseline, _, _ = await replay(patient, False, repeat)
+            routed, hits, wrong = await replay(patient, True, repeat)
+    config.INTENT_ROUTER_ENABLED = router_enabled
+    config.RESPONSE_CACHE_ENABLED = cache_enabled
+
+    hit_lines = set(hits)
+    expected = {i for i, case in enumerate(CORPUS) if case.intent}
+    turns = len(CORPUS) * repeat
+    print(f"{len(CORPUS)} corpus messages x {repeat}, stub model {llm_ms:.0f} ms")
+    print(f"LLM bypass rate: {len(hits) / turns:.0%} ({len(hits)}/{turns} turns)")
+    for label, lines in (
+        ("routed but expected the model", hit_lines - expected),
+        ("expected a fast path but used the model", expected - hit_lines),
+    ):
+        for line in sorted(lines):
+            print(f"  {label}: {CORPUS[line].message!r}")
+    for line, error in wrong:
+        print(f"  wrong fast-path reply to {CORPUS[line].message!r}: {error}")
+
+    print(f"{'':>10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for label, samples in (("router off", baseline), ("router on", routed)):
+        samples = sorted(samples)
+        print(
+            f"{label:>10} {statistics.mean(samples) * 1000:>9.1f} "
+            f"{statistics.median(samples) * 1000:>9.1f} "
+            f"{samples[int(len(samples) * 0.95)] * 1000:>9.1f}"
+        )
+    saving = 1 - statistics.mean(routed) / statistics.mean(baseline)
+    fast = registry.snapshot()["agent.fast_path"]
+    print(
+        f"mean latency saving: {saving:.0%}; fast path p50 {fast['p50'] * 1000:.1f} ms"
+    )
+
+    if hit_lines - expected:
+        raise SystemExit(
+            "the router answered messages it should have left to the model"
+        )
+    if wrong:
+        raise SystemExit("the fast path gave wrong answers")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Intent router bypass rate and saving."
+    )
+    parser.add_argument("--llm-ms", type=float, default=800)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.llm_ms, args.repeat))
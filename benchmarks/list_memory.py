@@ -0,0 +1,134 @@
+# benchmarks/list_memory.py
+"""
+Peak memory and time to walk every patient of a --patients table (1M by
+default) with:
+
+- all:            list_patients(), i.e. scalars().all()
+- pages:          list_patients_page() keyset pages of --page-size
+- stream:         stream_patients(), yield_per batches of --batch-size
+- stream-columns: stream_patients(columns=["phone_number"])
+
+The table is bulk-seeded once; each mode then runs in its own process, where
+a thread samples resident memory (Linux /proc) while it walks: "peak MB" is
+the highest sample above the RSS just before the walk. Pages SQLite maps
+(SQLITE_MMAP_SIZE) or caches count too; run with SQLITE_MMAP_SIZE=0
+SQLITE_CACHE_SIZE=-2000 to see the Python side alone.
+
+    uv run python -m benchmarks.list_memory --patients 1000000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+from app.db.database import AsyncSessionLocal, build_engine
+from app.patient_info.fixtures import seed_patients
+from app.patient_info.interface import (
+    list_patients,
+    list_patients_page,
+    stream_patients,
+)
+from benchmarks._db import temp_database
+
+MODES = ("all", "pages", "stream", "stream-columns")
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+class PeakSampler(threading.Thread):
+    def __init__(self, interval: float = 0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = rss_mb()
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+
+async def walk(mode: str, page_size: int, batch_size: int) -> int:
+    rows = 0
+    if mode == "all":
+        rows = len(await list_patients())
+    elif mode == "pages":
+        cursor = None
+        while True:
+            page = await list_patients_page(cursor=cursor, limit=page_size)
+            rows += len(page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+    else:
+        columns = ["phone_number"] if mode == "stream-columns" else None
+        async for _ in stream_patients(columns=columns, batch_size=batch_size):
+            rows += 1
+    return rows
+
+
+async def child(args):
+    engine = build_engine(args.url)
+    AsyncSessionLocal.configure(bind=engine)
+    baseline = rss_mb()
+    sampler = PeakSampler()
+    sampler.start()
+    started = time.perf_counter()
+    rows = await walk(args.child, args.page_size, args.batch_size)
+    elapsed = time.perf_counter() - started
+    sampler.done.set()
+    sampler.join()
+    peak = max(sampler.peak, rss_mb())
+    await engine.dispose()
+    print(json.dumps({"rows": rows, "seconds": elapsed, "peak_mb": peak - baseline}))
+
+
+async def main(args):
+    async with temp_database() as engine:
+        report = await seed_patients(args.patients, workers=args.workers)
+        print(f"seeded {report}")
+        print(f"{'':>15} {'rows':>9} {'seconds':>8} {'rows/s':>9} {'peak MB':>8}")
+        for mode in MODES:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable,
+                "-m",
+                "benchmarks.list_memory",
+                "--child",
+                mode,
+                "--url",
+                engine.url.render_as_string(hide_password=False),
+                "--page-size",
+                str(args.page_size),
+                "--batch-size",
+                str(args.batch_size),
+                stdout=asyncio.subprocess.PIPE,
+            )
+            out, _ = await process.communicate()
+            if process.returncode:
+                raise SystemExit(f"{mode} child exited with {process.returncode}")
+            result = json.loads(out.decode().strip().splitlines()[-1])
+            print(
+                f"{mode:>15} {result['rows']:>9} {result['seconds']:>8.1f} "
+                f"{result['rows'] / result['seconds']:>9,.0f} {result['peak_mb']:>8.1f}"
+            )
+            if result["rows"] != args.patients:
+                raise SystemExit(f"{mode} saw {result['rows']} of {args.patients} rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory of listing every patient.")
+    parser.add_argument("--patients", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=0, help="seeding processes")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    asyncio.run(child(args) if args.child else main(args))
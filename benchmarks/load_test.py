@@ -0,0 +1,340 @@
+# benchmarks/load_test.py
+"""
+End-to-end load test, fully offline: boots main.app in-process with uvicorn on
+a throwaway database, swaps dental_agent's model for a scripted FunctionModel
+(simulated latency, tool calls chosen by regex over the patient's message) and
+drives N concurrent Socket.IO clients through a booking dialog:
+
+    greeting -> phone number -> "what times on <day>?" -> "book <time> on <day>"
+    -> "thanks"
+
+Reports turns/sec, p50/p99 turn latency (send to `new_message`), DB queries
+per turn, peak RSS and the per-stage histograms, and writes them as JSON so
+runs can be diffed between commits (--baseline prints the deltas).
+
+    uv run python -m benchmarks.load_test --clients 100 --latency-ms 300 \\
+        --output load.json --baseline previous-load.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import resource
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable, List, Optional
+
+import socketio
+from pydantic_ai.messages import (
+    ModelResponse,
+    ToolCallPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, FunctionModel
+
+from app import config
+from app.conversations import appointment_agent
+from app.db.utils import count_queries
+from app.metrics import registry
+from app.patient_info.fixtures import bulk_phone_number, seed_patients
+from benchmarks._db import temp_database
+
+NAMESPACE = "/conversations"
+PORT = 8796
+
+
+@dataclass
+class Rule:
+    """Call `tool` with args(match) when the patient's message matches."""
+
+    pattern: re.Pattern
+    tool: str
+    args: Callable[[re.Match], dict]
+
+
+SCRIPTS = {
+    "booking": [
+        Rule(
+            re.compile(r"(\d{1,2}:\d{2}) on (\d{4}-\d{2}-\d{2})"),
+            "set_appointment",
+            lambda m: {
+                "appointment_type": "cleaning",
+                "target_date": m[2],
+                "preferred_time": m[1],
+            },
+        ),
+        Rule(
+            re.compile(r"(\d{4}-\d{2}-\d{2})"),
+            "get_available_slots",
+            lambda m: {"target_date": m[1]},
+        ),
+        Rule(re.compile(r"(\+\d{10,14})"), "find_patient", lambda m: {"phone": m[1]}),
+    ],
+    # small talk only: every turn is a single model call
+    "chat": [],
+}
+DEFAULT_REPLY = "Happy to help! Could you share your phone number first?"
+
+
+class ScriptedModel:
+    """
+    FunctionModel behaviour: wait `latency` (± jitter), then call the tool the
+    first matching rule picks, or answer. After tool results, answer with the
+    last result.
+    """
+
+    def __init__(self, script: List[Rule], latency: float, jitter: float):
+        self.script = script
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+
+    def _respond(self, messages, info: AgentInfo) -> List[ToolCallPart]:
+        request = messages[-1]
+        returns = [p for p in request.parts if isinstance(p, ToolReturnPart)]
+        if returns:
+            text = str(returns[-1].content)
+        else:
+            prompt = next(
+                (p.content for p in request.parts if isinstance(p, UserPromptPart)), ""
+            )
+            for rule in self.script:
+                match = rule.pattern.search(prompt)
+                if match:
+                    return [ToolCallPart(tool_name=rule.tool, args=rule.args(match))]
+            text = DEFAULT_REPLY
+        return [
+            ToolCallPart(tool_name=info.output_tools[0].name, args={"message": text})
+        ]
+
+    async def _wait(self):
+        self.calls += 1
+        await asyncio.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+
+    async def blocking(self, messages, info: AgentInfo) -> ModelResponse:
+        await self._wait()
+        return ModelResponse(parts=self._respond(messages, info))
+
+    async def streaming(self, messages, info: AgentInfo):
+        await self._wait()
+        for i, part in enumerate(self._respond(messages, info)):
+            yield {
+                i: DeltaToolCall(name=part.tool_name, json_args=json.dumps(part.args))
+            }
+
+    def model(self) -> FunctionModel:
+        return FunctionModel(self.blocking, stream_function=self.streaming)
+
+
+def booking_slot(n: int):
+    """A distinct business day and hour for client n, starting tomorrow."""
+    day = date.today()
+    for _ in range(n // 10 + 1):
+        day += timedelta(days=1)
+        while day.weekday() == 6:
+            day += timedelta(days=1)
+    return day.isoformat(), f"{8 + n % 10:02d}:00"
+
+
+def dialog(n: int) -> List[str]:
+    day, hour = booking_slot(n)
+    return [
+        "Hi, I'd like to book a cleaning.",
+        bulk_phone_number(n),
+        f"What times do you have on {day}?",
+        f"Please book {hour} on {day}.",
+        "Thanks, that's all!",
+    ]
+
+
+class Client:
+    def __init__(self):
+        self.sio = socketio.AsyncClient()
+        self.events = asyncio.Queue()
+        for event in ("conversation_started", "new_message", "busy"):
+            self.sio.on(
+                event,
+                lambda data, event=event: self.events.put_nowait((event, data)),
+                namespace=NAMESPACE,
+            )
+
+    async def connect(self):
+        await self.sio.connect(
+            f"http://127.0.0.1:{PORT}",
+            socketio_path="/ws/socket.io/",
+            namespaces=[NAMESPACE],
+            transports=["websocket"],
+        )
+
+    async def turn(self, conversation_id: Optional[str], content: str):
+        """Send one message and wait for its reply; returns the conversation id."""
+        payload = {"content": content}
+        if conversation_id:
+            payload["conversation_id"] = conversation_id
+        await self.sio.emit("send_message", payload, namespace=NAMESPACE)
+        while True:
+            event, data = await asyncio.wait_for(self.events.get(), 120)
+            if event == "conversation_started":
+                conversation_id = data["conversation_id"]
+            elif event == "busy":
+                await asyncio.sleep(random.uniform(0.2, 0.5))
+                await self.sio.emit("send_message", data, namespace=NAMESPACE)
+            elif data["conversation_id"] == conversation_id:
+                return conversation_id
+
+
+async def run_client(n: int, latencies: List[float], ramp: float):
+    await asyncio.sleep(random.uniform(0, ramp))
+    client = Client()
+    await client.connect()
+    try:
+        conversation_id = None
+        for content in dialog(n):
+            started = time.perf_counter()
+            conversation_id = await client.turn(conversation_id, content)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        await client.sio.disconnect()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(args) -> dict:
+    import uvicorn
+
+    import main
+    from app.logging_config import configure_logging
+    from app.websocket_app import sio
+
+    # per-connection INFO logs would drown the report
+    configure_logging(level="WARNING")
+    sio.logger.setLevel(logging.WARNING)
+    model = ScriptedModel(
+        SCRIPTS[args.script], args.latency_ms / 1000, args.jitter_ms / 1000
+    )
+    latencies: List[float] = []
+
+    async with temp_database():
+        await seed_patients(args.clients, seed=args.seed)
+        registry.reset()
+        # server tasks inherit the query counter from this context
+        with (
+            appointment_agent.dental_agent.override(model=model.model()),
+            count_queries() as queries,
+        ):
+            server = uvicorn.Server(
+                uvicorn.Config(main.app, port=PORT, log_level="warning")
+            )
+            serving = asyncio.create_task(server.serve())
+            while not server.started:
+                await asyncio.sleep(0.05)
+
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    run_client(n, latencies, args.ramp_ms / 1000)
+                    for n in range(args.clients)
+                )
+            )
+            elapsed = time.perf_counter() - started
+
+            server.should_exit = True
+            await serving
+
+    turns = len(latencies)
+    return {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "config": {
+            "clients": args.clients,
+            "script": args.script,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "stream_responses": config.STREAM_RESPONSES,
+            "intent_router": config.INTENT_ROUTER_ENABLED,
+            "response_cache": config.RESPONSE_CACHE_ENABLED,
+            "agent_max_concurrency": config.AGENT_MAX_CONCURRENCY,
+            "message_write_behind": config.MESSAGE_WRITE_BEHIND,
+        },
+        "results": {
+            "turns": turns,
+            "elapsed_s": elapsed,
+            "turns_per_s": turns / elapsed,
+            "turn_p50_ms": statistics.median(latencies) * 1000,
+            "turn_p99_ms": percentile(latencies, 0.99) * 1000,
+            "model_calls": model.calls,
+            "db_queries_per_turn": queries.count / turns,
+            # ru_maxrss is in KiB on Linux
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+        "stages": registry.snapshot(),
+    }
+
+
+def report(result: dict, baseline: Optional[dict]):
+    config_line = ", ".join(f"{k}={v}" for k, v in result["config"].items())
+    print(f"commit {result['commit']}: {config_line}")
+    previous = (baseline or {}).get("results", {})
+    for key, value in result["results"].items():
+        line = (
+            f"  {key:<22} {value:>12.2f}"
+            if isinstance(value, float)
+            else (f"  {key:<22} {value:>12}")
+        )
+        if previous.get(key):
+            change = (value - previous[key]) / previous[key]
+            line += f"   ({change:+.1%} vs {baseline['commit']})"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end Socket.IO load test.")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--script", choices=sorted(SCRIPTS), default="booking")
+    parser.add_argument("--latency-ms", type=float, default=300, help="per model call")
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument(
+        "--ramp-ms", type=float, default=1000, help="client start spread"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON results here")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    result = asyncio.run(run(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report(result, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
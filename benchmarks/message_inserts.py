@@ -0,0 +1,65 @@
+# benchmarks/message_inserts.py
+"""
+Message-insert throughput with the old engine setup (echo on, default rollback
+journal) versus the configured one (echo off, WAL + PRAGMAs from app.config).
+
+    uv run python -m benchmarks.message_inserts --messages 1000 --concurrency 1 5 20 > /dev/null
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from app.conversations.interface import create_conversation, create_message
+from app.conversations.models import SenderTypeEnum
+from app.db.utils import session_scope
+from benchmarks._db import temp_database
+
+SETUPS = {
+    "legacy (echo, rollback journal)": {"echo": True, "sqlite_pragmas": {}},
+    "configured (app.config)": {},
+}
+
+
+async def run(messages: int, concurrency: int, engine_kwargs: dict) -> float:
+    async with temp_database(**engine_kwargs):
+        conversation = await create_conversation()
+        per_worker = messages // concurrency
+
+        async def worker(n):
+            for i in range(per_worker):
+                async with session_scope() as db:
+                    await create_message(
+                        conversation_id=conversation.id,
+                        sender_type=SenderTypeEnum.PATIENT.value,
+                        content=f"worker {n} message {i}",
+                        db=db,
+                    )
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        return per_worker * concurrency / (time.perf_counter() - started)
+
+
+async def main(messages: int, concurrency_levels: list):
+    # echo writes SQL to stdout, so report on stderr
+    for concurrency in concurrency_levels:
+        for name, engine_kwargs in SETUPS.items():
+            try:
+                rate = await run(messages, concurrency, engine_kwargs)
+                result = f"{rate:8.0f} inserts/s"
+            except OperationalError as e:
+                result = f"failed: {e.orig}"
+            print(f"concurrency={concurrency:<3} {name:>32}: {result}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark message inserts.")
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 5, 20])
+    args = parser.parse_args()
+
+    asyncio.run(main(args.messages, args.concurrency))
@@ -0,0 +1,271 @@
+# benchmarks/message_write_behind.py
+"""
+Message writes with the write-behind message log off (a commit per
+create_message) and on (buffered, group-committed every
+--flush-ms / --flush-batch), on SQLite with synchronous=FULL so every commit
+is an fsync.
+
+- inserts:  --conversations concurrent conversations each write --messages
+            messages, then load their history, which must be complete and in
+            order (read through the buffer when on); messages/s counts until
+            every row is committed
+- recovery: messages appended to a journaled log that is then dropped
+            without a flush (a crash) are inserted by the next start()
+- poison:   a batch holding rows the database refuses (no content, no
+            conversation) still commits its other rows, and sets the refused
+            ones aside in the journal's .rejected file
+- sockets:  benchmarks.load_test in a subprocess per mode, --conversations
+            Socket.IO clients on the chat script, for turn p50 / p99
+
+    uv run python -m benchmarks.message_write_behind --conversations 1000 --messages 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import event, func, insert, select
+
+from app import config
+from app.conversations.interface import create_message, get_messages
+from app.conversations.message_log import MessageLog, message_log
+from app.conversations.models import Conversation, Message, SenderTypeEnum
+from app.db.base_model import new_id
+from app.db.utils import session_scope
+from benchmarks._db import temp_database
+
+PRAGMAS = {**config.SQLITE_PRAGMAS, "synchronous": "FULL"}
+
+
+async def seed_conversations(count: int) -> list:
+    ids = [new_id() for _ in range(count)]
+    async with session_scope() as db:
+        await db.execute(
+            insert(Conversation.__table__), [{"id": i, "status": "active"} for i in ids]
+        )
+        await db.commit()
+    return ids
+
+
+async def write(conversation_ids: list, messages: int) -> list:
+    """Every conversation writes its messages one after another; returns latencies."""
+    latencies = []
+    expected = [f"message {n}" for n in range(messages)]
+
+    async def conversation(conversation_id: str):
+        for n in range(messages):
+            started = time.perf_counter()
+            await create_message(
+                conversation_id=conversation_id,
+                sender_type=SenderTypeEnum.PATIENT
+                if n % 2
+                else SenderTypeEnum.AI_AGENT,
+                content=f"message {n}",
+            )
+            latencies.append(time.perf_counter() - started)
+        history = await get_messages(conversation_id)
+        if [m.content for m in history] != expected:
+            raise SystemExit(
+                f"history of {conversation_id} is incomplete or out of order"
+            )
+
+    await asyncio.gather(*(conversation(i) for i in conversation_ids))
+    return latencies
+
+
+async def inserts(args, write_behind: bool) -> dict:
+    async with temp_database(sqlite_pragmas=PRAGMAS) as engine:
+        ids = await seed_conversations(args.conversations)
+        commits = []
+        event.listen(engine.sync_engine, "commit", lambda conn: commits.append(1))
+        if write_behind:
+            await message_log.start()
+        started = time.perf_counter()
+        latencies = await write(ids, args.messages)
+        await message_log.stop()
+        elapsed = time.perf_counter() - started
+        async with session_scope() as db:
+            stored = (await db.execute(select(func.count(Message.id)))).scalar()
+    if stored != args.conversations * args.messages:
+        raise SystemExit(
+            f"{stored} of {args.conversations * args.messages} messages stored"
+        )
+    latencies.sort()
+    return {
+        "messages_per_s": stored / elapsed,
+        "write_p50_ms": statistics.median(latencies) * 1000,
+        "write_p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "commits": len(commits),
+    }
+
+
+def message_row(conversation_id, content, now: datetime) -> dict:
+    return {
+        "id": new_id(),
+        "conversation_id": conversation_id,
+        "sender_type": SenderTypeEnum.PATIENT.value,
+        "content": content,
+        "meta": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def count_lines(path: str) -> int:
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for _ in f)
+
+
+async def poison(count: int) -> tuple:
+    """Flush `count` good rows mixed with bad ones; returns (rows stored, rows set aside)."""
+    with tempfile.TemporaryDirectory() as directory:
+        journal = os.path.join(directory, "messages.jsonl")
+        async with temp_database():
+            (conversation_id,) = await seed_conversations(1)
+            log = MessageLog(max_delay=3600, max_batch=10 * count, journal_path=journal)
+            await log.start()
+            now = datetime.now(timezone.utc)
+            rows = [
+                message_row(conversation_id, f"message {n}", now) for n in range(count)
+            ]
+            bad = [
+                message_row(conversation_id, None, now),
+                message_row(None, "no conversation", now),
+            ]
+            for row in rows[: count // 2] + bad + rows[count // 2 :]:
+                await log.append(row)
+            await log.flush()
+            # nothing is left buffered to fail the next batches
+            await log.append(message_row(conversation_id, "after", now))
+            await log.stop()
+            rejected = await asyncio.to_thread(count_lines, f"{journal}.rejected")
+            if rejected != log.rejected:
+                raise SystemExit(".rejected file and rejected count disagree")
+            async with session_scope() as db:
+                stored = (await db.execute(select(func.count(Message.id)))).scalar()
+            return stored, rejected
+
+
+async def recovery(count: int) -> int:
+    """Crash with `count` journaled messages buffered; returns how many the restart inserted."""
+    with tempfile.TemporaryDirectory() as directory:
+        journal = os.path.join(directory, "messages.jsonl")
+        async with temp_database():
+            (conversation_id,) = await seed_conversations(1)
+            crashed = MessageLog(
+                max_delay=3600, max_batch=10 * count, journal_path=journal
+            )
+            await crashed.start()
+            now = datetime.now(timezone.utc)
+            for n in range(count):
+                await crashed.append(message_row(conversation_id, f"message {n}", now))
+            # the process dies: no flush, the journal stays behind
+            crashed._task.cancel()
+
+            restarted = MessageLog(journal_path=journal)
+            await restarted.start()
+            await restarted.stop()
+            async with session_scope() as db:
+                return (await db.execute(select(func.count(Message.id)))).scalar()
+
+
+def sockets(args, write_behind: bool) -> dict:
+    with tempfile.NamedTemporaryFile(suffix=".json") as output:
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.load_test",
+                "--clients",
+                str(args.conversations),
+                "--script",
+                "chat",
+                "--latency-ms",
+                str(args.latency_ms),
+                "--jitter-ms",
+                "0",
+                "--output",
+                output.name,
+            ],
+            env={
+                **os.environ,
+                "MESSAGE_WRITE_BEHIND": "1" if write_behind else "0",
+                "SQLITE_SYNCHRONOUS": "FULL",
+            },
+            capture_output=True,
+            check=True,
+        )
+        return json.load(output)["results"]
+
+
+async def main(args):
+    message_log.max_delay = args.flush_ms / 1000
+    message_log.max_batch = args.flush_batch
+
+    print(
+        f"{args.conversations} concurrent conversations x {args.messages} messages, "
+        f"synchronous=FULL, flush every {args.flush_ms:g} ms or {args.flush_batch} rows"
+    )
+    print(
+        f"{'write-behind':>12} {'messages/s':>11} {'p50 ms':>8} {'p99 ms':>8} {'commits':>8}"
+    )
+    for write_behind in (False, True):
+        row = await inserts(args, write_behind)
+        print(
+            f"{'on' if write_behind else 'off':>12} {row['messages_per_s']:>11,.0f} "
+            f"{row['write_p50_ms']:>8.2f} {row['write_p99_ms']:>8.2f} {row['commits']:>8}"
+        )
+
+    recovered = await recovery(args.recover)
+    print(
+        f"crash with {args.recover} journaled messages: {recovered} inserted on restart"
+    )
+    if recovered != args.recover:
+        raise SystemExit("journal recovery lost messages")
+
+    stored, rejected = await poison(args.recover)
+    print(
+        f"batch of {args.recover} messages + 2 refused ones: "
+        f"{stored} stored, {rejected} set aside"
+    )
+    if (stored, rejected) != (args.recover + 1, 2):
+        raise SystemExit("refused rows held back the rest of the batch")
+
+    if args.skip_sockets:
+        return
+    print(
+        f"Socket.IO chat turns, {args.conversations} clients, "
+        f"model latency {args.latency_ms:g} ms"
+    )
+    print(f"{'write-behind':>12} {'turns/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for write_behind in (False, True):
+        result = sockets(args, write_behind)
+        print(
+            f"{'on' if write_behind else 'off':>12} {result['turns_per_s']:>9.1f} "
+            f"{result['turn_p50_ms']:>8.1f} {result['turn_p99_ms']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write-behind message log throughput.")
+    parser.add_argument("--conversations", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=10, help="per conversation")
+    parser.add_argument(
+        "--flush-ms", type=float, default=config.MESSAGE_FLUSH_INTERVAL_MS
+    )
+    parser.add_argument("--flush-batch", type=int, default=config.MESSAGE_FLUSH_BATCH)
+    parser.add_argument(
+        "--recover", type=int, default=1000, help="messages lost in the crash test"
+    )
+    parser.add_argument("--latency-ms", type=float, default=50, help="per model call")
+    parser.add_argument("--skip-sockets", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -0,0 +1,137 @@
+# benchmarks/next_available.py
+"""
+"Next available cleaning" over a 90-day window of a dense calendar: every
+business day fully booked with 30-minute appointments except for a handful of
+45-minute gaps from day --free-after on. Compares:
+
+- day by day: get_available_slots-style list_available_slots_for_date per day
+  until enough fitting slots turn up (one tool call, so one model round trip,
+  and one query per day)
+- find_next_available_slots: one streamed range query and a single sweep
+
+The availability cache is cleared before each run, and every approach must
+return the same slots.
+
+    uv run python -m benchmarks.next_available --days 90 --free-after 80
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.appointments.cache import availability_cache
+from app.appointments.interface import (
+    BUSINESS_CLOSE_HOUR,
+    BUSINESS_OPEN_HOUR,
+    _is_business_day,
+    appointment_duration,
+    find_next_available_slots,
+    list_available_slots_for_date,
+)
+from app.appointments.models import Appointment, AppointmentStatus
+from app.db.utils import count_queries, session_scope
+from app.patient_info.fixtures import bulk_patient_id, seed_patients
+from benchmarks._db import temp_database
+
+TYPE = "cleaning"
+
+
+async def seed_calendar(first_day: date, days: int, free_after: int) -> int:
+    """Book every 30 minutes of every business day, leaving gaps late on."""
+    rows = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        opening = datetime.combine(day, datetime.min.time()).replace(
+            hour=BUSINESS_OPEN_HOUR
+        )
+        if not _is_business_day(opening):
+            continue
+        slots = (BUSINESS_CLOSE_HOUR - BUSINESS_OPEN_HOUR) * 2
+        # from free_after on, drop two adjacent bookings mid-afternoon
+        free = {12, 13} if offset >= free_after else set()
+        for n in range(slots):
+            if n in free:
+                continue
+            start = opening + timedelta(minutes=30 * n)
+            rows.append(
+                {
+                    "id": f"nxt{offset:04d}{n:05d}",
+                    "patient_id": bulk_patient_id(n % 100),
+                    "appointment_type": "general_checkup",
+                    "start_time": start,
+                    "end_time": start + timedelta(minutes=30),
+                    "target_date": day,
+                    "status": AppointmentStatus.SCHEDULED.value,
+                }
+            )
+    async with session_scope() as db:
+        await db.execute(insert(Appointment.__table__), rows)
+        await db.commit()
+    return len(rows)
+
+
+async def day_by_day(start: datetime, days: int, limit: int):
+    found, calls = [], 0
+    for offset in range(days + 1):
+        day = start.date() + timedelta(days=offset)
+        if not _is_business_day(datetime.combine(day, datetime.min.time())):
+            continue
+        calls += 1
+        slots = await list_available_slots_for_date(day, appointment_type=TYPE)
+        found += [s for s in slots if s >= start]
+        if len(found) >= limit:
+            break
+    return found[:limit], calls
+
+
+async def range_search(start: datetime, days: int, limit: int):
+    found = await find_next_available_slots(TYPE, start=start, days=days, limit=limit)
+    return found, 1
+
+
+async def main(days: int, free_after: int, limit: int, repeat: int):
+    start = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+    async with temp_database():
+        await seed_patients(100)
+        booked = await seed_calendar(start.date(), days, free_after)
+        print(
+            f"{booked} bookings over {days} days; first {limit} {TYPE} "
+            f"({appointment_duration(TYPE)} min) openings from day {free_after}"
+        )
+        print(f"{'':>28} {'p50 ms':>8} {'queries':>8} {'tool calls':>11}")
+        expected = None
+        for name, search in (
+            ("day by day", day_by_day),
+            ("find_next_available_slots", range_search),
+        ):
+            timings = []
+            for _ in range(repeat):
+                availability_cache.clear()
+                with count_queries() as queries:
+                    started = time.perf_counter()
+                    found, calls = await search(start, days, limit)
+                    timings.append(time.perf_counter() - started)
+            expected = expected or found
+            assert found == expected, (name, found, expected)
+            print(
+                f"{name:>28} {statistics.median(timings) * 1000:>8.1f} "
+                f"{queries.count:>8} {calls:>11}"
+            )
+        print(
+            "first openings: " + ", ".join(s.strftime("%b %d %H:%M") for s in expected)
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Next-available search benchmark.")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--free-after", type=int, default=80)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.days, args.free_after, args.limit, args.repeat))
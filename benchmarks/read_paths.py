@@ -0,0 +1,197 @@
+# benchmarks/read_paths.py
+"""
+Read-heavy paths before and after the read-only Core APIs, median ms per
+call over --repeat calls:
+
+- availability: a day and a month of scheduled appointments, as ORM objects
+  with Appointment.patient joined in (the old lazy="joined" default), as
+  list_appointments_between loads them now, and as the availability path
+  reads them: (resource, start, end) columns into a ResourceSchedule
+- patient:      the agent's reads: a patient's appointments with the joined
+                patient vs list_appointment_rows_for_patient, and
+                get_patient_by_phone vs get_patient_row_by_phone
+- history:      get_messages vs get_message_rows on conversations of
+                --messages messages, as the turn's history load does
+
+    uv run python -m benchmarks.read_paths --patients 100 --days 365 --messages 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from app.appointments.fixtures import seed_appointments
+from app.appointments.interface import (
+    _schedule_between,
+    list_appointment_rows_for_patient,
+    list_appointments_between,
+)
+from app.appointments.models import Appointment
+from app.appointments.slots import ResourceSchedule
+from app.conversations.fixtures import seed_conversations
+from app.conversations.interface import get_message_rows, get_messages
+from app.conversations.models import Conversation
+from app.db.utils import session_scope
+from app.patient_info.fixtures import bulk_patient_id, bulk_phone_number, seed_patients
+from app.patient_info.interface import get_patient_by_phone, get_patient_row_by_phone
+from benchmarks._db import temp_database
+
+
+async def joined_between(start_dt: datetime, end_dt: datetime):
+    """list_appointments_between as it loaded before: patients joined in."""
+    async with session_scope() as db:
+        result = await db.execute(
+            select(Appointment)
+            .where(
+                Appointment.start_time >= start_dt,
+                Appointment.start_time < end_dt,
+                Appointment.status == "scheduled",
+            )
+            .order_by(Appointment.start_time)
+            .options(joinedload(Appointment.patient))
+        )
+        return result.scalars().all()
+
+
+async def joined_for_patient(patient_id: str):
+    async with session_scope() as db:
+        result = await db.execute(
+            select(Appointment)
+            .where(Appointment.patient_id == patient_id)
+            .options(joinedload(Appointment.patient))
+        )
+        return result.scalars().all()
+
+
+async def orm_between(start_dt: datetime, end_dt: datetime):
+    """The ORM path as it is now: no patients joined."""
+    return await list_appointments_between(start_dt, end_dt)
+
+
+async def schedule_between(start_dt: datetime, end_dt: datetime) -> ResourceSchedule:
+    """What list_available_slots_for_date / _between read."""
+    async with session_scope() as db:
+        return await _schedule_between(db, start_dt, end_dt)
+
+
+async def timed(repeat: int, calls):
+    """Median ms per call of `calls`, a list of zero-argument coroutine functions."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        for call in calls:
+            started = time.perf_counter()
+            result = await call()
+            timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, result
+
+
+async def main(args):
+    first_day = date.today() - timedelta(days=args.days // 2)
+    async with temp_database():
+        await seed_patients(args.patients)
+        await seed_appointments(
+            days=args.days, patients=args.patients, first_day=first_day
+        )
+        await seed_conversations(
+            args.conversations,
+            patients=args.patients,
+            messages_per_conversation=args.messages,
+        )
+        async with session_scope() as db:
+            conversation_ids = (
+                (await db.execute(select(Conversation.id).limit(args.conversations)))
+                .scalars()
+                .all()
+            )
+
+        day = datetime.combine(
+            first_day + timedelta(days=args.days // 2), datetime.min.time()
+        )
+        while day.weekday() == 6:
+            day += timedelta(days=1)
+        month = (day, day + timedelta(days=30))
+        one_day = (day, day + timedelta(days=1))
+        sample = range(0, args.patients, args.patients // 20 or 1)
+        patients = [bulk_patient_id(n) for n in sample]
+        phones = [bulk_phone_number(n) for n in sample]
+
+        cases = [
+            (
+                "availability: one day",
+                [lambda: joined_between(*one_day)],
+                [lambda: orm_between(*one_day)],
+                [lambda: schedule_between(*one_day)],
+            ),
+            (
+                "availability: 30 days",
+                [lambda: joined_between(*month)],
+                [lambda: orm_between(*month)],
+                [lambda: schedule_between(*month)],
+            ),
+            (
+                "patient: appointments",
+                [lambda p=p: joined_for_patient(p) for p in patients],
+                None,
+                [lambda p=p: list_appointment_rows_for_patient(p) for p in patients],
+            ),
+            (
+                "patient: by phone",
+                [lambda p=p: get_patient_by_phone(p) for p in phones],
+                None,
+                [lambda p=p: get_patient_row_by_phone(p) for p in phones],
+            ),
+            (
+                f"history: {args.messages} messages",
+                [lambda c=c: get_messages(c) for c in conversation_ids],
+                None,
+                [lambda c=c: get_message_rows(c) for c in conversation_ids],
+            ),
+        ]
+
+        print(
+            f"{args.patients} patients, {args.days} days of appointments, "
+            f"{args.conversations} conversations x {args.messages} messages; "
+            f"median ms per call"
+        )
+        print(
+            f"{'':>26} {'rows':>6} {'before':>8} {'ORM now':>8} "
+            f"{'Core':>10} {'speedup':>8}"
+        )
+        for label, before, orm_now, after in cases:
+            before_ms, before_result = await timed(args.repeat, before)
+            after_ms, after_result = await timed(args.repeat, after)
+            orm_ms = (await timed(args.repeat, orm_now))[0] if orm_now else None
+            rows = len(before_result) if isinstance(before_result, list) else 1
+            if isinstance(after_result, ResourceSchedule):
+                expected = ResourceSchedule(
+                    (a.resource_id, a.start_time, a.end_time) for a in before_result
+                )
+                assert after_result.busy == expected.busy, label
+            else:
+                after_rows = len(after_result) if isinstance(after_result, list) else 1
+                assert rows == after_rows, (label, rows, after_rows)
+            orm_cell = f"{orm_ms:>8.2f}" if orm_ms is not None else f"{'-':>8}"
+            print(
+                f"{label:>26} {rows:>6} {before_ms:>8.2f} {orm_cell} "
+                f"{after_ms:>10.2f} {before_ms / after_ms:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Read paths: ORM objects vs Core rows."
+    )
+    parser.add_argument("--patients", type=int, default=100)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -0,0 +1,263 @@
+# benchmarks/response_cache.py
+"""
+Replay FAQ-style questions (with paraphrases) and a few personal ones across
+many fresh conversations, anonymous and identified, through
+process_user_message with the response cache off and on. Every patient has
+their own insurance and upcoming appointment; the stub model waits --llm-ms
+and, asked about "my" profile, appointment or insurance, answers from the
+instructions (no tool call), so a leak would show up as another patient's
+name, appointment time or insurance in a reply.
+
+Prints the exact/similar hit rate, replies that differ from the uncached run,
+turn latency for both runs, and the similarity index's lookup cost with a
+full cache.
+
+    uv run python -m benchmarks.response_cache --turns 300 --llm-ms 800
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as clock
+
+from pydantic_ai.messages import ModelResponse, ToolCallPart, UserPromptPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from app import config
+from app.appointments.models import Appointment
+from app.conversations import appointment_agent
+from app.conversations.interface import process_user_message
+from app.conversations.models import Conversation
+from app.conversations.response_cache import ResponseCache, response_cache
+from app.db.utils import session_scope
+from app.metrics import registry
+from app.patient_info.models import Patient
+from benchmarks._db import temp_database
+
+FAQ = {
+    "hours": (
+        [
+            "What are your opening hours?",
+            "what are your opening hours",
+            "What are your hours?",
+            "When are you open?",
+            "what time do you open",
+            "What are your opening hours on weekdays?",
+        ],
+        "We're open Monday to Friday, 9 AM to 5 PM.",
+    ),
+    "insurance": (
+        [
+            "Which insurances do you accept?",
+            "which insurance do you accept?",
+            "Do you accept insurance?",
+            "What insurance providers do you take?",
+        ],
+        "We accept most major plans, including Delta Dental, Cigna and Aetna.",
+    ),
+    "cleaning": (
+        [
+            "How long does a cleaning take?",
+            "how long does a cleaning take??",
+            "How long is a cleaning appointment?",
+            "how long does a teeth cleaning take",
+        ],
+        "A regular cleaning takes about 30 minutes.",
+    ),
+}
+PERSONAL = [
+    "Can you remind me who I am registered as?",
+    "Is my profile up to date?",
+    "When is my next appointment?",
+    "What insurance is on my file?",
+]
+NAMES = ["Alice Moreno", "Bilal Haddad", "Chen Wei", "Dana Kowalski", "Emeka Obi"]
+INSURANCES = ["Guardian", "MetLife", "Humana", "Ameritas", "Principal"]
+# as the existing_appointment instructions format it
+APPOINTMENT_TIME = "%A, %b %d at %I:%M %p"
+_NEXT_APPOINTMENT = re.compile(r": \w+ on (\w+, \w+ \d+ at \d+:\d+ [AP]M)")
+_INSURANCE = re.compile(r"insurance: ([^.]+)\.")
+
+
+def stub_model(llm_ms: float) -> FunctionModel:
+    async def reply(messages, info: AgentInfo) -> ModelResponse:
+        await asyncio.sleep(llm_ms / 1000)
+        request = messages[-1]
+        prompt = next(
+            p.content for p in request.parts if isinstance(p, UserPromptPart)
+        ).lower()
+        instructions = request.instructions or ""
+        patient = re.search(r"The current patient is ([^,]+),", instructions)
+        if "my" in prompt.split() or "me" in prompt.split():
+            appointment = _NEXT_APPOINTMENT.search(instructions)
+            insurance = _INSURANCE.search(instructions)
+            if not patient:
+                text = "Could you share your phone number first?"
+            elif "appointment" in prompt and appointment:
+                text = f"Your next appointment is on {appointment.group(1)}."
+            elif "insurance" in prompt and insurance:
+                text = f"You're covered by {insurance.group(1)}."
+            else:
+                text = f"Of course, {patient.group(1)}! Everything looks current."
+        elif "insurance" in prompt:
+            text = FAQ["insurance"][1]
+        elif "clean" in prompt:
+            text = FAQ["cleaning"][1]
+        else:
+            text = FAQ["hours"][1]
+        return ModelResponse(
+            parts=[
+                ToolCallPart(
+                    tool_name=info.output_tools[0].name, args={"message": text}
+                )
+            ]
+        )
+
+    return FunctionModel(reply)
+
+
+def private_details(patient: Patient, start: datetime) -> list:
+    """What another patient's reply must never contain."""
+    return [
+        patient.full_name.split()[0],
+        patient.insurance_name,
+        start.strftime(APPOINTMENT_TIME),
+    ]
+
+
+async def seed_patients() -> dict:
+    """Patients with one upcoming appointment each -> their private details."""
+    details = {}
+    async with session_scope() as db:
+        for i, name in enumerate(NAMES):
+            patient = Patient(
+                full_name=name,
+                phone_number=f"+1555000{i:04d}",
+                date_of_birth=date(1980 + i, 1, 1),
+                insurance_name=INSURANCES[i],
+            )
+            start = datetime.combine(date.today() + timedelta(days=i + 2), clock(9 + i))
+            db.add(patient)
+            db.add(
+                Appointment(
+                    patient_id=patient.id,
+                    appointment_type="cleaning",
+                    start_time=start,
+                    end_time=start + timedelta(minutes=45),
+                    target_date=start.date(),
+                )
+            )
+            details[patient] = private_details(patient, start)
+        await db.commit()
+    return details
+
+
+async def new_conversation(patient) -> str:
+    async with session_scope() as db:
+        conversation = Conversation(
+            patient_id=patient.id if patient else None, status="active"
+        )
+        db.add(conversation)
+        await db.commit()
+        return conversation.id
+
+
+async def replay(turns: list, details: dict, enabled: bool):
+    """
+    Per-turn seconds, replies, and how many replies carried a different
+    patient's name, appointment time or insurance.
+    """
+    config.RESPONSE_CACHE_ENABLED = enabled
+    response_cache.clear()
+    latencies, replies, leaks = [], [], 0
+    for patient, message in turns:
+        conversation_id = await new_conversation(patient)
+        started = time.perf_counter()
+        _, reply = await process_user_message(
+            conversation_id=conversation_id, content=message
+        )
+        latencies.append(time.perf_counter() - started)
+        replies.append(reply)
+        others = [
+            detail
+            for other, private in details.items()
+            if other is not patient
+            for detail in private
+        ]
+        leaks += any(detail in reply for detail in others)
+    return latencies, replies, leaks
+
+
+def lookup_cost(entries: int, lookups: int) -> float:
+    """Seconds per missed lookup (exact miss + similarity scan) in a full cache."""
+    cache = ResponseCache(maxsize=entries, similarity=0.9)
+    for i in range(entries):
+        cache.set(
+            "anonymous", f"question number {i} about topic {i * 7919 % 1000}", "a"
+        )
+    started = time.perf_counter()
+    for i in range(lookups):
+        cache.get("anonymous", f"an unrelated message {i}")
+    return (time.perf_counter() - started) / lookups
+
+
+async def main(turns: int, llm_ms: float):
+    rng = random.Random(7)
+    messages = [m for questions, _ in FAQ.values() for m in questions]
+    async with temp_database():
+        details = await seed_patients()
+        patients = list(details)
+        corpus = [
+            (
+                rng.choice([None, *patients]),
+                rng.choice(PERSONAL) if rng.random() < 0.15 else rng.choice(messages),
+            )
+            for _ in range(turns)
+        ]
+        cache_enabled = config.RESPONSE_CACHE_ENABLED
+        with appointment_agent.dental_agent.override(model=stub_model(llm_ms)):
+            baseline, expected, _ = await replay(corpus, details, False)
+            registry.reset()
+            cached, replies, leaks = await replay(corpus, details, True)
+        config.RESPONSE_CACHE_ENABLED = cache_enabled
+
+    print(f"{turns} turns, stub model {llm_ms:.0f} ms")
+    print(
+        f"hit rate: {response_cache.hit_rate:.0%} "
+        f"({response_cache.exact_hits} exact, {response_cache.similar_hits} similar, "
+        f"{response_cache.misses} misses)"
+    )
+    wrong = sum(a != b for a, b in zip(replies, expected))
+    print(
+        f"replies differing from the uncached run: {wrong}; replies with another "
+        f"patient's name, appointment or insurance: {leaks}"
+    )
+    print(f"{'':>10} {'mean ms':>9} {'p50 ms':>9}")
+    for label, samples in (("cache off", baseline), ("cache on", cached)):
+        print(
+            f"{label:>10} {statistics.mean(samples) * 1000:>9.1f} "
+            f"{statistics.median(samples) * 1000:>9.1f}"
+        )
+    counters = ", ".join(f"{k}={v}" for k, v in sorted(registry.counters.items()))
+    print(f"/metrics counters: {counters}")
+
+    per_lookup = lookup_cost(config.RESPONSE_CACHE_SIZE, 500)
+    print(
+        f"similarity index: {per_lookup * 1e6:.0f} µs per missed lookup "
+        f"with {config.RESPONSE_CACHE_SIZE} entries"
+    )
+    if leaks or wrong:
+        raise SystemExit("the cache served a wrong or patient-specific reply")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Response cache hit rate and saving.")
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--llm-ms", type=float, default=800)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.turns, args.llm_ms))
@@ -0,0 +1,122 @@
+# benchmarks/serialization.py
+"""
+Per-model serialization microbenchmarks, in microseconds per row, over
+--rows rows of each seeded table:
+
+- as_dict:   the old mapper walk (getattr per column) vs the serializer
+             built once per model (app.db.serialization)
+- to dicts:  ORM select + as_dict vs a Core select of the columns read as
+             mappings, query included
+- encode:    stdlib json.dumps(default=str) vs app.json_codec.dumps (orjson)
+
+    uv run python -m benchmarks.serialization --rows 5000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from sqlalchemy import select
+
+from app import json_codec
+from app.appointments.fixtures import seed_appointments
+from app.appointments.models import Appointment
+from app.conversations.fixtures import seed_conversations
+from app.conversations.models import Conversation, Message
+from app.db.serialization import serializer
+from app.db.utils import session_scope
+from app.patient_info.fixtures import seed_patients
+from app.patient_info.models import Patient
+from benchmarks._db import temp_database
+
+MODELS = (Patient, Appointment, Conversation, Message)
+
+
+def legacy_as_dict(obj) -> dict:
+    dict_ = {}
+    for key in obj.__mapper__.c.keys():  # noqa: SIM118 - iterating c yields columns
+        dict_[key] = getattr(obj, key)
+    return dict_
+
+
+def per_row(repeat: int, rows: int, run) -> float:
+    """Best of `repeat` runs, in microseconds per row."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best / rows * 1e6
+
+
+async def per_row_async(repeat: int, rows: int, run) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await run()
+        best = min(best, time.perf_counter() - started)
+    return best / rows * 1e6
+
+
+async def measure(model, rows: int, repeat: int) -> dict:
+    async with session_scope() as db:
+        objects = (await db.execute(select(model).limit(rows))).unique().scalars().all()
+    rows = len(objects)
+    to_dict = serializer(model)
+    assert [to_dict(o) for o in objects] == [legacy_as_dict(o) for o in objects]
+
+    async def orm_dicts():
+        async with session_scope() as db:
+            result = await db.execute(select(model).limit(rows))
+            return [o.as_dict() for o in result.unique().scalars()]
+
+    async def core_dicts():
+        async with session_scope() as db:
+            result = await db.execute(select(*model.__table__.c).limit(rows))
+            return [dict(row) for row in result.mappings()]
+
+    assert await orm_dicts() == await core_dicts()
+    dicts = await core_dicts()
+    return {
+        "rows": rows,
+        "as_dict: mapper walk": per_row(
+            repeat, rows, lambda: [legacy_as_dict(o) for o in objects]
+        ),
+        "as_dict: serializer": per_row(
+            repeat, rows, lambda: [to_dict(o) for o in objects]
+        ),
+        "to dicts: ORM + as_dict": await per_row_async(repeat, rows, orm_dicts),
+        "to dicts: Core rows": await per_row_async(repeat, rows, core_dicts),
+        "encode: json": per_row(repeat, rows, lambda: json.dumps(dicts, default=str)),
+        "encode: json_codec": per_row(repeat, rows, lambda: json_codec.dumps(dicts)),
+    }
+
+
+async def main(args):
+    async with temp_database():
+        await seed_patients(args.rows)
+        await seed_conversations(
+            max(1, args.rows // 10), patients=args.rows, messages_per_conversation=10
+        )
+        await seed_appointments(days=max(1, args.rows // 40), patients=args.rows)
+        results = {
+            model.__name__: await measure(model, args.rows, args.repeat)
+            for model in MODELS
+        }
+
+    print(f"microseconds per row, best of {args.repeat}")
+    stages = [key for key in next(iter(results.values())) if key != "rows"]
+    print(f"{'':>25}" + "".join(f"{name:>13}" for name in results))
+    print(f"{'rows':>25}" + "".join(f"{r['rows']:>13}" for r in results.values()))
+    for stage in stages:
+        print(f"{stage:>25}" + "".join(f"{r[stage]:>13.2f}" for r in results.values()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-model serialization costs.")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
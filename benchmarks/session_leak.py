@@ -0,0 +1,38 @@
+# benchmarks/session_leak.py
+"""
+Call an interface function many times without passing `db` and check that the
+number of checked-out pooled connections stays flat.
+
+    uv run python -m benchmarks.session_leak --calls 10000
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.patient_info.interface import get_patient_by_phone
+from benchmarks._db import temp_database
+
+
+async def main(calls: int, sample_every: int):
+    async with temp_database() as engine:
+        samples = []
+        started = time.perf_counter()
+        for i in range(1, calls + 1):
+            await get_patient_by_phone(phone_number="+10000000000")
+            if i % sample_every == 0:
+                samples.append(engine.pool.checkedout())
+        elapsed = time.perf_counter() - started
+
+    print(f"{calls} calls in {elapsed:.2f}s ({calls / elapsed:.0f} calls/s)")
+    print(f"checked-out connections every {sample_every} calls: {samples}")
+    assert max(samples) == 0, "with_db leaked pooled connections"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check with_db for session leaks.")
+    parser.add_argument("--calls", type=int, default=10000)
+    parser.add_argument("--sample-every", type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.calls, args.sample_every))
@@ -0,0 +1,84 @@
+# benchmarks/slot_engine.py
+"""
+Compare the original per-candidate overlap loop with the merge + sweep slot
+engine (ResourceSchedule) on a single chair.
+
+    uv run python -m benchmarks.slot_engine --repeat 200
+"""
+
+import argparse
+import random
+import timeit
+from datetime import date, datetime, time, timedelta
+from functools import partial
+
+from app.appointments.interface import BUSINESS_CLOSE_HOUR, BUSINESS_OPEN_HOUR
+from app.appointments.slots import ResourceSchedule
+
+
+def legacy_slots(day_start, day_end, intervals, slot_minutes):
+    """The loop list_available_slots_for_date used before the sweep engine."""
+    slot_delta = timedelta(minutes=slot_minutes)
+    slots = []
+    cur = day_start
+    while cur + slot_delta <= day_end:
+        candidate_end = cur + slot_delta
+        conflict = any(
+            (cur < b_end) and (b_start < candidate_end) for b_start, b_end in intervals
+        )
+        if not conflict:
+            slots.append(cur)
+        cur += slot_delta
+    return slots
+
+
+def engine_slots(day_start, day_end, intervals, slot_minutes):
+    schedule = ResourceSchedule(("chair", start, end) for start, end in intervals)
+    return schedule.free_slots(day_start, day_end, ["chair"], slot_minutes=slot_minutes)
+
+
+def random_day(target_date: date, count: int, rng: random.Random):
+    intervals = []
+    for _ in range(count):
+        start = datetime.combine(
+            target_date,
+            time(
+                rng.randint(BUSINESS_OPEN_HOUR, BUSINESS_CLOSE_HOUR - 1),
+                rng.choice([0, 15, 30, 45]),
+            ),
+        )
+        intervals.append(
+            (start, start + timedelta(minutes=rng.choice([15, 30, 45, 60])))
+        )
+    return intervals
+
+
+def main(repeat: int, slot_minutes: int, seed: int):
+    rng = random.Random(seed)
+    target_date = date(2025, 11, 10)
+    day_start = datetime.combine(target_date, time(BUSINESS_OPEN_HOUR, 0))
+    day_end = datetime.combine(target_date, time(BUSINESS_CLOSE_HOUR, 0))
+
+    print(f"slot={slot_minutes}min repeat={repeat}")
+    print(f"{'appts/day':>10} {'legacy us':>12} {'engine us':>12} {'speedup':>9}")
+    for count in (10, 100, 1000):
+        # the availability query returns rows ordered by start_time
+        intervals = sorted(random_day(target_date, count, rng))
+        args = (day_start, day_end, intervals, slot_minutes)
+        assert legacy_slots(*args) == engine_slots(*args)
+
+        legacy = timeit.timeit(partial(legacy_slots, *args), number=repeat) / repeat
+        engine = timeit.timeit(partial(engine_slots, *args), number=repeat) / repeat
+        print(
+            f"{count:>10} {legacy * 1e6:>12.1f} {engine * 1e6:>12.1f} {legacy / engine:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the slot engine.")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--slot-minutes", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    main(args.repeat, args.slot_minutes, args.seed)
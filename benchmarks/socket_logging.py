@@ -0,0 +1,137 @@
+# benchmarks/socket_logging.py
+"""
+Socket.IO message throughput under the old logging setup (DEBUG socketio /
+engineio loggers with synchronous stderr handlers) versus the configured one
+(app/logging_config.py). Each mode runs in its own process with a real uvicorn
+server and an aiohttp Socket.IO client that sends echo events; log output goes
+to a temp file.
+
+    uv run python -m benchmarks.socket_logging --messages 5000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import socketio
+
+NAMESPACE = "/conversations"
+PORT = 8790
+
+
+def legacy_logging():
+    """What main.py and AsyncServer(logger=True, engineio_logger=True) did."""
+    for name in ("socketio.server", "engineio.server"):
+        logger = logging.getLogger(name)
+        logger.setLevel(logging.INFO)
+        logger.addHandler(logging.StreamHandler())
+    logging.getLogger("engineio").setLevel(logging.DEBUG)
+    logging.getLogger("socketio").setLevel(logging.DEBUG)
+
+
+async def run(mode: str, messages: int) -> float:
+    import uvicorn
+
+    import main
+    from app.logging_config import configure_logging
+    from app.websocket_app import sio
+
+    if mode == "legacy":
+        from app.logging_config import shutdown_logging
+
+        shutdown_logging()
+        logging.getLogger().handlers.clear()
+        legacy_logging()
+    else:
+        configure_logging()
+
+    async def bench_echo(sid, data):
+        await sio.emit("bench_echo", data, to=sid, namespace=NAMESPACE)
+
+    sio.on("bench_echo", bench_echo, namespace=NAMESPACE)
+
+    server = uvicorn.Server(uvicorn.Config(main.app, port=PORT, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    received = 0
+    done = asyncio.Event()
+
+    async def on_echo(data):
+        nonlocal received
+        received += 1
+        if received == messages:
+            done.set()
+
+    client = socketio.AsyncClient()
+    client.on("bench_echo", on_echo, namespace=NAMESPACE)
+    await client.connect(
+        f"http://127.0.0.1:{PORT}",
+        socketio_path="/ws/socket.io/",
+        namespaces=[NAMESPACE],
+        transports=["websocket"],
+    )
+
+    started = time.perf_counter()
+    for i in range(messages):
+        await client.emit(
+            "bench_echo", {"n": i, "content": "hello"}, namespace=NAMESPACE
+        )
+    await asyncio.wait_for(done.wait(), 120)
+    elapsed = time.perf_counter() - started
+
+    await client.disconnect()
+    server.should_exit = True
+    await serving
+    return elapsed
+
+
+def main(messages: int):
+    print(f"{messages} echo round trips over one websocket")
+    for mode in ("legacy", "configured"):
+        with tempfile.TemporaryFile("w+") as log:
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.socket_logging",
+                    "--mode",
+                    mode,
+                    "--messages",
+                    str(messages),
+                ],
+                stdout=subprocess.PIPE,
+                stderr=log,
+                text=True,
+                env=os.environ,
+                check=False,
+            )
+            log.seek(0)
+            lines = sum(1 for _ in log)
+        if result.returncode:
+            raise SystemExit(f"{mode} run failed")
+        elapsed = float(result.stdout.strip().splitlines()[-1])
+        print(
+            f"{mode:>10}: {messages / elapsed:8.0f} msg/s "
+            f"({elapsed:.2f} s, {lines} log lines)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Socket throughput vs logging setup.")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument(
+        "--mode", choices=("legacy", "configured"), help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    if args.mode:
+        print(asyncio.run(run(args.mode, args.messages)))
+    else:
+        main(args.messages)
@@ -0,0 +1,118 @@
+# benchmarks/startup_time.py
+"""
+Startup cost of the app, measured in fresh interpreters:
+
+- `python -X importtime -c "import main"`: total and the heaviest modules
+- which heavy stacks (pydantic-ai, model SDK, logfire) `import main` pulls in
+- time from spawning uvicorn to the first 200 from GET /
+
+    uv run python -m benchmarks.startup_time --runs 3 --max-import-ms 2000
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+PORT = 8795
+HEAVY = ("pydantic_ai", "google.genai", "logfire")
+IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)")
+
+
+def import_profile() -> list:
+    """(cumulative µs, self µs, depth, module) for each import of `import main`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((int(cumulative_us), int(self_us), len(indent) // 2, module))
+    return rows
+
+
+def loaded_heavy_modules() -> list:
+    code = (
+        f"import sys, main; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+def time_to_first_request(timeout: float = 60) -> float:
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(PORT),
+            "--log-level",
+            "warning",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                url = f"http://127.0.0.1:{PORT}/"
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError("server did not answer")
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+def main(runs: int, top: int, max_import_ms: float):
+    totals = []
+    for _ in range(runs):
+        rows = import_profile()
+        totals.append(next(c for c, _, depth, m in rows if m == "main") / 1000)
+    print(f"import main: {statistics.median(totals):.0f} ms (median of {runs})")
+
+    print("\nheaviest top-level imports (cumulative ms):")
+    top_level = sorted((r for r in rows if r[2] == 1), reverse=True)[:top]
+    for cumulative, _, _, module in top_level:
+        print(f"  {cumulative / 1000:8.1f}  {module}")
+
+    print("\nheaviest modules by self time (ms):")
+    for _, self_us, _, module in sorted(rows, key=lambda r: r[1], reverse=True)[:top]:
+        print(f"  {self_us / 1000:8.1f}  {module}")
+
+    heavy = loaded_heavy_modules()
+    print(f"\nheavy stacks loaded by `import main`: {', '.join(heavy) or 'none'}")
+
+    ttfr = [time_to_first_request() for _ in range(runs)]
+    print(f"time to first request: {statistics.median(ttfr) * 1000:.0f} ms (median)")
+
+    if max_import_ms and statistics.median(totals) > max_import_ms:
+        raise SystemExit(
+            f"import main took {statistics.median(totals):.0f} ms "
+            f"(max {max_import_ms:.0f})"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="App import and startup time.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-import-ms", type=float, default=0)
+    args = parser.parse_args()
+    main(args.runs, args.top, args.max_import_ms)
@@ -0,0 +1,113 @@
+# benchmarks/stream_ttft.py
+"""
+Time-to-first-token of the streaming reply path versus the blocking one, using
+a FunctionModel that emits the reply in chunks with a per-chunk delay.
+
+    uv run python -m benchmarks.stream_ttft --chunks 40 --chunk-ms 25
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, FunctionModel
+
+from app.conversations import appointment_agent
+from app.conversations.interface import (
+    create_conversation,
+    get_messages,
+    process_user_message,
+    stream_user_message,
+)
+from benchmarks._db import temp_database
+
+REPLY = (
+    "Sure! I can help you book a cleaning. We have openings on Monday at 9 AM, "
+    "Tuesday at 11:30 AM and Thursday at 2 PM. Which of these works best for you?"
+)
+
+
+def build_model(chunks: int, chunk_delay: float) -> FunctionModel:
+    args = json.dumps({"message": REPLY})
+    size = -(-len(args) // chunks)
+    pieces = [args[i : i + size] for i in range(0, len(args), size)]
+
+    async def blocking(messages, info: AgentInfo):
+        await asyncio.sleep(chunk_delay * len(pieces))
+        return ModelResponse(
+            parts=[ToolCallPart(tool_name=info.output_tools[0].name, args=args)]
+        )
+
+    async def streaming(messages, info: AgentInfo):
+        for i, piece in enumerate(pieces):
+            await asyncio.sleep(chunk_delay)
+            yield {
+                0: DeltaToolCall(
+                    name=info.output_tools[0].name if i == 0 else None,
+                    json_args=piece,
+                )
+            }
+
+    return FunctionModel(blocking, stream_function=streaming)
+
+
+async def streamed_turn(conversation_id: str) -> tuple:
+    """One streamed turn; returns (seconds to the first delta, seconds in all)."""
+    deltas, first = [], None
+    started = time.perf_counter()
+
+    async def on_delta(delta):
+        nonlocal first
+        if first is None:
+            first = time.perf_counter() - started
+        deltas.append(delta)
+
+    reply = await stream_user_message(
+        conversation_id=conversation_id,
+        content="Can I book a cleaning?",
+        on_delta=on_delta,
+    )
+    total = time.perf_counter() - started
+    assert reply == REPLY == "".join(deltas)
+    return first, total
+
+
+async def main(chunks: int, chunk_ms: float, turns: int):
+    model = build_model(chunks, chunk_ms / 1000)
+
+    async with temp_database():
+        conversation = await create_conversation()
+        with appointment_agent.dental_agent.override(model=model):
+            blocking, first_token, streamed_total = [], [], []
+            for _ in range(turns):
+                started = time.perf_counter()
+                await process_user_message(
+                    conversation_id=conversation.id, content="Can I book a cleaning?"
+                )
+                blocking.append(time.perf_counter() - started)
+
+                first, total = await streamed_turn(conversation.id)
+                first_token.append(first)
+                streamed_total.append(total)
+
+            stored = await get_messages(conversation.id)
+            assert len(stored) == 4 * turns, "each turn should store exactly 2 messages"
+
+    def ms(values):
+        return f"{sum(values) / len(values) * 1000:7.1f} ms"
+
+    print(f"blocking reply, first visible text: {ms(blocking)}")
+    print(f"streamed reply, first delta:        {ms(first_token)}")
+    print(f"streamed reply, complete:           {ms(streamed_total)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streaming time-to-first-token.")
+    parser.add_argument("--chunks", type=int, default=40)
+    parser.add_argument("--chunk-ms", type=float, default=25)
+    parser.add_argument("--turns", type=int, default=5)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.chunks, args.chunk_ms, args.turns))
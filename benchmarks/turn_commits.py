@@ -0,0 +1,233 @@
+# benchmarks/turn_commits.py
+"""
+Commits and latency per chat turn with the turn unit of work off (a commit
+per write, as before) and on (one commit per turn), on SQLite with durable
+settings: synchronous=FULL, so every commit is an fsync.
+
+Turn kinds, each on a fresh conversation with a stub model (no network):
+
+- new:      process_user_message without a conversation id
+- chat:     plain reply in an identified patient's conversation
+- identify: a bare phone number, answered by the intent router's lookup,
+            which links the patient to the conversation
+- book:     the model calls set_appointment, then replies
+
+Then a model call that raises, on a new and an existing conversation with
+the unit of work off and on: the patient's message (and the new
+conversation) must still be stored.
+
+    uv run python -m benchmarks.turn_commits --turns 50 --journal-mode WAL
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import date, timedelta
+
+from pydantic_ai.messages import ModelResponse, ToolCallPart, ToolReturnPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+from sqlalchemy import event, func, select
+
+from app import config
+from app.appointments.models import Appointment
+from app.conversations import appointment_agent
+from app.conversations.interface import process_user_message
+from app.conversations.models import Conversation, Message
+from app.db.utils import session_scope
+from app.patient_info.models import Patient
+from benchmarks._db import temp_database
+
+PHONE = "+15550004321"
+KINDS = ("new", "chat", "identify", "book")
+
+
+def booking_slot(n: int):
+    day = date.today()
+    for _ in range(n // 10 + 1):
+        day += timedelta(days=1)
+        while day.weekday() == 6:
+            day += timedelta(days=1)
+    return day.isoformat(), f"{8 + n % 10:02d}:00"
+
+
+class ModelUnavailable(Exception):
+    pass
+
+
+def stub_model() -> FunctionModel:
+    """Books when asked to, fails when asked to, answers otherwise."""
+
+    async def reply(messages, info: AgentInfo) -> ModelResponse:
+        request = messages[-1]
+        returns = [p for p in request.parts if isinstance(p, ToolReturnPart)]
+        prompt = str(request.parts[-1].content)
+        if prompt.startswith("fail "):
+            raise ModelUnavailable(prompt)
+        if not returns and prompt.startswith("book "):
+            _, day, hour = prompt.split()
+            call = ToolCallPart(
+                tool_name="set_appointment",
+                args={
+                    "appointment_type": "cleaning",
+                    "target_date": day,
+                    "preferred_time": hour,
+                },
+            )
+        else:
+            text = str(returns[-1].content) if returns else "Happy to help!"
+            call = ToolCallPart(
+                tool_name=info.output_tools[0].name, args={"message": text}
+            )
+        return ModelResponse(parts=[call])
+
+    return FunctionModel(reply)
+
+
+async def seed_turn(kind: str, patient: Patient, n: int):
+    """(conversation id or None, message) for one turn of `kind`."""
+    if kind == "new":
+        return None, "Hello, do you do whitening?"
+    async with session_scope() as db:
+        conversation = Conversation(
+            status="active", patient_id=None if kind == "identify" else patient.id
+        )
+        db.add(conversation)
+        await db.commit()
+    if kind == "identify":
+        return conversation.id, PHONE
+    if kind == "book":
+        return conversation.id, "book {} {}".format(*booking_slot(n))
+    return conversation.id, "Thanks, see you then."
+
+
+async def run(kind: str, patient: Patient, turns: int, commits: list) -> dict:
+    """Alternate turns with the unit of work off and on, so both see the same tables."""
+    results = {False: ([], []), True: ([], [])}
+    for n in range(turns):
+        for enabled in (False, True):
+            config.TURN_UNIT_OF_WORK = enabled
+            conversation_id, content = await seed_turn(kind, patient, 2 * n + enabled)
+            before = len(commits)
+            started = time.perf_counter()
+            await process_user_message(conversation_id=conversation_id, content=content)
+            latencies, per_turn = results[enabled]
+            latencies.append(time.perf_counter() - started)
+            per_turn.append(len(commits) - before)
+    return results
+
+
+async def failed_turns(patient: Patient) -> int:
+    """Turns whose model call fails; returns how many kept the patient's message."""
+    kept = 0
+    for enabled in (False, True):
+        config.TURN_UNIT_OF_WORK = enabled
+        for kind in ("new", "chat"):
+            conversation_id, _ = await seed_turn(kind, patient, 0)
+            content = f"fail {kind} {enabled}"
+            try:
+                await process_user_message(
+                    conversation_id=conversation_id, content=content
+                )
+            except ModelUnavailable:
+                pass
+            async with session_scope() as db:
+                stored = (
+                    (
+                        await db.execute(
+                            select(Message.conversation_id).where(
+                                Message.content == content
+                            )
+                        )
+                    )
+                    .scalars()
+                    .all()
+                )
+                if len(stored) == 1 and await db.get(Conversation, stored[0]):
+                    kept += 1
+    return kept
+
+
+async def main(args):
+    pragmas = {
+        **config.SQLITE_PRAGMAS,
+        "journal_mode": args.journal_mode,
+        "synchronous": "FULL",
+    }
+    saved = config.TURN_UNIT_OF_WORK, config.RESPONSE_CACHE_ENABLED
+    # identical replies would otherwise come from the response cache
+    config.RESPONSE_CACHE_ENABLED = False
+    results = {}
+    try:
+        async with temp_database(sqlite_pragmas=pragmas) as engine:
+            commits = []
+            event.listen(engine.sync_engine, "commit", lambda conn: commits.append(1))
+            async with session_scope() as db:
+                patient = Patient(
+                    full_name="Commit Bench",
+                    phone_number=PHONE,
+                    date_of_birth=date(1990, 1, 1),
+                )
+                db.add(patient)
+                await db.commit()
+
+            with appointment_agent.dental_agent.override(model=stub_model()):
+                for kind in KINDS:
+                    results[kind] = await run(kind, patient, args.turns, commits)
+                kept = await failed_turns(patient)
+
+            async with session_scope() as db:
+                booked = (await db.execute(select(func.count(Appointment.id)))).scalar()
+                stored = (
+                    await db.execute(select(func.count(Message.id)))
+                ).scalar() - kept
+    finally:
+        config.TURN_UNIT_OF_WORK, config.RESPONSE_CACHE_ENABLED = saved
+
+    print(
+        f"SQLite journal_mode={args.journal_mode} synchronous=FULL, "
+        f"{args.turns} turns per row"
+    )
+    print(
+        f"{'turn':>9} {'unit of work':>13} {'commits/turn':>13} "
+        f"{'p50 ms':>8} {'p95 ms':>8}"
+    )
+    summary = {}
+    for kind in KINDS:
+        for enabled in (False, True):
+            latencies, per_turn = results[kind][enabled]
+            latencies = sorted(latencies)
+            row = {
+                "commits_per_turn": statistics.mean(per_turn),
+                "p50_ms": statistics.median(latencies) * 1000,
+                "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+            }
+            summary[f"{kind}/{'on' if enabled else 'off'}"] = row
+            print(
+                f"{kind:>9} {'on' if enabled else 'off':>13} "
+                f"{row['commits_per_turn']:>13.2f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f}"
+            )
+    expected_messages = 2 * len(KINDS) * 2 * args.turns
+    print(f"{booked} appointments booked, {stored} messages stored")
+    if booked != 2 * args.turns or stored != expected_messages:
+        raise SystemExit(
+            f"expected {2 * args.turns} bookings and {expected_messages} messages"
+        )
+    print(f"failed model calls: {kept} of 4 patient messages kept")
+    if kept != 4:
+        raise SystemExit("a failed turn lost the patient's message")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Commits and latency per chat turn.")
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--journal-mode", default="WAL", choices=("WAL", "DELETE"))
+    parser.add_argument("--output", help="write the per-turn numbers as JSON here")
+    args = parser.parse_args()
+
+    summary = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
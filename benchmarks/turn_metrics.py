@@ -0,0 +1,99 @@
+# benchmarks/turn_metrics.py
+"""
+Run chat turns with a stub model that calls a couple of tools, then print the
+per-stage p50/p95/p99 table that /metrics exposes, plus the cost of one timed
+call compared to an untimed one.
+
+    uv run python -m benchmarks.turn_metrics --turns 50 --dump /tmp/metrics.json
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date, timedelta
+
+from pydantic_ai.messages import ModelResponse, ToolCallPart, ToolReturnPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from app.conversations import appointment_agent
+from app.conversations.interface import process_user_message
+from app.metrics import registry, timed
+from benchmarks._db import temp_database
+from benchmarks.turn_queries import seed
+
+
+def reply(messages, info: AgentInfo) -> ModelResponse:
+    """Look the patient up and check tomorrow's slots, then answer."""
+    if any(isinstance(part, ToolReturnPart) for part in messages[-1].parts):
+        return ModelResponse(
+            parts=[
+                ToolCallPart(
+                    tool_name=info.output_tools[0].name,
+                    args={"message": "We have openings tomorrow at 9 and 11."},
+                )
+            ]
+        )
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    return ModelResponse(
+        parts=[
+            ToolCallPart(tool_name="find_patient", args={"phone": "+15550000000"}),
+            ToolCallPart(
+                tool_name="get_available_slots", args={"target_date": tomorrow}
+            ),
+        ]
+    )
+
+
+async def overhead(calls: int) -> float:
+    """Extra seconds per call that the timed() wrapper adds."""
+
+    async def bare():
+        return None
+
+    wrapped = timed("benchmark.noop")(bare)
+
+    async def loop(func):
+        started = time.perf_counter()
+        for _ in range(calls):
+            await func()
+        return time.perf_counter() - started
+
+    return (await loop(wrapped) - await loop(bare)) / calls
+
+
+async def main(turns: int, dump: str):
+    registry.reset()
+    model = FunctionModel(reply)
+
+    async with temp_database():
+        conversation_id = await seed(history=20)
+        with appointment_agent.dental_agent.override(model=model):
+            for _ in range(turns):
+                await process_user_message(
+                    conversation_id=conversation_id, content="Any slots tomorrow?"
+                )
+
+    print(f"{'stage':<52} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for stage, stats in registry.snapshot().items():
+        print(
+            f"{stage:<52} {stats['count']:>6} {stats['p50'] * 1000:>8.2f} "
+            f"{stats['p95'] * 1000:>8.2f} {stats['p99'] * 1000:>8.2f}"
+        )
+
+    exposition = registry.render_prometheus()
+    print(f"\n/metrics body: {len(exposition.splitlines())} lines")
+    if dump:
+        registry.dump(dump)
+        print(f"snapshot written to {dump}")
+
+    per_call = await overhead(200_000)
+    print(f"timing overhead: {per_call * 1e6:.2f} µs per timed call")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage turn latency metrics.")
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--dump", default="", help="also write the JSON snapshot here")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.turns, args.dump))
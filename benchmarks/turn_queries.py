@@ -0,0 +1,99 @@
+# benchmarks/turn_queries.py
+"""
+Count SQL statements per chat turn with a stub model (no network) and fail if
+the agent side of a turn exceeds MAX_AGENT_QUERIES.
+
+    uv run python -m benchmarks.turn_queries --turns 5 --verbose
+"""
+
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta
+
+from pydantic_ai.models.test import TestModel
+
+from app.appointments.models import Appointment, AppointmentStatus
+from app.conversations import appointment_agent
+from app.conversations.interface import process_user_message
+from app.conversations.models import Conversation, Message, SenderTypeEnum
+from app.db.utils import count_queries, session_scope
+from app.patient_info.models import Patient
+from benchmarks._db import temp_database
+
+# conversation + patient, upcoming appointments, message window, and the
+# earlier-transcript update once the window is full
+MAX_AGENT_QUERIES = 4
+
+
+async def seed(history: int) -> str:
+    async with session_scope() as db:
+        patient = Patient(
+            full_name="Query Count",
+            phone_number="+15550000000",
+            date_of_birth=date(1990, 1, 1),
+        )
+        conversation = Conversation(patient=patient, status="active")
+        db.add_all([patient, conversation])
+        await db.flush()
+        start = datetime.combine(date.today() + timedelta(days=2), datetime.min.time())
+        for hour in (9, 11):
+            db.add(
+                Appointment(
+                    patient_id=patient.id,
+                    appointment_type="cleaning",
+                    start_time=start.replace(hour=hour),
+                    end_time=start.replace(hour=hour, minute=30),
+                    target_date=start.date(),
+                    status=AppointmentStatus.SCHEDULED.value,
+                )
+            )
+        for i in range(history):
+            db.add(
+                Message(
+                    conversation_id=conversation.id,
+                    sender_type=SenderTypeEnum.PATIENT.value
+                    if i % 2 == 0
+                    else SenderTypeEnum.AI_AGENT.value,
+                    content=f"history message {i}",
+                )
+            )
+        await db.commit()
+        return conversation.id
+
+
+async def main(turns: int, history: int, verbose: bool):
+    async with temp_database():
+        conversation_id = await seed(history)
+        model = TestModel(call_tools=[])
+
+        with appointment_agent.dental_agent.override(model=model):
+            for turn in range(turns):
+                with count_queries() as agent_counter:
+                    await appointment_agent.handle_user_message(
+                        conversation_id=conversation_id, message="Hi again"
+                    )
+                with count_queries() as turn_counter:
+                    await process_user_message(
+                        conversation_id=conversation_id, content="Hi again"
+                    )
+                print(
+                    f"turn {turn}: agent={agent_counter.count} queries, "
+                    f"process_user_message={turn_counter.count} queries"
+                )
+                if verbose:
+                    for statement in turn_counter.statements:
+                        print("   ", " ".join(statement.split())[:120])
+
+    assert agent_counter.count <= MAX_AGENT_QUERIES, (
+        f"agent turn ran {agent_counter.count} queries (max {MAX_AGENT_QUERIES})"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count DB queries per chat turn.")
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--history", type=int, default=20)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.turns, args.history, args.verbose))
@@ -0,0 +1,230 @@
+# benchmarks/turn_queue_load.py
+"""
+Drive thousands of simulated chat clients through the agent turn queue with a
+stub model (no network). Each client fires a burst of messages at its own
+conversation; clients that get a `busy` answer back off and resend.
+
+Checks that model calls never exceed the concurrency cap, that every message
+is stored once, on its own and in the order it was sent (coalesced messages
+share one turn and one reply), and reports coalescing/busy counts.
+Then the model fails every call: each conversation must get one error reply,
+and keep the patient's message.
+
+    uv run python -m benchmarks.turn_queue_load --clients 2000 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import random
+import time
+
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, FunctionModel
+
+from app import config
+from app.conversations import appointment_agent, websocket_events
+from app.conversations.interface import get_messages
+from app.conversations.models import Conversation, SenderTypeEnum
+from app.conversations.turn_queue import TurnQueue
+from app.db.utils import session_scope
+from benchmarks._db import temp_database
+
+REPLY = "Thanks! Let me check what we have open for you."
+
+
+class StubModel:
+    """FunctionModel wrapper that tracks how many calls are in flight."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+
+    def _enter(self):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    async def blocking(self, messages, info: AgentInfo):
+        self._enter()
+        try:
+            await asyncio.sleep(self.latency)
+            return ModelResponse(
+                parts=[
+                    ToolCallPart(
+                        tool_name=info.output_tools[0].name, args={"message": REPLY}
+                    )
+                ]
+            )
+        finally:
+            self.in_flight -= 1
+
+    async def streaming(self, messages, info: AgentInfo):
+        self._enter()
+        try:
+            await asyncio.sleep(self.latency)
+            yield {
+                0: DeltaToolCall(
+                    name=info.output_tools[0].name,
+                    json_args=f'{{"message": "{REPLY}"}}',
+                )
+            }
+        finally:
+            self.in_flight -= 1
+
+    def model(self) -> FunctionModel:
+        return FunctionModel(self.blocking, stream_function=self.streaming)
+
+
+async def create_conversations(count: int) -> list:
+    async with session_scope() as db:
+        conversations = [Conversation(status="active") for _ in range(count)]
+        db.add_all(conversations)
+        await db.commit()
+        return [str(c.id) for c in conversations]
+
+
+async def client(queue: TurnQueue, conversation_id: str, messages: int, gap: float):
+    busy = 0
+    for i in range(messages):
+        content = f"{conversation_id} message {i}"
+        while not queue.submit(conversation_id, content):
+            busy += 1
+            await asyncio.sleep(random.uniform(0.25, 1.0))
+        await asyncio.sleep(random.uniform(0, gap))
+    return busy
+
+
+async def failing_turns(count: int, concurrency: int) -> int:
+    """Turns on `count` conversations with a model that always fails; returns error replies."""
+
+    async def unavailable(messages, info: AgentInfo):
+        raise RuntimeError("model unavailable")
+
+    async def failing_stream(messages, info: AgentInfo):
+        raise RuntimeError("model unavailable")
+        yield
+
+    errors = []
+    emit = websocket_events.sio.emit
+
+    async def recording_emit(event, data=None, **kwargs):
+        if event == "new_message" and data.get("error"):
+            errors.append(data)
+        return await emit(event, data, **kwargs)
+
+    conversation_ids = await create_conversations(count)
+    queue = TurnQueue(
+        websocket_events._reply,
+        max_concurrency=concurrency,
+        max_waiting=count,
+        on_failure=websocket_events._turn_failed,
+    )
+    model = FunctionModel(unavailable, stream_function=failing_stream)
+    # every turn logs its traceback; expected here
+    queue_logger = logging.getLogger("app.conversations.turn_queue")
+    level = queue_logger.level
+    queue_logger.setLevel(logging.CRITICAL)
+    websocket_events.sio.emit = recording_emit
+    try:
+        with appointment_agent.dental_agent.override(model=model):
+            for cid in conversation_ids:
+                assert queue.submit(cid, f"{cid} hello")
+            await queue.join()
+    finally:
+        websocket_events.sio.emit = emit
+        queue_logger.setLevel(level)
+
+    assert queue.stats()["failed"] == count, queue.stats()
+    assert sorted(e["conversation_id"] for e in errors) == sorted(conversation_ids)
+    assert all(e["content"] == config.TURN_FAILED_REPLY for e in errors)
+    for cid in conversation_ids:
+        assert [m.content for m in await get_messages(cid)] == [f"{cid} hello"]
+    return len(errors)
+
+
+async def main(
+    clients: int,
+    messages: int,
+    concurrency: int,
+    max_waiting: int,
+    latency_ms: float,
+    gap_ms: float,
+):
+    stub = StubModel(latency_ms / 1000)
+    # the Socket.IO server logs every emit; keep the report readable
+    websocket_events.sio.logger.setLevel(logging.WARNING)
+
+    async with temp_database():
+        conversation_ids = await create_conversations(clients)
+        queue = TurnQueue(
+            websocket_events._reply,
+            max_concurrency=concurrency,
+            max_waiting=max_waiting,
+        )
+
+        with appointment_agent.dental_agent.override(model=stub.model()):
+            started = time.perf_counter()
+            busy = await asyncio.gather(
+                *(
+                    client(queue, cid, messages, gap_ms / 1000)
+                    for cid in conversation_ids
+                )
+            )
+            await queue.join()
+            elapsed = time.perf_counter() - started
+
+        # every message stored once, on its own and in send order, with one
+        # reply per turn after the messages it answered
+        for cid in random.sample(conversation_ids, min(200, clients)):
+            stored = await get_messages(cid)
+            patient = [m.sender_type == SenderTypeEnum.PATIENT.value for m in stored]
+            sent = [m.content for m, is_patient in zip(stored, patient) if is_patient]
+            assert sent == [f"{cid} message {i}" for i in range(messages)], sent
+            assert patient[0] and not patient[-1], patient
+            assert all(a or b for a, b in itertools.pairwise(patient)), patient
+
+        failed = min(clients, 100)
+        errors = await failing_turns(failed, concurrency)
+
+    stats = queue.stats()
+    assert stats["failed"] == 0, stats
+    assert stub.max_in_flight <= concurrency, (
+        f"{stub.max_in_flight} model calls in flight (cap {concurrency})"
+    )
+
+    print(f"clients:             {clients} x {messages} messages")
+    print(f"elapsed:             {elapsed:.2f} s")
+    print(
+        f"agent turns:         {stats['completed']} "
+        f"({stats['completed'] / elapsed:.0f}/s)"
+    )
+    print(f"coalesced messages:  {stats['coalesced']}")
+    print(f"busy responses:      {sum(busy)}")
+    print(f"max model in flight: {stub.max_in_flight} (cap {concurrency})")
+    print(f"failed turns:        {errors} of {failed} answered with an error reply")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Turn queue load test.")
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-waiting", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--gap-ms", type=float, default=30)
+    args = parser.parse_args()
+
+    asyncio.run(
+        main(
+            args.clients,
+            args.messages,
+            args.concurrency,
+            args.max_waiting,
+            args.latency_ms,
+            args.gap_ms,
+        )
+    )
@@ -1,21 +1,62 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 import pathlib
-from app.websocket_app import socket_app
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from app import config
+from app.json_codec import JSONResponse
+from app.logging_config import configure_logging, shutdown_logging
+from app.conversations.message_log import message_log
+from app.metrics import dump_periodically, registry
+from app.websocket_app import socket_app, start_client_manager
 
+configure_logging()
 
-import logging
 
-logging.getLogger("engineio").setLevel(logging.DEBUG)
-logging.getLogger("socketio").setLevel(logging.DEBUG)
+import app.conversations as app_conversations
+
+logger = logging.getLogger(__name__)
 
 
-import app.conversations
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_client_manager()
+    if config.MESSAGE_WRITE_BEHIND:
+        await message_log.start()
+    if config.AGENT_WARMUP:
+        # the server is already accepting requests while this runs
+        app.state.agent_warmup = asyncio.create_task(
+            asyncio.to_thread(app_conversations.load_agent)
+        )
+    dumper = None
+    if config.METRICS_DUMP_PATH:
+        dumper = asyncio.create_task(
+            dump_periodically(
+                config.METRICS_DUMP_PATH, config.METRICS_DUMP_INTERVAL_SECONDS
+            )
+        )
+    yield
+    # turns still running write messages and log records: let them finish
+    # before the message log and the log listener stop
+    turn_queue = app_conversations.websocket_events.turn_queue
+    try:
+        await asyncio.wait_for(turn_queue.join(), config.SHUTDOWN_DRAIN_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning("Shutting down with turns unfinished", extra=turn_queue.stats())
+    # before the final metrics dump, so it counts the last flush
+    await message_log.stop()
+    if dumper:
+        dumper.cancel()
+        registry.dump(config.METRICS_DUMP_PATH)
+    shutdown_logging()
 
 
-app = FastAPI(title="Dental Chatbot")
+app = FastAPI(
+    title="Dental Chatbot", lifespan=lifespan, default_response_class=JSONResponse
+)
 
 app.mount("/ws", socket_app)
 
@@ -39,6 +80,15 @@ async def home():
     return HTMLResponse(content=html_file.read_text(), status_code=200)
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(
+        registry.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.post("/chat")
 async def chat(request: Request):
     data = await request.json()
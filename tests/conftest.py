@@ -0,0 +1,11 @@
+# tests/conftest.py
+import pytest
+
+from tests.helpers import temp_database
+
+
+@pytest.fixture
+async def database():
+    """A throwaway SQLite database every with_db call uses; yields its engine."""
+    async with temp_database() as engine:
+        yield engine
@@ -0,0 +1,45 @@
+# tests/helpers.py
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from pathlib import Path
+
+# the model modules register every table on Base.metadata
+import app.appointments.models
+import app.conversations.models
+import app.patient_info.models  # noqa: F401
+from app.db.database import AsyncSessionLocal, Base, build_engine
+
+
+async def create_schema(database_url: str, **engine_kwargs):
+    """Create every table on a new database; returns its engine."""
+    engine = build_engine(database_url, **engine_kwargs)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+@asynccontextmanager
+async def temp_database(**engine_kwargs):
+    """
+    A throwaway SQLite file with the full schema, with AsyncSessionLocal (and
+    so every with_db call) pointed at it. `engine_kwargs` go to build_engine.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = await create_schema(
+            f"sqlite+aiosqlite:///{Path(tmp) / 'test.db'}", **engine_kwargs
+        )
+        previous = AsyncSessionLocal.kw["bind"]
+        AsyncSessionLocal.configure(bind=engine)
+        try:
+            yield engine
+        finally:
+            AsyncSessionLocal.configure(bind=previous)
+            await engine.dispose()
+
+
+def next_business_day() -> date:
+    day = date.today() + timedelta(days=1)
+    while day.weekday() == 6:
+        day += timedelta(days=1)
+    return day
@@ -0,0 +1,59 @@
+# tests/multi_worker_app.py
+"""
+A worker process for tests/test_multi_worker.py: the real app, served on
+the given port, with a stub model that names the worker it runs on.
+
+    python -m tests.multi_worker_app PORT
+"""
+
+import asyncio
+import json
+import sys
+
+import uvicorn
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, FunctionModel
+
+import main
+from app.conversations import appointment_agent
+from app.websocket_app import sio
+
+
+def reply(messages) -> str:
+    prompt = messages[-1].parts[-1].content
+    return f"worker {sio.manager.worker_id}: {prompt}"
+
+
+async def blocking(messages, info: AgentInfo):
+    return ModelResponse(
+        parts=[
+            ToolCallPart(
+                tool_name=info.output_tools[0].name,
+                args={"message": reply(messages)},
+            )
+        ]
+    )
+
+
+async def streaming(messages, info: AgentInfo):
+    yield {
+        0: DeltaToolCall(
+            name=info.output_tools[0].name,
+            json_args=json.dumps({"message": reply(messages)}),
+        )
+    }
+
+
+async def serve(port: int):
+    model = FunctionModel(blocking, stream_function=streaming)
+    with appointment_agent.dental_agent.override(model=model):
+        server = uvicorn.Server(
+            uvicorn.Config(main.app, port=port, log_level="warning")
+        )
+        await server.serve()
+    if not server.started:
+        sys.exit(3)
+
+
+if __name__ == "__main__":
+    asyncio.run(serve(int(sys.argv[1])))
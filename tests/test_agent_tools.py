@@ -0,0 +1,38 @@
+# tests/test_agent_tools.py
+from datetime import date
+
+from pydantic_ai.messages import ModelResponse, ToolCallPart, ToolReturnPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from app.conversations import appointment_agent
+from app.patient_info.interface import add_patient
+
+PHONE = "+15550001111"
+
+
+async def test_find_patient_without_a_stored_conversation(database):
+    await add_patient(
+        full_name="No Conversation", phone_number=PHONE, date_of_birth=date(1990, 1, 1)
+    )
+    returned = []
+
+    async def model(messages, info: AgentInfo):
+        results = [
+            part.content
+            for part in messages[-1].parts
+            if isinstance(part, ToolReturnPart)
+        ]
+        if not results:
+            return ModelResponse(parts=[ToolCallPart("find_patient", {"phone": PHONE})])
+        returned.extend(results)
+        return ModelResponse(
+            parts=[ToolCallPart(info.output_tools[0].name, {"message": "Found you."})]
+        )
+
+    with appointment_agent.dental_agent.override(model=FunctionModel(model)):
+        reply = await appointment_agent.handle_user_message(
+            conversation_id="missing", message=f"My number is {PHONE}"
+        )
+
+    assert reply == "Found you."
+    assert returned and returned[0].startswith("Patient found: No Conversation")
@@ -0,0 +1,42 @@
+# tests/test_availability_cache.py
+import asyncio
+from datetime import date, datetime
+
+from app.appointments.cache import AvailabilityCache
+from app.websocket_app import share_invalidations
+from app.websocket_manager import build_client_manager
+
+DAY = date(2030, 1, 7)
+SLOTS = [datetime(2030, 1, 7, 9), datetime(2030, 1, 7, 10)]
+
+
+async def test_invalidation_reaches_other_workers():
+    caches = [AvailabilityCache(), AvailabilityCache()]
+    managers = [
+        build_client_manager("memory://", channel="test-invalidation", worker_count=2)
+        for _ in caches
+    ]
+    listeners = []
+    for manager, cache in zip(managers, caches):
+        share_invalidations(manager, cache)
+        cache.set(DAY, 30, SLOTS)
+        listeners.append(asyncio.create_task(_drain(manager)))
+    await asyncio.sleep(0)
+
+    caches[0].invalidate(DAY)
+    for _ in range(100):
+        if caches[1].get(DAY, 30) is None:
+            break
+        await asyncio.sleep(0.01)
+
+    for listener in listeners:
+        listener.cancel()
+    assert caches[0].get(DAY, 30) is None
+    assert caches[1].get(DAY, 30) is None
+    # a reader that queried before the invalidation can't store stale slots
+    assert caches[1].version(DAY) == 1
+
+
+async def _drain(manager):
+    async for _ in manager._listen():
+        pass
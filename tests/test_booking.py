@@ -0,0 +1,116 @@
+# tests/test_booking.py
+import asyncio
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.appointments.interface import (
+    book_appointment,
+    eligible_resources,
+    reschedule_appointment,
+)
+from app.appointments.models import Appointment, AppointmentStatus
+from app.db.utils import unit_of_work
+from app.patient_info.models import Patient
+from tests.helpers import next_business_day, temp_database
+
+CLIENTS = 300
+
+
+@pytest.fixture
+async def engine():
+    async with temp_database(
+        pool_size=20, max_overflow=0, pool_timeout=120, connect_args={"timeout": 120}
+    ) as engine:
+        yield engine
+
+
+async def add_patients(engine, count: int) -> list:
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        patients = [
+            Patient(
+                full_name=f"Stress Patient {i}",
+                phone_number=f"+1555{i:07d}",
+                date_of_birth=date(1990, 1, 1),
+            )
+            for i in range(count)
+        ]
+        db.add_all(patients)
+        await db.commit()
+    return [p.id for p in patients]
+
+
+async def scheduled(engine) -> list:
+    """(resource_id, start_time) of every scheduled appointment."""
+    async with AsyncSession(engine) as db:
+        result = await db.execute(
+            select(Appointment.resource_id, Appointment.start_time).where(
+                Appointment.status == AppointmentStatus.SCHEDULED.value
+            )
+        )
+        return [tuple(row) for row in result]
+
+
+def ten_am() -> datetime:
+    return datetime.combine(next_business_day(), datetime.min.time()).replace(hour=10)
+
+
+@pytest.mark.parametrize("in_turn", [False, True], ids=["own session", "turn"])
+async def test_concurrent_bookings_fill_each_chair_once(engine, in_turn):
+    patient_ids = await add_patients(engine, CLIENTS)
+    slot = ten_am()
+
+    async def attempt(patient_id):
+        db = AsyncSession(engine, expire_on_commit=False)
+        async with db, unit_of_work(db) if in_turn else nullcontext():
+            try:
+                await book_appointment(
+                    patient_id=patient_id,
+                    appointment_type="cleaning",
+                    start_time_iso=slot.isoformat(),
+                    db=db,
+                )
+            except ValueError:
+                return False
+            # the rest of the turn runs before its single commit
+            await asyncio.sleep(0)
+            return True
+
+    results = await asyncio.gather(*(attempt(p) for p in patient_ids))
+
+    chairs = eligible_resources("cleaning")
+    assert sum(results) == len(chairs)
+    assert sorted(r for r, _ in await scheduled(engine)) == sorted(chairs)
+
+
+async def test_concurrent_reschedules_never_share_a_chair(engine):
+    patient_ids = await add_patients(engine, CLIENTS)
+    chairs = eligible_resources("cleaning")
+    first = ten_am() - timedelta(hours=2)
+    appointment_ids = []
+    for n, patient_id in enumerate(patient_ids):
+        start = first + timedelta(days=7 * (n // len(chairs)))
+        appointment = await book_appointment(
+            patient_id=patient_id,
+            appointment_type="cleaning",
+            start_time_iso=start.isoformat(),
+        )
+        appointment_ids.append(appointment.id)
+    slot = ten_am()
+
+    async def attempt(appointment_id):
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            try:
+                await reschedule_appointment(appointment_id, slot.isoformat(), db=db)
+                return True
+            except ValueError:
+                return False
+
+    results = await asyncio.gather(*(attempt(a) for a in appointment_ids))
+
+    at_slot = [r for r, start in await scheduled(engine) if start == slot]
+    assert sum(results) == len(chairs)
+    assert sorted(at_slot) == sorted(chairs)
@@ -0,0 +1,66 @@
+# tests/test_message_journal.py
+import asyncio
+import os
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select
+
+from app.conversations.message_log import MessageLog
+from app.conversations.models import Conversation, Message, SenderTypeEnum
+from app.db.base_model import new_id
+from app.db.utils import session_scope
+
+APPENDS = 200
+
+
+async def seed_conversation() -> str:
+    async with session_scope() as db:
+        conversation = Conversation(status="active")
+        db.add(conversation)
+        await db.commit()
+        return conversation.id
+
+
+def message_row(conversation_id: str, content: str) -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "id": new_id(),
+        "conversation_id": conversation_id,
+        "sender_type": SenderTypeEnum.PATIENT.value,
+        "content": content,
+        "meta": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+async def test_fsynced_appends_share_syncs_and_survive_a_crash(
+    database, tmp_path, monkeypatch
+):
+    syncs = []
+    real_fsync = os.fsync
+
+    def counting_fsync(fd):
+        syncs.append(fd)
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", counting_fsync)
+    conversation_id = await seed_conversation()
+    journal = str(tmp_path / "messages.jsonl")
+
+    crashed = MessageLog(max_delay=3600, journal_path=journal, journal_fsync=True)
+    await crashed.start()
+    await asyncio.gather(
+        *(crashed.append(message_row(conversation_id, f"m{n}")) for n in range(APPENDS))
+    )
+    # the process dies: no flush, the journal stays behind
+    crashed._task.cancel()
+
+    assert 0 < len(syncs) < APPENDS
+
+    restarted = MessageLog(journal_path=journal)
+    await restarted.start()
+    await restarted.stop()
+    async with session_scope() as db:
+        stored = (await db.execute(select(func.count(Message.id)))).scalar()
+    assert stored == APPENDS
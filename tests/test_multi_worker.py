@@ -0,0 +1,199 @@
+# tests/test_multi_worker.py
+"""
+Several app processes sharing a SQLite-backed Socket.IO message queue and a
+database, as `uvicorn --workers N` runs them. The Socket.IO test clients use
+aiohttp, from the dev dependency group.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import zlib
+from pathlib import Path
+
+import pytest
+
+from app import websocket_app
+from tests.helpers import create_schema
+
+socketio = pytest.importorskip("socketio")
+pytest.importorskip("aiohttp")
+
+NAMESPACE = "/conversations"
+WORKERS = 3
+CONVERSATIONS = 6
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise TimeoutError(f"worker on port {port} did not start")
+
+
+def claimed_id(log: Path) -> int:
+    """The worker id a worker logged claiming at startup."""
+    for line in log.read_text().splitlines():
+        if "Worker id claimed" in line:
+            return json.loads(line)["worker_id"]
+    raise RuntimeError(f"{log.name}: no worker id claimed")
+
+
+class Cluster:
+    def __init__(self, tmp: Path):
+        self.tmp = tmp
+        self.database_url = f"sqlite+aiosqlite:///{tmp / 'app.db'}"
+        self.processes = []
+        self.ports = []
+
+    def start(self, name: str, port: int, **env) -> subprocess.Popen:
+        with open(self.tmp / f"{name}.log", "w") as log:
+            return subprocess.Popen(
+                [sys.executable, "-m", "tests.multi_worker_app", str(port)],
+                env=dict(
+                    os.environ,
+                    DATABASE_URL=self.database_url,
+                    SOCKETIO_MESSAGE_QUEUE=f"sqlite:///{self.tmp / 'bus.db'}",
+                    WORKER_COUNT=str(WORKERS),
+                    LOG_FORMAT="json",
+                    PYTHONUNBUFFERED="1",
+                    **env,
+                ),
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+
+    def worker_id(self, n: int) -> int:
+        return claimed_id(self.tmp / f"worker{n}.log")
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.wait(10)
+
+
+@pytest.fixture(scope="module")
+def cluster(tmp_path_factory):
+    cluster = Cluster(tmp_path_factory.mktemp("cluster"))
+
+    async def schema():
+        engine = await create_schema(cluster.database_url)
+        await engine.dispose()
+
+    asyncio.run(schema())
+    try:
+        for n in range(WORKERS):
+            port = free_port()
+            cluster.processes.append(cluster.start(f"worker{n}", port))
+            cluster.ports.append(port)
+        for port in cluster.ports:
+            wait_for_port(port)
+        yield cluster
+    finally:
+        cluster.stop()
+
+
+class Client:
+    def __init__(self):
+        self.sio = socketio.AsyncClient()
+        self.started = asyncio.Queue()
+        self.replies = asyncio.Queue()
+        self.sio.on("conversation_started", self.started.put, namespace=NAMESPACE)
+        self.sio.on("new_message", self.replies.put, namespace=NAMESPACE)
+
+    async def connect(self, port: int):
+        await self.sio.connect(
+            f"http://127.0.0.1:{port}",
+            socketio_path="/ws/socket.io/",
+            namespaces=[NAMESPACE],
+            transports=["websocket"],
+        )
+
+    async def wait_for_reply(self, conversation_id: str, content: str):
+        """
+        Wait for a specific reply; replies for other rooms this client joined
+        (or late copies of earlier ones) are skipped.
+        """
+        while True:
+            reply = await asyncio.wait_for(self.replies.get(), 10)
+            if reply == {"conversation_id": conversation_id, "content": content}:
+                return
+
+
+def test_workers_claim_distinct_ids(cluster):
+    worker_ids = [cluster.worker_id(n) for n in range(WORKERS)]
+    assert sorted(worker_ids) == list(range(WORKERS))
+
+
+async def test_turns_run_on_their_owner_and_reach_every_worker(cluster):
+    clients = [Client() for _ in cluster.ports]
+    for client, port in zip(clients, cluster.ports):
+        await client.connect(port)
+
+    try:
+        for n in range(CONVERSATIONS):
+            starter = clients[n % WORKERS]
+            other = clients[(n + 1) % WORKERS]
+
+            await starter.sio.emit(
+                "start_conversation", {"content": "Hi"}, namespace=NAMESPACE
+            )
+            started = await asyncio.wait_for(starter.started.get(), 10)
+            conversation_id = started["conversation_id"]
+            owner = zlib.crc32(conversation_id.encode()) % WORKERS
+            await starter.wait_for_reply(conversation_id, f"worker {owner}: Hi")
+
+            # a client on another worker posts to the same conversation; both
+            # clients see the reply, wherever the turn ran
+            await other.sio.emit(
+                "send_message",
+                {"conversation_id": conversation_id, "content": "Tomorrow?"},
+                namespace=NAMESPACE,
+            )
+            expected = f"worker {owner}: Tomorrow?"
+            await other.wait_for_reply(conversation_id, expected)
+            await starter.wait_for_reply(conversation_id, expected)
+    finally:
+        for client in clients:
+            await client.sio.disconnect()
+
+
+@pytest.mark.parametrize(
+    "taken_id", [True, False], ids=["taken WORKER_ID", "no free id"]
+)
+def test_one_worker_too_many_is_refused(cluster, taken_id):
+    env = {"WORKER_ID": str(cluster.worker_id(0))} if taken_id else {}
+    process = cluster.start("extra", free_port(), **env)
+    try:
+        code = process.wait(30)
+    except subprocess.TimeoutExpired:
+        process.terminate()
+        process.wait(10)
+        pytest.fail("the extra worker started")
+    assert code != 0
+    assert "taken" in (cluster.tmp / "extra.log").read_text()
+
+
+def test_a_single_worker_claims_no_id(monkeypatch):
+    """Without a message queue, any number of app processes can run side by side."""
+
+    def claim(*args, **kwargs):
+        raise AssertionError("claimed a worker id without a message queue")
+
+    monkeypatch.setattr(websocket_app, "claim_worker_id", claim)
+    monkeypatch.setattr(websocket_app.sio, "manager_initialized", False)
+    websocket_app.start_client_manager()
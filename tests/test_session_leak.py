@@ -0,0 +1,8 @@
+# tests/test_session_leak.py
+from app.patient_info.interface import get_patient_by_phone
+
+
+async def test_with_db_returns_its_connections(database):
+    for _ in range(1000):
+        await get_patient_by_phone(phone_number="+10000000000")
+        assert database.pool.checkedout() == 0
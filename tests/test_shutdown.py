@@ -0,0 +1,33 @@
+# tests/test_shutdown.py
+import asyncio
+import io
+import logging
+
+import main
+from app import config
+from app.conversations import websocket_events
+from app.conversations.turn_queue import TurnQueue
+from app.logging_config import configure_logging
+
+
+async def test_shutdown_finishes_turns_and_keeps_their_logs(monkeypatch):
+    output = io.StringIO()
+    configure_logging(fmt="text", stream=output, sample_rates={})
+    log = logging.getLogger("tests.shutdown")
+
+    async def slow_turn(conversation_id, content):
+        await asyncio.sleep(0.2)
+        log.info("turn of %s done", conversation_id)
+
+    monkeypatch.setattr(config, "AGENT_WARMUP", False)
+    monkeypatch.setattr(websocket_events, "turn_queue", TurnQueue(slow_turn))
+    try:
+        async with main.lifespan(main.app):
+            websocket_events.turn_queue.submit("conversation-1", "hello")
+        log.info("after shutdown")
+    finally:
+        configure_logging()
+
+    assert websocket_events.turn_queue.completed == 1
+    assert "turn of conversation-1 done" in output.getvalue()
+    assert "after shutdown" in output.getvalue()
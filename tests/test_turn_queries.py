@@ -0,0 +1,62 @@
+# tests/test_turn_queries.py
+from datetime import date, datetime, timedelta
+
+from pydantic_ai.models.test import TestModel
+
+from app.appointments.models import Appointment, AppointmentStatus
+from app.conversations import appointment_agent
+from app.conversations.models import Conversation, Message, SenderTypeEnum
+from app.db.utils import count_queries, session_scope
+from app.patient_info.models import Patient
+
+# conversation + patient, upcoming appointments, message window, and the
+# earlier-transcript update once the window is full
+MAX_AGENT_QUERIES = 4
+
+
+async def seed(history: int) -> str:
+    """A patient with two upcoming appointments and `history` messages."""
+    async with session_scope() as db:
+        patient = Patient(
+            full_name="Query Count",
+            phone_number="+15550000000",
+            date_of_birth=date(1990, 1, 1),
+        )
+        conversation = Conversation(patient=patient, status="active")
+        db.add_all([patient, conversation])
+        await db.flush()
+        start = datetime.combine(date.today() + timedelta(days=2), datetime.min.time())
+        for hour in (9, 11):
+            db.add(
+                Appointment(
+                    patient_id=patient.id,
+                    appointment_type="cleaning",
+                    start_time=start.replace(hour=hour),
+                    end_time=start.replace(hour=hour, minute=30),
+                    target_date=start.date(),
+                    status=AppointmentStatus.SCHEDULED.value,
+                )
+            )
+        for i in range(history):
+            sender = SenderTypeEnum.PATIENT if i % 2 == 0 else SenderTypeEnum.AI_AGENT
+            db.add(
+                Message(
+                    conversation_id=conversation.id,
+                    sender_type=sender.value,
+                    content=f"history message {i}",
+                )
+            )
+        await db.commit()
+        return conversation.id
+
+
+async def test_agent_turn_stays_within_query_budget(database):
+    conversation_id = await seed(history=20)
+
+    with appointment_agent.dental_agent.override(model=TestModel(call_tools=[])):
+        for _ in range(3):
+            with count_queries() as counter:
+                await appointment_agent.handle_user_message(
+                    conversation_id=conversation_id, message="Hi again"
+                )
+            assert counter.count <= MAX_AGENT_QUERIES, counter.statements
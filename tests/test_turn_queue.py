@@ -0,0 +1,88 @@
+# tests/test_turn_queue.py
+import asyncio
+
+from pydantic_ai.messages import ModelResponse, ToolCallPart, UserPromptPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+from sqlalchemy import func, select
+
+from app.conversations import appointment_agent, websocket_events
+from app.conversations.interface import (
+    create_conversation,
+    get_messages,
+    process_user_message,
+)
+from app.conversations.models import Conversation, SenderTypeEnum
+from app.conversations.turn_queue import TurnQueue
+from app.db.utils import session_scope
+
+
+async def test_coalesced_messages_are_stored_one_by_one_and_answered_once(database):
+    prompts = []
+
+    async def model(messages, info: AgentInfo):
+        prompts.append(
+            [
+                part.content
+                for message in messages
+                for part in message.parts
+                if isinstance(part, UserPromptPart)
+            ]
+        )
+        return ModelResponse(
+            parts=[ToolCallPart(info.output_tools[0].name, {"message": "Sure."})]
+        )
+
+    conversation = await create_conversation()
+    sent = ["Hi", "I need a cleaning", "next week if possible"]
+    with appointment_agent.dental_agent.override(model=FunctionModel(model)):
+        await process_user_message(conversation_id=conversation.id, content=sent)
+
+    stored = await get_messages(conversation.id)
+    assert [(m.sender_type, m.content) for m in stored] == [
+        *((SenderTypeEnum.PATIENT.value, text) for text in sent),
+        (SenderTypeEnum.AI_AGENT.value, "Sure."),
+    ]
+    # one model call, with the messages once, as the turn's prompt
+    assert prompts == [["\n".join(sent)]]
+
+
+async def test_a_conversation_inbox_is_bounded():
+    turns = []
+    release = asyncio.Event()
+
+    async def handler(conversation_id, messages):
+        turns.append(messages)
+        await release.wait()
+
+    queue = TurnQueue(handler, max_inbox=2)
+    assert queue.submit("c1", "m0")
+    await asyncio.sleep(0)  # the first turn starts and empties the inbox
+    assert queue.submit("c1", "m1")
+    assert queue.submit("c1", "m2")
+    assert not queue.submit("c1", "m3")
+    release.set()
+    await queue.join()
+
+    assert turns == [["m0"], ["m1", "m2"]]
+    assert queue.stats()["rejected"] == 1
+
+
+async def test_a_refused_start_creates_no_conversation(database, monkeypatch):
+    emitted = []
+
+    async def emit(event, data=None, **kwargs):
+        emitted.append((event, data))
+
+    async def never_run(conversation_id, messages):
+        raise AssertionError("no turn should be queued")
+
+    monkeypatch.setattr(
+        websocket_events, "turn_queue", TurnQueue(never_run, max_waiting=0)
+    )
+    monkeypatch.setattr(websocket_events.sio, "emit", emit)
+    await websocket_events.start_conversation("sid-1", {"content": "Hello"})
+
+    async with session_scope() as db:
+        conversations = (await db.execute(select(func.count(Conversation.id)))).scalar()
+    assert conversations == 0
+    assert emitted == [("busy", {"content": "Hello"})]